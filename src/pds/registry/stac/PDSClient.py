@@ -1,65 +1,168 @@
 import logging
-from typing import List, Optional
-from stac_pydantic.shared import BBox
+from typing import List, Optional, Union
+from urllib.parse import quote
+from urllib.parse import quote_plus
+from urllib.parse import urljoin
+
+from fastapi import HTTPException
 from fastapi import Request
-from stac_fastapi.types import stac as stac_types
+from starlette.responses import Response
+from starlette.responses import StreamingResponse
+from stac_fastapi.api.models import GeoJSONResponse
+from stac_fastapi.types.requests import get_base_url
+from stac_fastapi.types.search import BaseSearchPostRequest
+from stac_fastapi.types.stac import LandingPage
+from stac_pydantic.version import STAC_VERSION
 
 
 from stac_fastapi.core.core import CoreClient
+from stac_fastapi.core.utilities import filter_fields
+
+from .database_logic import requested_fields
+from .streaming import ItemStream
+from .streaming import streamed_items
+from .streaming import streaming_item_collection
 
 logger = logging.getLogger(__name__)
 
+
 class PDSClient(CoreClient):
     """PDS OpenSearch Client."""
 
+    async def landing_page(self, **kwargs) -> LandingPage:
+        """Landing page, with a child link to each target catalog."""
+        landing_page = await super().landing_page(**kwargs)
+        base_url = get_base_url(kwargs["request"])
+        landing_page["links"].extend(
+            {
+                "rel": "child",
+                "type": "application/json",
+                "title": catalog_id,
+                "href": urljoin(base_url, f"catalogs/{quote(catalog_id, safe='')}"),
+            }
+            for catalog_id in self.database.get_all_catalog_ids()
+        )
+        return landing_page
+
+    async def get_catalogs(self, request: Request) -> dict:
+        """Get the target catalogs, served from the catalog cache."""
+        base_url = get_base_url(request)
+        catalogs = [
+            self.__catalog_to_stac(catalog_id, catalog, base_url)
+            for catalog_id, catalog in await self.database.get_all_catalogs()
+        ]
+        return {
+            "catalogs": catalogs,
+            "links": [
+                {"rel": "root", "type": "application/json", "href": base_url},
+                {"rel": "self", "type": "application/json", "href": urljoin(base_url, "catalogs")},
+            ],
+            "numberMatched": len(catalogs),
+            "numberReturned": len(catalogs),
+        }
+
+    async def get_catalog(self, catalog_id: str, request: Request) -> dict:
+        """Get a target catalog, with a child link to each of its collections."""
+        catalog = await self.database.find_catalog(catalog_id)
+        return self.__catalog_to_stac(catalog_id, catalog, get_base_url(request))
+
+    def __catalog_to_stac(self, catalog_id: str, catalog: dict, base_url: str) -> dict:
+        """Build the STAC catalog of a target from its entry in the catalog cache."""
+        links: List[dict] = [
+            {
+                "rel": "self",
+                "type": "application/json",
+                "href": urljoin(base_url, f"catalogs/{quote(catalog_id, safe='')}"),
+            },
+            {"rel": "root", "type": "application/json", "href": base_url},
+            {"rel": "parent", "type": "application/json", "href": base_url},
+        ]
+        collection_cache = self.database.collection_cache
+        for collection_id in catalog["collections"]:
+            link = {
+                "rel": "child",
+                "type": "application/json",
+                "href": urljoin(base_url, f"collections/{quote(collection_id, safe='')}"),
+            }
+            title = (collection_cache.get(collection_id) or {}).get("collection", {}).get("title")
+            if title:
+                link["title"] = title
+            links.append(link)
+        return {
+            "type": "Catalog",
+            "stac_version": STAC_VERSION,
+            "id": catalog_id,
+            "title": catalog_id,
+            "description": f"Collections of the PDS products targeting {catalog_id}, {catalog['products']} products",
+            "extent": {
+                "spatial": {"bbox": catalog["bbox"]},
+                "temporal": {"interval": catalog["interval"]},
+            },
+            "links": links,
+        }
+
     async def get_search(
         self,
         request: Request,
-        collections: Optional[List[str]] = None,
-        ids: Optional[List[str]] = None,
-        bbox: Optional[BBox] = None,
-        datetime: Optional[str] = None,
-        limit: Optional[int] = None,
-        query: Optional[str] = None,
-        token: Optional[str] = None,
-        fields: Optional[List[str]] = None,
-        sortby: Optional[str] = None,
-        q: Optional[List[str]] = None,
-        intersects: Optional[str] = None,
         filter_expr: Optional[str] = None,
         filter_lang: Optional[str] = None,
         **kwargs,
-    ) -> stac_types.ItemCollection:
-        """Get search results from the database.
+    ) -> Union[Response, StreamingResponse]:
+        """Perform a search on the catalog, from the parameters of a GET request.
+
+        CQL2-text filters are parsed here, with the parsed filters memoized by expression, and handed over as CQL2-JSON.
+        """
+        if filter_expr and filter_lang != "cql2-json":
+            try:
+                filter_expr = quote_plus(self.database.filters.parse_text(filter_expr))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            filter_lang = "cql2-json"
+        return await super().get_search(request, filter_expr=filter_expr, filter_lang=filter_lang, **kwargs)
+
+    async def post_search(
+        self, search_request: BaseSearchPostRequest, request: Request
+    ) -> Union[Response, StreamingResponse]:
+        """Perform a search on the catalog.
+
+        The fields requested with the fields extension are made available to `PDSDatabaseLogic.execute_search`
+        so that only the registry fields needed to build them are fetched.
+
+        Large pages are streamed: the response is written while the items are fetched and converted, see
+        `PDSRegistrySettings.stream_chunk_size`. Other pages are serialized here, so that the serialization is
+        timed with the other stages of the search.
 
         Args:
-            collections (Optional[List[str]]): List of collection IDs to search in.
-            ids (Optional[List[str]]): List of item IDs to search for.
-            bbox (Optional[BBox]): Bounding box to search in.
-            datetime (Optional[str]): Filter items based on the datetime field.
-            limit (Optional[int]): Maximum number of results to return.
-            query (Optional[str]): Query string to filter the results.
-            token (Optional[str]): Access token to use when searching the catalog.
-            fields (Optional[List[str]]): Fields to include or exclude from the results.
-            sortby (Optional[str]): Sorting options for the results.
-            q (Optional[List[str]]): Free text query to filter the results.
-            intersects (Optional[str]): GeoJSON geometry to search in.
-            kwargs: Additional parameters to be passed to the API.
-        Returns:
-            ItemCollection: Collection of `Item` objects representing the search results.
+            search_request (BaseSearchPostRequest): Request object that includes the parameters for the search.
+            request (Request): The request.
 
-        Raises:
-            HTTPException: If any error occurs while searching the catalog.
+        Returns:
+            Response: The collection of items matching the search criteria, serialized or streamed.
         """
 
         logger.info("Performing PDS item search")
-        items = ["olem ipsum"]  # Placeholder for actual items retrieved from the database
-        links = []
-        count = 0
-        return stac_types.ItemCollection(
-            type="FeatureCollection",
-            features=items,
-            links=links,
-            numberReturned=len(items),
-            numberMatched=count,
+        fields = getattr(search_request, "fields", None)
+        include = set(fields.include) if fields and fields.include else set()
+        exclude = set(fields.exclude) if fields and fields.exclude else set()
+        streams: List[ItemStream] = []
+        metrics = self.database.metrics
+        with metrics.operation("post_search"):
+            fields_token = requested_fields.set((include, exclude))
+            streams_token = streamed_items.set(streams)
+            try:
+                item_collection = await super().post_search(search_request, request)
+            finally:
+                streamed_items.reset(streams_token)
+                requested_fields.reset(fields_token)
+
+            if not streams:
+                with metrics.stage("serialize"):
+                    return GeoJSONResponse(item_collection)
+
+        base_url = str(request.base_url)
+        return streaming_item_collection(
+            streams[0],
+            item_collection,
+            lambda item: filter_fields(self.item_serializer.db_to_stac(item, base_url=base_url), include, exclude),
+            request,
         )
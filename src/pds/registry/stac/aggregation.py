@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+import attr
+import orjson
+from fastapi import HTTPException
+from fastapi import Request
+from stac_fastapi.sfeos_helpers.aggregation import EsAsyncBaseAggregationClient
+
+from .database_logic import PDSDatabaseLogic
+from .types import ITEM_AGGREGATIONS
+
+
+def _aggregation(name: str) -> Dict[str, str]:
+    """Description of an aggregation of ITEM_AGGREGATIONS, as listed by the aggregations end-points."""
+    [kind] = ITEM_AGGREGATIONS[name].keys()
+    if name.endswith("_frequency"):
+        return {
+            "name": name,
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "datetime" if kind == "date_histogram" else "string",
+        }
+    return {"name": name, "data_type": "datetime" if name.startswith("datetime_") else "integer"}
+
+
+@attr.s
+class PDSAggregationClient(EsAsyncBaseAggregationClient):
+    """Aggregations of the registry items, see ITEM_AGGREGATIONS.
+
+    The same aggregations are available on the whole catalog and on each collection; they are computed by
+    `PDSDatabaseLogic.aggregate`, which caches them until new products are harvested.
+    """
+
+    # keyword-only, the base declares a session with a default before them
+    database: PDSDatabaseLogic = attr.ib(kw_only=True)
+    settings = attr.ib(kw_only=True)
+
+    DEFAULT_AGGREGATIONS = [_aggregation(name) for name in ITEM_AGGREGATIONS]
+    # the registry products have no centroid
+    GEO_POINT_AGGREGATIONS: List[Dict[str, str]] = []
+
+    async def get_aggregations(self, collection_id: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        request: Optional[Request] = kwargs.get("request")
+        base_url = str(request.base_url) if request else ""
+        links = [{"rel": "root", "type": "application/json", "href": base_url}]
+        if collection_id is not None:
+            # raises NotFoundError for unknown collections
+            await self.database.find_collection(collection_id)
+            collection_endpoint = urljoin(base_url, f"collections/{collection_id}")
+            links.append({"rel": "collection", "type": "application/json", "href": collection_endpoint})
+            links.append({"rel": "self", "type": "application/json", "href": f"{collection_endpoint}/aggregations"})
+        else:
+            links.append({"rel": "self", "type": "application/json", "href": urljoin(base_url, "aggregations")})
+        return {"type": "AggregationCollection", "aggregations": list(self.DEFAULT_AGGREGATIONS), "links": links}
+
+    def get_filter(self, filter, filter_lang):
+        """Parse CQL2-text filters with the memoized parser of the database logic, see FilterCompiler."""
+        if filter_lang == "cql2-text":
+            try:
+                return orjson.loads(self.database.filters.parse_text(filter))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        return super().get_filter(filter, filter_lang)
+
+    async def aggregate(self, aggregate_request=None, collection_id=None, collections=None, **kwargs):
+        """Aggregate the items matching a search.
+
+        The collections aggregated are handed over to `PDSDatabaseLogic.aggregate`, which filters them, including
+        those of POST requests, which the base client only sets on the request; None aggregates all of them.
+        """
+        if aggregate_request is not None:
+            collection_id = kwargs["request"].path_params.get("collection_id")
+            collections = [collection_id] if collection_id else aggregate_request.collections
+        return await super().aggregate(aggregate_request, collection_id=collection_id, collections=collections or None, **kwargs)
@@ -1,36 +1,243 @@
+import asyncio
+import logging
 import os
+import tempfile
+from copy import deepcopy
+from typing import Literal, Optional, Type, cast
+
 from fastapi import FastAPI
+from fastapi import HTTPException
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from starlette.responses import PlainTextResponse
+from starlette.responses import StreamingResponse
 from stac_fastapi.api.app import StacApi
+from stac_fastapi.api.errors import DEFAULT_STATUS_CODES
+from stac_fastapi.api.models import create_get_request_model
+from stac_fastapi.api.models import create_post_request_model
+from stac_fastapi.types.search import APIRequest
+from stac_fastapi.types.search import BaseSearchGetRequest
+from stac_fastapi.types.search import BaseSearchPostRequest
 from stac_fastapi.opensearch.config import OpensearchSettings
-from stac_fastapi.core.core import CoreClient
+from stac_fastapi.core.extensions.fields import FieldsExtension
+from stac_fastapi.core.extensions.aggregation import EsAggregationExtensionGetRequest
+from stac_fastapi.core.extensions.aggregation import EsAggregationExtensionPostRequest
+from stac_fastapi.extensions.core import AggregationExtension
+from stac_fastapi.extensions.core import CollectionSearchExtension
+from stac_fastapi.extensions.core import FilterExtension
+from stac_fastapi.extensions.core import FreeTextExtension
+from stac_fastapi.extensions.core import SortExtension
+from stac_fastapi.extensions.core import TokenPaginationExtension
+from stac_fastapi.extensions.core.fields import FieldsConformanceClasses
+from stac_fastapi.extensions.core.filter import FilterConformanceClasses
+from stac_fastapi.extensions.core.free_text import FreeTextConformanceClasses
 
+from pds.registry.stac.aggregation import PDSAggregationClient
 from pds.registry.stac.database_logic import PDSDatabaseLogic
+from pds.registry.stac.export import GeoParquetWriter
+from pds.registry.stac.export import export_response
+from pds.registry.stac.filters import PDSFiltersClient
 from pds.registry.stac.PDSClient import PDSClient
+from pds.registry.stac.snapshot import CollectionSnapshot
+from pds.registry.stac.transport import RegistryUnavailableError
 
 # Create the FastAPI app
 app = FastAPI(title="PDS Registry STAC API")
 
 database_logic = PDSDatabaseLogic()
-client = CoreClient(database=database_logic)
+
+fields_extension = FieldsExtension()
+fields_extension.conformance_classes.append(FieldsConformanceClasses.ITEMS)
+
+# CQL2 filters on the item queryables, and the /queryables end-points
+filter_extension = FilterExtension(
+    client=PDSFiltersClient(database=database_logic),
+    conformance_classes=[
+        FilterConformanceClasses.FILTER,
+        FilterConformanceClasses.SEARCH,
+        FilterConformanceClasses.BASIC_CQL2,
+        FilterConformanceClasses.CQL2_JSON,
+        FilterConformanceClasses.CQL2_TEXT,
+        FilterConformanceClasses.ADVANCED_COMPARISON_OPERATORS,
+        FilterConformanceClasses.BASIC_SPATIAL_FUNCTIONS,
+    ],
+)
+
+search_extensions = [
+    fields_extension,
+    FreeTextExtension(conformance_classes=[FreeTextConformanceClasses.SEARCH]),
+    filter_extension,
+    # the token of the next page and the sort of the searches, also read from the body of the POST searches
+    TokenPaginationExtension(),
+    SortExtension(),
+]
+# the request models of the searches, with the parameters of the extensions; the factories are typed looser than
+# what StacApi expects
+get_request_model = cast(Type[BaseSearchGetRequest], create_get_request_model(search_extensions))
+post_request_model = cast(Type[BaseSearchPostRequest], create_post_request_model(search_extensions))
+
+client = PDSClient(database=database_logic, post_request_model=post_request_model)
 settings = OpensearchSettings()
 settings.stac_fastapi_version = "1.0.0"
 settings.stac_fastapi_title = "PDS Registry STAC API"
 settings.stac_fastapi_description = "STAC API for the PDS Registry"
 
+# bbox, datetime and q filters on /collections, served from the collection cache
+collection_search_extension = CollectionSearchExtension.from_extensions([
+    FreeTextExtension(conformance_classes=[FreeTextConformanceClasses.COLLECTIONS]),
+])
+
+# counts and histograms of the items, cached until new products are harvested
+aggregation_extension = AggregationExtension(
+    client=PDSAggregationClient(database=database_logic, settings=settings),
+)
+aggregation_extension.GET = EsAggregationExtensionGetRequest
+aggregation_extension.POST = EsAggregationExtensionPostRequest
+
 # Mount the STAC API
 api = StacApi(
     client=client,
-    settings=settings
+    settings=settings,
+    extensions=[*search_extensions, collection_search_extension, aggregation_extension],
+    search_get_request_model=get_request_model,
+    search_post_request_model=post_request_model,
+    collections_get_request_model=cast(Type[APIRequest], collection_search_extension.GET),
+    exceptions={**DEFAULT_STATUS_CODES, RegistryUnavailableError: 503},
 )
 app = api.app
 app.root_path = os.getenv("STAC_FASTAPI_ROOT_PATH", "")
 
 
+@app.on_event("startup")
+async def start_collection_cache() -> None:
+    """Load the collection and catalog caches in the background, without delaying the startup."""
+    database_logic.collection_cache.start()
+    database_logic.catalog_cache.start()
+
+
+@app.on_event("shutdown")
+async def stop_collection_cache() -> None:
+    await database_logic.collection_cache.stop()
+    await database_logic.catalog_cache.stop()
+    await database_logic.client.close()
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready() -> ORJSONResponse:
+    """Readiness probe, succeeds once the collection cache is loaded."""
+    status = database_logic.collection_cache.status()
+    status["collection_documents"] = database_logic.collection_documents.stats()
+    status["catalogs"] = database_logic.catalog_cache.status()
+    if database_logic.collection_snapshot:
+        status["collection_snapshot_age"] = database_logic.collection_snapshot.age()
+    if database_logic.result_cache:
+        status["search_results"] = database_logic.result_cache.stats()
+    if database_logic.circuit_breaker:
+        status["registry_circuit"] = database_logic.circuit_breaker.stats()
+    if database_logic.single_flight:
+        status["coalesced_requests"] = database_logic.single_flight.stats()
+    return ORJSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/catalogs")
+async def get_catalogs(request: Request) -> ORJSONResponse:
+    """Catalogs of the targets of the products (Mars, Moon...), linking to their collections."""
+    return ORJSONResponse(await client.get_catalogs(request))
+
+
+@app.get("/catalogs/{catalog_id}")
+async def get_catalog(catalog_id: str, request: Request) -> ORJSONResponse:
+    """Catalog of a target, linking to the collections of its products."""
+    return ORJSONResponse(await client.get_catalog(catalog_id, request))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Latency histograms of the stages of the registry operations, cache, connection and request gauges, in the
+    Prometheus text format."""
+    return PlainTextResponse(
+        database_logic.metrics.render(database_logic.metric_samples()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/collections/{collection_id}/export")
+async def export_collection(
+        collection_id: str,
+        request: Request,
+        format: Literal["ndjson", "geoparquet"] = "ndjson",
+        cursor: Optional[str] = None,
+) -> StreamingResponse:
+    """Export all the items of a collection, as newline delimited JSON or GeoParquet.
+
+    An interrupted export is resumed with `cursor` set to the id of the last item received.
+    """
+    await database_logic.find_collection(collection_id)
+
+    geoparquet_writer = None
+    if format == "geoparquet":
+        try:
+            geoparquet_writer = GeoParquetWriter()
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+
+    base_url = str(request.base_url)
+    return export_response(
+        database_logic.export_items(collection_id, after=cursor),
+        lambda item: client.item_serializer.db_to_stac(item, base_url=base_url),
+        geoparquet_writer=geoparquet_writer,
+        filename=collection_id.replace(":", "_"),
+    )
+
+
+def _prepare_workers() -> None:
+    """Build the collection snapshot before the workers start, so that they load it instead of crawling the registry.
+
+    The workers are spawned with the environment of this process, the snapshot path is set there when missing.
+    """
+    registry_settings = database_logic.registry_settings
+    path = registry_settings.collection_snapshot_path
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), "pds-registry-stac", "collections.snapshot")
+        os.environ["PDS_REGISTRY_COLLECTION_SNAPSHOT_PATH"] = path
+    database_logic.collection_snapshot = CollectionSnapshot(
+        path, max_age=registry_settings.collection_cache_refresh_interval
+    )
+
+    async def build() -> bool:
+        try:
+            return await database_logic.collection_cache.refresh()
+        finally:
+            await database_logic.client.close()
+
+    if not asyncio.run(build()):
+        logging.getLogger(__name__).warning("Collection snapshot not built, the workers build it once started")
+
+
+def _log_config(log_level: str) -> dict:
+    import uvicorn.config
+
+    log_config = deepcopy(uvicorn.config.LOGGING_CONFIG)
+    log_config["loggers"]["pds"] = {"handlers": ["default"], "level": log_level.upper(), "propagate": False}
+    # the registry client logs every request at the info level
+    log_config["loggers"]["opensearch"] = {"handlers": ["default"], "level": "WARNING", "propagate": False}
+    return log_config
+
+
 def run() -> None:
-    """Run app from command line using uvicorn if available."""
+    """Run app from command line using uvicorn if available.
+
+    With PDS_REGISTRY_SERVE_WORKERS set, the API is served by that many worker processes, see `_prepare_workers`,
+    with uvloop and httptools when they are installed (`serve` extra); on shutdown, the requests in progress are
+    given PDS_REGISTRY_SERVE_GRACEFUL_TIMEOUT seconds to complete. Otherwise the development server is started.
+    """
     try:
         import uvicorn
+    except ImportError:
+        raise RuntimeError("Uvicorn must be installed in order to use command")
 
+    registry_settings = database_logic.registry_settings
+    if registry_settings.serve_workers is None:
         uvicorn.run(
             "pds.registry.stac.app:app",
             host=settings.app_host,
@@ -38,8 +245,24 @@ def run() -> None:
             log_level="debug",
             reload=settings.reload,
         )
-    except ImportError:
-        raise RuntimeError("Uvicorn must be installed in order to use command")
+        return
+
+    workers = registry_settings.serve_workers or os.cpu_count() or 1
+    if workers > 1:
+        _prepare_workers()
+    uvicorn.run(
+        "pds.registry.stac.app:app",
+        host=settings.app_host,
+        port=settings.app_port,
+        workers=workers,
+        loop="auto",
+        http="auto",
+        log_config=_log_config(registry_settings.serve_log_level),
+        log_level=registry_settings.serve_log_level,
+        access_log=registry_settings.serve_access_log,
+        timeout_graceful_shutdown=registry_settings.serve_graceful_timeout,
+        proxy_headers=True,
+    )
 
 
 if __name__ == "__main__":
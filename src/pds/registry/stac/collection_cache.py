@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .collection_index import CollectionIndex
+from .spatial import RTree
+from .spatial import split_antimeridian
+from .temporal import Interval
+from .temporal import overlaps
+from .temporal import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class CacheState(str, Enum):
+    """Readiness of the collection cache."""
+
+    COLD = "cold"  # nothing loaded yet, no load in progress
+    LOADING = "loading"  # first load in progress
+    READY = "ready"  # last refresh succeeded
+    STALE = "stale"  # last refresh failed, previous content is still served
+
+
+class CollectionCache:
+    """Collections ancillary information (extents and STAC documents), loaded in the background from the registry.
+
+    The content is refreshed every `refresh_interval` seconds with stale-while-revalidate semantics:
+    readers always get the last successfully loaded content immediately while the refresh runs
+    in the background, and a failed refresh keeps the previous content until the next attempt.
+
+    The loader yields the content in chunks. During the first load the chunks are published as they come,
+    so that collections are served before the whole registry has been crawled; later refreshes are built aside
+    and swapped in at once, so that collections removed from the registry disappear from the cache.
+
+    The refresh loop is started with `start()` (on application startup) or lazily on first access
+    from a running event loop, so that building the cache never blocks the import of the application.
+
+    The same cache holds other documents derived from the collections, e.g. the catalogs, under another `name`,
+    which is the one of its logs and readiness status.
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[], AsyncIterator[Dict[str, dict]]],
+            refresh_interval: float,
+            retry_interval: float,
+            name: str = "collection",
+    ):
+        self._loader = loader
+        self.name = name
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+
+        self._collections: Dict[str, dict] = {}
+        self._version = 0
+        # structures derived from the content, by name, with the version of the content they were built from
+        self._derived: Dict[str, Tuple[int, Any]] = {}
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.state = CacheState.COLD
+        self.last_refresh: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the cache has been loaded at least once."""
+        return self._ready.is_set()
+
+    def start(self):
+        """Start the background refresh loop in the running event loop, if not already running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="collection-cache-refresh")
+
+    def ensure_started(self):
+        """Start the background refresh loop if called from a running event loop."""
+        try:
+            self.start()
+        except RuntimeError:
+            # no running event loop (e.g. module import), the loop is started on application startup
+            pass
+
+    async def stop(self):
+        """Cancel the background refresh loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            succeeded = await self.refresh()
+            await asyncio.sleep(self.refresh_interval if succeeded else self.retry_interval)
+
+    async def refresh(self) -> bool:
+        """Reload the cache content from the registry.
+
+        Returns:
+            bool: True if the refresh succeeded, False if the previous content is kept.
+        """
+        if self.state is CacheState.COLD:
+            self.state = CacheState.LOADING
+        start = time.monotonic()
+        # the chunks of the first load are published as they come, a refresh is published once complete
+        publishing = not self.ready
+        collections = self._collections if publishing else {}
+        try:
+            async for chunk in self._loader():
+                collections.update(chunk)
+                if publishing:
+                    self._version += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"The {self.name} cache refresh failed")
+            self.last_error = str(e)
+            self.state = CacheState.STALE if self.ready else CacheState.COLD
+            return False
+
+        if not publishing:
+            self._collections = collections
+            self._version += 1
+        self.last_refresh = time.time()
+        self.last_error = None
+        self.state = CacheState.READY
+        self._ready.set()
+        logger.info(f"The {self.name} cache refreshed with {len(collections)} {self.name}s in {time.monotonic() - start:.2f}s")
+        return True
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the first load of the cache.
+
+        Args:
+            timeout (Optional[float]): Maximum number of seconds to wait, None waits forever.
+
+        Returns:
+            bool: True if the cache is loaded, False if the timeout expired first.
+        """
+        self.ensure_started()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.ready
+
+    def get(self, collection_id: str, default: Optional[dict] = None) -> Optional[dict]:
+        """Get the ancillary information of a collection, as currently cached."""
+        self.ensure_started()
+        return self._collections.get(collection_id, default)
+
+    def ids(self) -> list[str]:
+        """Get the ids of the collections currently cached."""
+        self.ensure_started()
+        return list(self._collections.keys())
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        self.ensure_started()
+        return iter(list(self._collections.items()))
+
+    def _derive(self, name: str, build: Callable[[Dict[str, dict]], Any]) -> Any:
+        """Get a structure derived from the content, rebuilt when the content changes."""
+        self.ensure_started()
+        version, derived = self._derived.get(name, (None, None))
+        if version != self._version:
+            version = self._version
+            derived = build(dict(self._collections))
+            self._derived[name] = (version, derived)
+        return derived
+
+    @property
+    def index(self) -> CollectionIndex:
+        """Index of the collection STAC documents currently cached."""
+        return self._derive(
+            "index",
+            lambda collections: CollectionIndex(entry["collection"] for entry in collections.values() if "collection" in entry),
+        )
+
+    @property
+    def spatial_index(self) -> RTree:
+        """R-tree of the spatial extents of the collections currently cached, by collection id."""
+        return self._derive(
+            "spatial_index",
+            lambda collections: RTree(
+                (collection_id, box)
+                for collection_id, entry in collections.items()
+                for box in split_antimeridian(entry["bbox"][0])
+            ),
+        )
+
+    @property
+    def product_intervals(self) -> Dict[str, Optional[Interval]]:
+        """Time spans of the products of the collections currently cached, by collection id.
+
+        The span is None for the collections without dated products; the collections loaded without their span,
+        e.g. from an older snapshot, are left out.
+        """
+        def span(interval: List[Optional[str]]) -> Optional[Interval]:
+            if interval[0] is None and interval[1] is None:
+                return None
+            return parse_datetime(interval[0]), parse_datetime(interval[1])
+
+        return self._derive(
+            "product_intervals",
+            lambda collections: {
+                collection_id: span(entry["interval"])
+                for collection_id, entry in collections.items()
+                if "interval" in entry
+            },
+        )
+
+    def disjoint(self, interval: Interval) -> Set[str]:
+        """Ids of the collections none of whose products overlaps the interval, see temporal_filter."""
+        return {
+            collection_id
+            for collection_id, span in self.product_intervals.items()
+            if span is None or not overlaps(span[0], span[1], interval)
+        }
+
+    def __contains__(self, collection_id: str) -> bool:
+        return collection_id in self._collections
+
+    def __len__(self) -> int:
+        return len(self._collections)
+
+    def status(self) -> dict:
+        """Readiness state of the cache, as reported by the readiness endpoint."""
+        return {
+            "state": self.state.value,
+            "ready": self.ready,
+            f"{self.name}s": len(self._collections),
+            "last_refresh": self.last_refresh,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,151 @@
+import bisect
+import re
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .spatial import Box
+from .spatial import boxes_intersect
+from .spatial import split_antimeridian
+from .temporal import Interval
+from .temporal import overlaps
+from .temporal import parse_datetime
+from .temporal import parse_datetime_interval
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text: str) -> List[str]:
+    """Lower case words of a text, as indexed and searched by the free text queries."""
+    return _WORD.findall(text.lower())
+
+
+class _IndexedCollection:
+    """A collection STAC document with its pre-computed filtering keys."""
+
+    __slots__ = ("id", "document", "boxes", "start", "end", "words")
+
+    def __init__(self, document: dict):
+        self.id = document["id"]
+        self.document = document
+
+        extent = document.get("extent", {})
+        bboxes = extent.get("spatial", {}).get("bbox") or []
+        self.boxes = split_antimeridian(bboxes[0]) if bboxes else []
+
+        # an undated collection has no interval, or a missing or partial first one: its missing bounds are open
+        intervals = extent.get("temporal", {}).get("interval") or []
+        interval = (intervals[0] if intervals else None) or []
+        self.start = parse_datetime(interval[0]) if len(interval) > 0 else None
+        self.end = parse_datetime(interval[1]) if len(interval) > 1 else None
+
+        self.words = set(words(" ".join([
+            self.id,
+            document.get("title") or "",
+            document.get("description") or "",
+            *(document.get("keywords") or []),
+        ])))
+
+    def intersects(self, boxes: List[Box]) -> bool:
+        return any(boxes_intersect(a, b) for a in self.boxes for b in boxes)
+
+    def overlaps(self, interval: Interval) -> bool:
+        return overlaps(self.start, self.end, interval)
+
+
+class CollectionIndex:
+    """In-memory index of the collection STAC documents, serving the `/collections` end-point.
+
+    Collections are ordered by id; the pagination token is the id of the last collection of the previous page
+    so that paging stays consistent when the index is rebuilt between two pages.
+
+    The free text queries are served by an inverted index of the words of the collections, sorted so that the
+    words starting with a query word are found by bisection.
+    """
+
+    def __init__(self, documents: Iterable[dict]):
+        self._collections = sorted((_IndexedCollection(document) for document in documents), key=lambda c: c.id)
+        # positions of the collections in _collections, by word
+        self._postings: Dict[str, Set[int]] = {}
+        for position, collection in enumerate(self._collections):
+            for word in collection.words:
+                self._postings.setdefault(word, set()).add(position)
+        self._vocabulary = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._collections)
+
+    def __prefixed(self, prefix: str) -> Set[int]:
+        """Positions of the collections with a word starting with the prefix."""
+        positions: Set[int] = set()
+        i = bisect.bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            positions |= self._postings[self._vocabulary[i]]
+            i += 1
+        return positions
+
+    def matching(self, terms: List[str]) -> Set[int]:
+        """Positions of the collections matching any of the free text terms.
+
+        A collection matches a term when each word of the term starts one of the words of its id, title,
+        description or keywords, e.g. `mars odys` matches the Mars Odyssey collections.
+        """
+        matched: Set[int] = set()
+        for term in terms:
+            term_words = words(term)
+            if not term_words:
+                continue
+            positions = self.__prefixed(term_words[0])
+            for word in term_words[1:]:
+                if not positions:
+                    break
+                positions &= self.__prefixed(word)
+            matched |= positions
+        return matched
+
+    def search(
+            self,
+            limit: int,
+            token: Optional[str] = None,
+            bbox: Optional[List[float]] = None,
+            datetime: Optional[str] = None,
+            q: Optional[List[str]] = None,
+    ) -> Tuple[List[dict], Optional[str], int]:
+        """Filter and page the collections.
+
+        Args:
+            limit (int): Maximum number of collections returned.
+            token (Optional[str]): Pagination token returned with the previous page.
+            bbox (Optional[List[float]]): Only return the collections whose spatial extent intersects this bounding box.
+            datetime (Optional[str]): Only return the collections whose temporal extent overlaps this datetime interval.
+            q (Optional[List[str]]): Only return the collections matching one of these free text terms, see `matching`.
+
+        Returns:
+            Tuple[List[dict], Optional[str], int]: the page of collections, the token of the next page if any and
+            the number of collections matching the filters.
+        """
+        candidates = self._collections
+
+        # the most selective filter first, from the inverted index
+        if q:
+            candidates = [self._collections[position] for position in sorted(self.matching(q))]
+
+        if bbox:
+            boxes = split_antimeridian(bbox)
+            candidates = [c for c in candidates if c.intersects(boxes)]
+
+        interval = parse_datetime_interval(datetime) if datetime else None
+        if interval:
+            candidates = [c for c in candidates if c.overlaps(interval)]
+
+        first = 0
+        if token:
+            after = urlsafe_b64decode(token).decode()
+            first = bisect.bisect_right([c.id for c in candidates], after)
+
+        page = candidates[first:first + limit]
+        next_token = None
+        if first + limit < len(candidates):
+            next_token = urlsafe_b64encode(page[-1].id.encode()).decode()
+
+        return [c.document for c in page], next_token, len(candidates)
@@ -0,0 +1,127 @@
+"""PDS Registry STAC API configuration."""
+
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings
+from pydantic_settings import SettingsConfigDict
+
+
+class PDSRegistrySettings(BaseSettings):
+    """Settings specific to the PDS registry backend.
+
+    Every setting can be overridden with an environment variable prefixed with ``PDS_REGISTRY_``,
+    e.g. ``PDS_REGISTRY_COLLECTION_CACHE_REFRESH_INTERVAL=300``.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="PDS_REGISTRY_")
+
+    # seconds between two background refreshes of the collection cache
+    collection_cache_refresh_interval: float = 600.0
+    # seconds before retrying a failed refresh of the collection cache
+    collection_cache_retry_interval: float = 30.0
+    # seconds a request waits for the first load of the collection cache before answering with what is available
+    collection_cache_ready_timeout: float = 5.0
+    # number of collections computed by each page of the collection extents aggregation
+    collection_cache_page_size: int = 500
+
+    # same as the collection cache settings, for the catalog cache: the targets of the products with their collections
+    catalog_cache_refresh_interval: float = 600.0
+    catalog_cache_retry_interval: float = 30.0
+    catalog_cache_ready_timeout: float = 5.0
+    # number of (target, collection) pairs computed by each page of the catalog aggregation
+    catalog_cache_page_size: int = 500
+
+    # file materializing the collection cache for the workers: each of them parses its own copy at startup and only
+    # one of them crawls the registry when it is older than the refresh interval; unset, each worker crawls the registry
+    collection_snapshot_path: Optional[str] = None
+
+    # maximum number of converted collection documents kept in memory, shared by find_collection and the collection cache
+    collection_documents_cache_size: int = 1024
+    # seconds a converted collection document is served from memory before being fetched again
+    collection_documents_cache_ttl: float = 3600.0
+
+    # how numberMatched is computed:
+    # - exact: a count request runs along the search
+    # - track_total_hits: the search counts up to count_track_total_hits products, numberMatched is omitted beyond
+    # - estimate: the search counts up to 10000 products, numberMatched is a lower bound beyond
+    # - off: numberMatched is omitted
+    count_mode: Literal["exact", "track_total_hits", "estimate", "off"] = "exact"
+    count_track_total_hits: int = 10000
+    # maximum number of counts kept in memory, so that paging through a search does not count it again
+    count_cache_size: int = 1024
+    # seconds a count is reused
+    count_cache_ttl: float = 60.0
+
+    # where search results are cached: in the memory of each instance, in a Redis store shared by instances, or off
+    result_cache_backend: Literal["memory", "redis", "off"] = "memory"
+    # total size of the search results kept in memory by the memory backend
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    # URL of the Redis store of the redis backend, e.g. redis://localhost:6379/0
+    result_cache_redis_url: Optional[str] = None
+    # seconds a search result is reused
+    result_cache_ttl: float = 300.0
+    # seconds between two checks of the latest harvest date, which invalidates the search results when it moves
+    result_cache_watermark_interval: float = 30.0
+
+    # transport of the registry clients; the hosts, credentials and TLS are the ES_* settings of stac-fastapi-opensearch
+    # connections kept open to each registry node
+    registry_pool_maxsize: int = 20
+    # gzip the request bodies and accept gzipped responses
+    registry_http_compress: bool = True
+    # seconds before a registry request times out, by default and by kind of request
+    registry_timeout: float = 10.0
+    registry_search_timeout: float = 10.0
+    registry_count_timeout: float = 10.0
+    registry_get_timeout: float = 5.0
+    registry_aggregation_timeout: float = 60.0
+    # retries of a request on another connection, after a connection error or a 502, 503 or 504 response
+    registry_max_retries: int = 3
+    # also retry the requests which timed out
+    registry_retry_on_timeout: bool = False
+    # consecutive registry failures (connection errors, timeouts, server errors) after which the requests fail fast
+    # with a 503, 0 disables the circuit breaker
+    registry_circuit_failure_threshold: int = 5
+    # seconds the requests fail fast before one request probes whether the registry recovered
+    registry_circuit_reset_timeout: float = 30.0
+
+    # concurrent identical registry requests share a single request and its response
+    coalesce_requests: bool = True
+
+    # item pages with a larger limit are streamed: fetched, converted and written in chunks of this many items,
+    # so that the memory used by a request does not grow with its limit; 0 disables streaming
+    stream_chunk_size: int = 500
+
+    # page searches in a point in time of the registry index, opened when the second page is read and reused until the last
+    pagination_point_in_time: bool = True
+    # how long the point in time of a paged search is kept between two pages
+    pagination_keep_alive: str = "5m"
+
+    # number of products read by each request of a collection export
+    export_batch_size: int = 5000
+    # how long the point in time of a collection export is kept between two of its requests
+    export_keep_alive: str = "5m"
+
+    # maximum number of collections whose facets, the distinct values of the keyword sources, are kept in memory;
+    # they are computed again after each refresh of the collection cache
+    facets_cache_size: int = 1024
+    # facets with more distinct values in a collection are not listed
+    facets_max_values: int = 100
+
+    # maximum number of CQL2 filters kept parsed and compiled into registry queries
+    filter_cache_size: int = 1024
+
+    # narrow the collections searched by datetime to those with products dated in the searched interval, from the
+    # first to the last of the start and stop date times of their products, as computed with their extents
+    temporal_pruning: bool = True
+
+    # maximum number of shards an aggregation request runs on concurrently on each node
+    aggregation_max_concurrent_shard_requests: int = 2
+
+    # production serving by app.run: number of worker processes, 0 for one per CPU; unset, app.run starts the
+    # single process development server, reloaded on code changes if RELOAD is set
+    serve_workers: Optional[int] = None
+    # log level of the workers, the registry client only logs its warnings
+    serve_log_level: Literal["critical", "error", "warning", "info", "debug"] = "info"
+    serve_access_log: bool = True
+    # seconds the requests in progress are given to complete on shutdown
+    serve_graceful_timeout: float = 30.0
@@ -0,0 +1,109 @@
+from typing import Any, Dict
+
+import orjson
+from pygeofilter.backends.cql2_json import to_cql2
+from pygeofilter.parsers.cql2_text import parse as parse_cql2_text
+from stac_fastapi.core.extensions.filter import AdvancedComparisonOp
+from stac_fastapi.core.extensions.filter import ComparisonOp
+from stac_fastapi.core.extensions.filter import LogicalOp
+from stac_fastapi.core.extensions.filter import SpatialOp
+from stac_fastapi.sfeos_helpers.filter import to_es
+
+from .lru_cache import LRUCache
+from .lru_cache import fingerprint
+from .types import Queryable
+
+
+_LOGICAL_OPS = {op.value for op in LogicalOp}
+# operators translated by to_es, by lower case name
+_SUPPORTED_OPS = {op.value.lower(): op.value for op in (*LogicalOp, *ComparisonOp, *AdvancedComparisonOp, *SpatialOp)}
+
+
+class FilterCompiler:
+    """Compiles CQL2 filters on the item queryables into registry queries.
+
+    The property names of the filters are translated into the registry fields with the field-alias table of the
+    queryables, with or without their `properties.` prefix, e.g. `pds:target` is `pds:Target_Identification/pds:name`.
+    The parsed CQL2-text filters and the compiled filters are memoized, by expression and by fingerprint, so that
+    repeated filters are not parsed nor translated again.
+    """
+
+    def __init__(self, queryables: Dict[str, Queryable], cache_size: int):
+        self.fields: Dict[str, str] = {}
+        for name, queryable in queryables.items():
+            self.fields[name] = queryable.field
+            self.fields[name.removeprefix("properties.")] = queryable.field
+        # the translation of a filter never changes, the entries do not expire
+        self.parsed = LRUCache(maxsize=cache_size, ttl=float("inf"))
+        self.compiled = LRUCache(maxsize=cache_size, ttl=float("inf"))
+
+    def parse_text(self, expression: str) -> str:
+        """Parse a CQL2-text filter.
+
+        Returns:
+            str: the filter as CQL2-JSON.
+
+        Raises:
+            ValueError: if the expression is not valid CQL2-text.
+        """
+        parsed = self.parsed.get(expression)
+        if parsed is None:
+            try:
+                parsed = to_cql2(parse_cql2_text(expression))
+            except Exception as e:
+                raise ValueError(f"Invalid CQL2-text filter: {str(e).splitlines()[0]}") from e
+            self.parsed.put(expression, parsed)
+        return parsed
+
+    def compile(self, cql2: Dict[str, Any]) -> Dict[str, Any]:
+        """Compile a CQL2-JSON filter into a registry query; the query is shared, it must not be altered.
+
+        Raises:
+            ValueError: if the filter has operators or properties which are not supported.
+        """
+        key = fingerprint(cql2)
+        query = self.compiled.get(key)
+        if query is None:
+            query = to_es(self.fields, self.__normalize(cql2))
+            self.compiled.put(key, query)
+        return query
+
+    def __normalize(self, node: Any) -> Any:
+        """Check the operators and the properties of a filter and simplify it for the translation.
+
+        The nested conjunctions and disjunctions are flattened, the dates and timestamps are replaced by their
+        RFC 3339 string, which the registry compares with the date fields.
+        """
+        if isinstance(node, list):
+            return [self.__normalize(value) for value in node]
+        if not isinstance(node, dict):
+            return node
+
+        if "property" in node:
+            if node["property"] not in self.fields:
+                raise ValueError(f"Unknown queryable {node['property']}, see the queryables of the API")
+            return node
+        if "timestamp" in node or "date" in node:
+            return node.get("timestamp", node.get("date"))
+        if node.get("function") == "date" and len(node.get("args", [])) == 1:
+            return node["args"][0]
+        if "interval" in node or "function" in node:
+            raise ValueError(f"Unsupported filter value {orjson.dumps(node).decode()}")
+        if "op" not in node:
+            # a GeoJSON geometry
+            return node
+
+        op = _SUPPORTED_OPS.get(str(node["op"]).lower())
+        if op is None:
+            raise ValueError(f"Unsupported filter operator {node['op']}")
+        args = self.__normalize(node.get("args", []))
+        if op in _LOGICAL_OPS:
+            if op != LogicalOp.NOT.value:
+                args = [
+                    nested_arg
+                    for arg in args
+                    for nested_arg in (arg["args"] if isinstance(arg, dict) and arg.get("op") == op else [arg])
+                ]
+        elif not args or not isinstance(args[0], dict) or "property" not in args[0]:
+            raise ValueError(f"The first argument of {node['op']} must be a queryable")
+        return {"op": op, "args": args}
@@ -1,131 +1,487 @@
 import asyncio
 import logging
 import orjson
+import re
+from contextvars import ContextVar
+from copy import deepcopy
 from functools import partial
 from base64 import urlsafe_b64decode
 from base64 import urlsafe_b64encode
-from typing import Any, Dict, List, Iterable, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Iterable, Iterator, Optional, Set, Tuple
 
 
 from stac_pydantic.shared import BBox
 
 from stac_fastapi.core.utilities import MAX_LIMIT
+from stac_fastapi.sfeos_helpers.database import return_date
+from stac_fastapi.sfeos_helpers.mappings import Geometry
+from stac_fastapi.sfeos_helpers.search_engine import IndexInsertionFactory
+from stac_fastapi.sfeos_helpers.search_engine import IndexSelectorFactory
 from stac_fastapi.opensearch.database_logic import DatabaseLogic
+from stac_fastapi.types.errors import InvalidQueryParameter
 from stac_fastapi.types.errors import NotFoundError
+from opensearchpy.helpers.query import Q
 from opensearchpy.helpers.search import Search
+from opensearchpy import AsyncOpenSearch
+from opensearchpy import OpenSearch
 from opensearchpy import exceptions
 
-from .types import Collection
-from .types import Item
+from .collection_cache import CollectionCache
+from .config import PDSRegistrySettings
+from .cql2 import FilterCompiler
+from .lru_cache import LRUCache
+from .lru_cache import fingerprint
+from .metrics import Metrics
+from .metrics import Sample
+from .metrics import TimedJSONSerializer
+from .metrics import timed
+from .result_cache import MemoryResultCacheBackend
+from .result_cache import RedisResultCacheBackend
+from .result_cache import ResultCache
+from .result_cache import ResultCacheBackend
+from .single_flight import SingleFlight
+from .snapshot import CollectionSnapshot
+from .spatial import box_to_polygon
+from .spatial import geometry_bounds
+from .spatial import merge_longitude_ranges
+from .spatial import split_antimeridian
+from .streaming import ItemStream
+from .streaming import streamed_items
+from .temporal import START_DATE_TIME
+from .temporal import STOP_DATE_TIME
+from .temporal import Interval
+from .temporal import search_interval
+from .temporal import temporal_filter
+from .transport import CircuitBreaker
+from .transport import client_config
+from .types import ITEM_AGGREGATIONS
+from .types import ITEM_QUERYABLES
+from .types import ITEM_TEXT_FIELDS
+from .types import collection_to_stac
+from .types import item_source_fields
+from .types import item_to_stac
+from .types import items_to_stac
 
 logger = logging.getLogger(__name__)
 
+# the collection of a product
+ITEM_COLLECTION_FIELD = "ops:Provenance/ops:parent_collection_identifier"
+# the targets of a product, which the catalogs are made of
+TARGET_FIELD = "pds:Target_Identification/pds:name"
+
+
+def _cancel(task: asyncio.Task):
+    """Cancel a task whose result is not needed anymore, without leaving its exception unretrieved."""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+def _fold_bounds(total: dict, bucket: dict) -> dict:
+    """Combine the bounds of an aggregation bucket into a total: counts are added, min_ and max_ metrics combined."""
+    for name, value in bucket.items():
+        if name == "doc_count":
+            total[name] = total.get(name, 0) + value
+        elif name.startswith(("min_", "max_")):
+            metrics = [m for m in (total.get(name), value) if m and m.get("value") is not None]
+            function = min if name.startswith("min_") else max
+            total[name] = function(metrics, key=lambda m: m["value"]) if metrics else {"value": None}
+        elif isinstance(value, dict) and "doc_count" in value:
+            total[name] = _fold_bounds(total.get(name, {}), value)
+    return total
+
+
+def _date(metric: dict) -> Optional[str]:
+    return metric.get("value_as_string") or metric.get("value")
+
+
+def _product_interval(bucket: dict) -> List[Optional[str]]:
+    """Time span of the products of an aggregation bucket with the dates of __add_dates.
+
+    A product spans from its start to its stop date time, or is an instant if it has only one of them, see
+    temporal_filter; both bounds are None if no product of the bucket is dated.
+    """
+    starts = [d for d in (_date(bucket["min_start_date_time"]), _date(bucket["min_stop_date_time"])) if d]
+    ends = [d for d in (_date(bucket["max_stop_date_time"]), _date(bucket["max_start_date_time"])) if d]
+    return [min(starts) if starts else None, max(ends) if ends else None]
+
+
+def _word_query(word: str, fields: List[str]) -> dict:
+    """OpenSearch query on the documents with a word in one of the fields, whatever its case.
+
+    The text fields of the registry are keywords, matched whole and case sensitively by the full text queries:
+    the word is searched with a case insensitive regular expression, between non word characters or the ends of
+    the value.
+    """
+    pattern = f"(.*[^a-zA-Z0-9_])?{word}([^a-zA-Z0-9_].*)?"
+    return {
+        "bool": {
+            "should": [{"regexp": {field: {"value": pattern, "case_insensitive": True}}} for field in fields],
+            "minimum_should_match": 1,
+        }
+    }
+
+
+def _geo_shapes(query: Any) -> Iterable[dict]:
+    """Shapes the bounding polygon of every product matching an OpenSearch query intersects.
+
+    They are the shapes of the geo_shape filters on `bbox_polygon` required by the query, at its top level or in
+    the filter and must clauses of its bool queries; the shapes under must_not or should clauses, or searched with
+    the disjoint relation, do not bound the products matching, e.g. those of the CQL2 filters with NOT or OR.
+    """
+    if not isinstance(query, dict):
+        return
+    geo_shape = query.get("geo_shape", {}).get("bbox_polygon")
+    if geo_shape and geo_shape.get("relation", "intersects") in ("intersects", "within", "contains"):
+        yield geo_shape["shape"]
+    for occurrence in ("filter", "must"):
+        clauses = query.get("bool", {}).get(occurrence, [])
+        for clause in clauses if isinstance(clauses, list) else [clauses]:
+            yield from _geo_shapes(clause)
+
+
+# include and exclude sets of the fields extension for the current search, set by PDSClient.post_search
+requested_fields: ContextVar[Tuple[Set[str], Set[str]]] = ContextVar("requested_fields", default=(set(), set()))
+
+
 class PDSDatabaseLogic(DatabaseLogic):
     """Database logic."""
 
     PRODUCT_INDEX_NAME = "registry"
     DEFAULT_SORT = "ops:Harvest_Info/ops:harvest_date_time"
+    # unique sort of the products, after their sort
+    TIEBREAKER_SORT = "lidvid"
+    # products whose bounding coordinates cross the antimeridian
+    CROSSING_ANTIMERIDIAN = Q("script", script={
+        "source": "def w = doc['cart:Bounding_Coordinates/cart:west_bounding_coordinate'];"
+                  " def e = doc['cart:Bounding_Coordinates/cart:east_bounding_coordinate'];"
+                  " return w.size() > 0 && e.size() > 0 && w.value > e.value;",
+        "lang": "painless",
+    })
 
     def __init__(self):
+        # read by __attrs_post_init__, which creates the clients
+        self.registry_settings = PDSRegistrySettings()
+        # latency of the stages of the operations, see metrics()
+        self.metrics = Metrics()
         super().__init__()
-        self.__found_collections_cache: Optional[Dict[str, dict]] = self.__get_all_collection_ids()
+        # written by one worker and loaded by the others instead of crawling the registry, see CollectionSnapshot
+        self.collection_snapshot = None
+        if self.registry_settings.collection_snapshot_path:
+            self.collection_snapshot = CollectionSnapshot(
+                self.registry_settings.collection_snapshot_path,
+                max_age=self.registry_settings.collection_cache_refresh_interval,
+            )
+        # loaded in the background, see CollectionCache
+        self.collection_cache = CollectionCache(
+            self.__load_collections,
+            refresh_interval=self.registry_settings.collection_cache_refresh_interval,
+            retry_interval=self.registry_settings.collection_cache_retry_interval,
+        )
+        # the targets of the products, with their collections and extents, see get_all_catalog_ids
+        self.catalog_cache = CollectionCache(
+            self.__load_catalogs,
+            refresh_interval=self.registry_settings.catalog_cache_refresh_interval,
+            retry_interval=self.registry_settings.catalog_cache_retry_interval,
+            name="catalog",
+        )
+        # number of products matching a query, by query fingerprint
+        self.counts = LRUCache(
+            maxsize=self.registry_settings.count_cache_size,
+            ttl=self.registry_settings.count_cache_ttl,
+        )
+        # search results, invalidated when the harvest watermark moves
+        self.result_cache = self.__create_result_cache()
+        # registry requests in flight, shared by the identical concurrent requests
+        self.single_flight = SingleFlight() if self.registry_settings.coalesce_requests else None
+        # fails the registry requests fast while the registry is degraded
+        self.circuit_breaker = None
+        if self.registry_settings.registry_circuit_failure_threshold > 0:
+            self.circuit_breaker = CircuitBreaker(
+                failure_threshold=self.registry_settings.registry_circuit_failure_threshold,
+                reset_timeout=self.registry_settings.registry_circuit_reset_timeout,
+            )
+        # timeout of the registry requests by kind, see __request
+        self.request_timeouts = {
+            "search": self.registry_settings.registry_search_timeout,
+            "count": self.registry_settings.registry_count_timeout,
+            "find_collection": self.registry_settings.registry_get_timeout,
+            "get_one_item": self.registry_settings.registry_get_timeout,
+            "get_items": self.registry_settings.registry_get_timeout,
+            "get_collections": self.registry_settings.registry_get_timeout,
+            "aggregation": self.registry_settings.registry_aggregation_timeout,
+        }
+        # converted collection documents, by collection id and extent, versioned by harvest date
+        self.collection_documents = LRUCache(
+            maxsize=self.registry_settings.collection_documents_cache_size,
+            ttl=self.registry_settings.collection_documents_cache_ttl,
+        )
+
+        # distinct values of the facet queryables, by collection id, versioned by the refresh of the collection cache
+        self.facets = LRUCache(
+            maxsize=self.registry_settings.facets_cache_size,
+            ttl=self.registry_settings.collection_cache_refresh_interval,
+        )
+
+        # CQL2 filters parsed and compiled into registry queries, see apply_cql2_filter
+        self.filters = FilterCompiler(ITEM_QUERYABLES, cache_size=self.registry_settings.filter_cache_size)
+
+    def __attrs_post_init__(self):
+        """Create the registry clients with the transport settings of the registry."""
+        config = client_config(self.registry_settings)
+        self.client = AsyncOpenSearch(**config, serializer=TimedJSONSerializer(self.metrics))
+        self.sync_client = OpenSearch(**config)
+        self.async_index_inserter = IndexInsertionFactory.create_insertion_strategy(self.client)
+        self.async_index_selector = IndexSelectorFactory.create_selector(self.client)
 
     def get_all_catalog_ids(self) -> list[str]:
         """Get all catalog ids from the database.
 
-            Get the list of catalogs fron the targets of products with bounding coordinates
-
-            POST registry/_search
-            {
-              "size": 0,
-              "query": {
-                "bool": {
-                  "filter": [
-                    {
-                      "exists": {
-                        "field": "cart:Bounding_Coordinates/cart:east_bounding_coordinate"
-                      }
-                    }
-                  ]
-                }
-              },
-              "aggs": {
-                "unique_targets": {
-                  "terms": {
-                    "field": "pds:Target_Identification/pds:name",
-                    "size": 1000
-                  }
-                }
-              }
+        The catalogs are the targets of the products with bounding coordinates, as currently cached, see
+        __load_catalogs.
+        """
+        return sorted(self.catalog_cache.ids())
+
+    async def get_all_catalogs(self) -> List[Tuple[str, dict]]:
+        """Get the catalogs with their collections and extents, sorted by id, from the catalog cache."""
+        await self.catalog_cache.wait_ready(self.registry_settings.catalog_cache_ready_timeout)
+        return sorted(self.catalog_cache.items())
+
+    async def find_catalog(self, catalog_id: str) -> dict:
+        """Find a catalog in the catalog cache.
+
+        Returns:
+            dict: the ids of the collections of the catalog, by `collections`, its `bbox`, `interval` and number of
+            `products`.
+        """
+        await self.catalog_cache.wait_ready(self.registry_settings.catalog_cache_ready_timeout)
+        catalog = self.catalog_cache.get(catalog_id)
+        if catalog is None:
+            raise NotFoundError(f"Catalog {catalog_id} not found")
+        return catalog
+
+    async def __load_catalogs(self) -> AsyncIterator[Dict[str, dict]]:
+        """Load the catalog cache: the targets of the products with bounding coordinates.
+
+        The catalogs are computed in a single pass of a composite aggregation over the (target, collection) pairs of
+        the products, whose bounds are combined by target.
+
+        Yields:
+            Dict[str, dict]: all the catalogs, by target.
+        """
+        bounds: Dict[str, dict] = {}
+        collections: Dict[str, List[str]] = {}
+        sources = [
+            {"target": {"terms": {"field": TARGET_FIELD}}},
+            {"collection": {"terms": {"field": ITEM_COLLECTION_FIELD}}},
+        ]
+        page_size = self.registry_settings.catalog_cache_page_size
+        async for buckets in self.__composite_bounds(sources, page_size, self.__add_dates):
+            for bucket in buckets:
+                target = bucket["key"]["target"]
+                collections.setdefault(target, []).append(bucket["key"]["collection"])
+                bounds[target] = _fold_bounds(bounds.get(target, {}), bucket)
+
+        yield {
+            target: {
+                "collections": sorted(collections[target]),
+                "bbox": self.__bucket_to_collection(target_bounds)["bbox"],
+                "interval": [_product_interval(target_bounds)],
+                "products": target_bounds["doc_count"],
             }
+            for target, target_bounds in bounds.items()
+        }
+
+    async def __get_all_collection_ids(self) -> AsyncIterator[Dict[str, dict]]:
+        """Crawl the extents of the collections having observational products with bounding coordinates.
 
+        The parent collections are paged with a composite aggregation, so that the number of collections is not
+        bounded and each request only computes the bound metrics of one page of collections.
 
+        Yields:
+            Dict[str, dict]: the ancillary information of one page of collections, by collection id: the `bbox` and
+            the `interval` of their products.
         """
-        return []
-        # query = {
-        #     "size": 0,
-        #     "aggs": {
-        #         "unique_catalogs": {
-        #             "terms": {
-        #                 "field": "pds:Catalog_Identification/pds:catalog_id.keyword",
-        #                 "size": 10000
-        #             }
-        #         }
-        #     }
-        # }
-        # response = self.client.search(index=self.index_name, body=query)
-        # catalog_buckets = response.get("aggregations", {}).get("unique_catalogs", {}).get("buckets", [])
-        # catalog_ids = [bucket["key"] for bucket in catalog_buckets]
-        # return catalog_ids
-
-    def __get_all_collection_ids(self) -> list[str]:
-        # Build the query using opensearch-py DSL
-        search = Search(index=self.PRODUCT_INDEX_NAME)
-        search = search.filter("exists", field="cart:Bounding_Coordinates/cart:east_bounding_coordinate")
-        search = search.filter("term", product_class="Product_Observational")
-        search = search.extra(size=0)  # No hits, only aggs
-        # TODO see what to do when west is greater than east (crossing the antimeridian)
-        search.aggs.bucket(
-                "unique_parent_collections",
-                "terms",
-                field="ops:Provenance/ops:parent_collection_identifier",
-                size=1000,
-        ).metric(
-            "max_east_bound",
+        sources = [{"collection": {"terms": {"field": ITEM_COLLECTION_FIELD}}}]
+        page_size = self.registry_settings.collection_cache_page_size
+        async for buckets in self.__composite_bounds(sources, page_size, self.__add_dates):
+            yield {
+                bucket["key"]["collection"]: {**self.__bucket_to_collection(bucket), "interval": _product_interval(bucket)}
+                for bucket in buckets
+            }
+
+    async def __composite_bounds(
+            self,
+            sources: List[dict],
+            page_size: int,
+            add_metrics: Optional[Callable[[Any], Any]] = None,
+    ) -> AsyncIterator[List[dict]]:
+        """Page through the bounds of the observational products with bounding coordinates, grouped by `sources`.
+
+        Args:
+            sources (List[dict]): the sources of the composite aggregation, e.g. the collection of the products.
+            page_size (int): the number of buckets of each request.
+            add_metrics (Optional[Callable]): adds other metrics to the buckets than those of __add_bounds.
+
+        Yields:
+            List[dict]: the buckets of one page, with their key by source name, see __bucket_to_collection.
+        """
+        after_key = None
+        while True:
+            # Build the query using opensearch-py DSL
+            search = Search(index=self.PRODUCT_INDEX_NAME)
+            search = search.filter("exists", field="cart:Bounding_Coordinates/cart:east_bounding_coordinate")
+            search = search.filter("term", product_class="Product_Observational")
+            search = search.extra(size=0)  # No hits, only aggs
+            composite: Dict[str, Any] = {"size": page_size, "sources": sources}
+            if after_key:
+                composite["after"] = after_key
+            aggregation = self.__add_bounds(search.aggs.bucket("groups", "composite", **composite))
+            if add_metrics is not None:
+                add_metrics(aggregation)
+
+            response_dict = await self.__request(
+                "aggregation",
+                self.client.search,
+                index=self.PRODUCT_INDEX_NAME,
+                body=search.to_dict(),
+                max_concurrent_shard_requests=self.registry_settings.aggregation_max_concurrent_shard_requests,
+            )
+
+            result = response_dict["aggregations"]["groups"]
+            buckets = result["buckets"]
+            if buckets:
+                yield buckets
+
+            after_key = result.get("after_key")
+            if not after_key or len(buckets) < page_size:
+                break
+
+    @staticmethod
+    def __add_dates(aggregation: Any) -> Any:
+        """Add the first and last start and stop date times of the products of each bucket, see _product_interval."""
+        for field, name in ((START_DATE_TIME, "start_date_time"), (STOP_DATE_TIME, "stop_date_time")):
+            aggregation.metric(f"min_{name}", "min", field=field).metric(f"max_{name}", "max", field=field)
+        return aggregation
+
+    def __add_bounds(self, aggregation: Any) -> Any:
+        """Add the bounding coordinates of the products of each bucket to an aggregation, see __bucket_to_collection."""
+        aggregation.metric(
+            "max_north_bound",
             "max",
-            field="cart:Bounding_Coordinates/cart:east_bounding_coordinate"
+            field="cart:Bounding_Coordinates/cart:north_bounding_coordinate"
         ).metric(
-            "min_west_bound",
+            "min_south_bound",
             "min",
-            field="cart:Bounding_Coordinates/cart:west_bounding_coordinate"
-        ).metric(
-           "max_north_bound",
-           "max",
-           field="cart:Bounding_Coordinates/cart:north_bounding_coordinate"
-        ).metric(
-           "min_south_bound",
-           "min",
-           field="cart:Bounding_Coordinates/cart:south_bounding_coordinate"
+            field="cart:Bounding_Coordinates/cart:south_bounding_coordinate"
+        )
+        # products crossing the antimeridian (west greater than east) are bounded separately
+        for name, products in (
+                ("regular", Q("bool", must_not=[self.CROSSING_ANTIMERIDIAN])),
+                ("crossing", self.CROSSING_ANTIMERIDIAN),
+        ):
+            aggregation.bucket(
+                name,
+                "filter",
+                filter=products,
+            ).metric(
+                "max_east_bound",
+                "max",
+                field="cart:Bounding_Coordinates/cart:east_bounding_coordinate"
+            ).metric(
+                "min_west_bound",
+                "min",
+                field="cart:Bounding_Coordinates/cart:west_bounding_coordinate"
+            )
+        return aggregation
+
+    @staticmethod
+    def __bucket_to_collection(bucket: dict) -> dict:
+        def longitude_range(products: dict) -> Optional[Tuple[float, float]]:
+            if not products["doc_count"]:
+                return None
+            return products["min_west_bound"]["value"], products["max_east_bound"]["value"]
+
+        west, east = merge_longitude_ranges(longitude_range(bucket["regular"]), longitude_range(bucket["crossing"]))
+        return {
+            "bbox": [[
+                west,
+                bucket["min_south_bound"]["value"],
+                east,
+                bucket["max_north_bound"]["value"],
+            ]]
+        }
+
+    def __create_result_cache(self) -> Optional[ResultCache]:
+        backend_name = self.registry_settings.result_cache_backend
+        if backend_name == "off":
+            return None
+        backend: ResultCacheBackend
+        if backend_name == "redis":
+            backend = RedisResultCacheBackend.from_url(self.registry_settings.result_cache_redis_url)
+        else:
+            backend = MemoryResultCacheBackend(max_bytes=self.registry_settings.result_cache_max_bytes)
+        return ResultCache(
+            backend,
+            self.__get_harvest_watermark,
+            ttl=self.registry_settings.result_cache_ttl,
+            watermark_interval=self.registry_settings.result_cache_watermark_interval,
         )
 
-        search = search.using(self.sync_client)
+    async def __get_harvest_watermark(self) -> Optional[str]:
+        """Latest harvest date of the registry products."""
+        response = await self.__request(
+            "aggregation",
+            self.client.search,
+            index=self.PRODUCT_INDEX_NAME,
+            body={"size": 0, "aggs": {"watermark": {"max": {"field": self.DEFAULT_SORT}}}},
+        )
+        watermark = response["aggregations"]["watermark"]
+        return watermark.get("value_as_string") or watermark.get("value")
 
-        response = search.execute()
-        response_dict = response.to_dict()
+    def __load_collections(self) -> AsyncIterator[Dict[str, dict]]:
+        """Load the collection cache, from the collection snapshot if any, from the registry otherwise.
 
-        def bucket_to_collection(bucket):
-            return {
-                "bbox": [[
-                    bucket["min_west_bound"]["value"],
-                    bucket["max_east_bound"]["value"],
-                    bucket["min_south_bound"]["value"],
-                    bucket["max_north_bound"]["value"],
-                ]]
-            }
+        Returns:
+            AsyncIterator[Dict[str, dict]]: the ancillary information of the collections, by collection id.
+        """
+        if self.collection_snapshot is None:
+            return self.__crawl_collections()
+        return self.collection_snapshot.collections(self.__crawl_collections, serve_stale=not self.collection_cache.ready)
 
-        collections = {bucket["key"]:bucket_to_collection(bucket) for bucket in response_dict["aggregations"]["unique_parent_collections"]["buckets"]}
-        return collections
+    async def __crawl_collections(self) -> AsyncIterator[Dict[str, dict]]:
+        """Crawl the extents of the collections and their converted STAC documents from the registry.
 
+        Yields:
+            Dict[str, dict]: the ancillary information of one page of collections, by collection id.
+        """
+        async for extents in self.__get_all_collection_ids():
+            response = await self.__request(
+                "get_collections", self.client.mget, index=self.PRODUCT_INDEX_NAME, body={"ids": list(extents.keys())}
+            )
+            for doc in response["docs"]:
+                if doc.get("found") and doc["_source"].get("product_class") == "Product_Collection":
+                    ancillary = extents[doc["_id"]]
+                    try:
+                        ancillary["collection"] = self.__to_stac_collection(doc["_id"], doc["_source"], ancillary)
+                    except Exception as e:
+                        logger.warning(f"Collection {doc['_id']} cannot be converted to STAC: {e}")
+            yield extents
+
+    @staticmethod
+    def __extent_key(ancillary: Optional[dict]) -> Optional[tuple]:
+        return tuple(tuple(bbox) for bbox in ancillary["bbox"]) if ancillary else None
+
+    def __to_stac_collection(self, collection_id: str, source: dict, ancillary: Optional[dict]) -> dict:
+        """Convert a collection document to STAC, reusing the conversion cached for the same harvest and extent."""
+        key = (collection_id, self.__extent_key(ancillary))
+        harvest_date = source.get(self.DEFAULT_SORT, [None])[0]
+        collection = self.collection_documents.get(key, version=harvest_date)
+        if collection is None:
+            collection = collection_to_stac(source, ancillary)
+            self.collection_documents.put(key, collection, version=harvest_date)
+        return collection
+
+    @timed("get_all_collections")
     async def get_all_collections(
             self,
             token: Optional[str],
@@ -140,46 +496,199 @@ class PDSDatabaseLogic(DatabaseLogic):
     ) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[int]]:
         """Retrieve a list of collections from the database, supporting pagination.
 
-        All the arguments are currently ignored none of them are implemented.
-        The number of collections returned is small enough to not require any of the filters.
+        The collections are served from the in-memory index of the collection cache, without querying the registry.
+        The `bbox`, `datetime` and `q` filters are supported, `sort`, `filter` and `query` are ignored.
         """
 
-        search = Search(index=self.PRODUCT_INDEX_NAME)
-        search = search.query("ids", values=list(self.__found_collections_cache.keys()))
-        search = search.using(self.sync_client)
+        with self.metrics.stage("wait_ready"):
+            await self.collection_cache.wait_ready(self.registry_settings.collection_cache_ready_timeout)
 
-        response = search.execute()
-        response_dict = response.to_dict()
-
-        collections = []
-        for hit in response_dict["hits"]["hits"]:
-            collection = Collection(
-                hit["_source"],
-                ancillary=self.__found_collections_cache.get(hit["_id"], None)
-            ).to_stac()
-            collections.append(collection)
-
-        return (collections, None, None)
+        with self.metrics.stage("index"):
+            collections, next_token, matched = self.collection_cache.index.search(
+                limit=limit,
+                token=token,
+                bbox=bbox,
+                datetime=datetime,
+                q=q,
+            )
+        # the fields extension edits nested dictionaries in place, do not let it alter the cached documents
+        with self.metrics.stage("copy"):
+            return deepcopy(collections), next_token, matched
 
+    @timed("find_collection")
     async def find_collection(self, collection_id: str) -> Dict:
         """Find a collection in the database."""
 
+        with self.metrics.stage("wait_ready"):
+            await self.collection_cache.wait_ready(self.registry_settings.collection_cache_ready_timeout)
+
+        ancillary = self.collection_cache.get(collection_id, None)
+        cached_collection = self.collection_documents.get((collection_id, self.__extent_key(ancillary)))
+        if cached_collection is not None:
+            return cached_collection
+        # converted along the last refresh of the collection cache, possibly by another worker, see CollectionSnapshot
+        if ancillary and "collection" in ancillary:
+            return ancillary["collection"]
+
         try:
-            collection = await self.client.get(
-                index=self.PRODUCT_INDEX_NAME, id=collection_id
-            )
+            with self.metrics.stage("registry"):
+                collection = await self.__request(
+                    "find_collection", self.client.get, index=self.PRODUCT_INDEX_NAME, id=collection_id
+                )
         except exceptions.NotFoundError:
             raise NotFoundError(f"Collection {collection_id} not found")
 
         if collection["_source"]["product_class"] != "Product_Collection":
             raise NotFoundError(f"Collection {collection_id} not found")
 
-        return Collection(
-            collection["_source"],
-            ancillary=self.__found_collections_cache.get(collection["_id"], None)
-        ).to_stac()
+        with self.metrics.stage("convert"):
+            return self.__to_stac_collection(collection["_id"], collection["_source"], ancillary)
+
+    @staticmethod
+    def make_search():
+        """Database logic to create a Search instance."""
+        return Search()
+
+    @staticmethod
+    def apply_ids_filter(search: Search, item_ids: List[str]):
+        """Database logic to search a list of items by lidvid."""
+        return search.filter("ids", values=item_ids)
+
+    @staticmethod
+    def apply_collections_filter(search: Search, collection_ids: List[str]):
+        """The collections are filtered by `execute_search`, once narrowed to the collections which can match."""
+        return search
+
+    @staticmethod
+    def populate_sort(sortby: List) -> Optional[Dict[str, Dict[str, str]]]:
+        """Sort of the items by the registry fields of the queryables sorted, see ITEM_QUERYABLES.
+
+        The properties may be named with or without their `properties.` prefix. Without sort, the items are sorted
+        by harvest date, see execute_search.
 
+        Raises:
+            InvalidQueryParameter: if a field sorted is not a queryable, or is a geometry.
+        """
+        sort: Dict[str, Dict[str, str]] = {}
+        for sort_item in sortby or []:
+            queryable = ITEM_QUERYABLES.get(sort_item.field) or ITEM_QUERYABLES.get(f"properties.{sort_item.field}")
+            if queryable is None or queryable.type == "geo_shape":
+                raise InvalidQueryParameter(f"Items cannot be sorted by {sort_item.field}, see /queryables")
+            sort[queryable.field] = {"order": sort_item.direction}
+        return sort or None
+
+    @staticmethod
+    def apply_datetime_filter(
+            search: Search, datetime: Optional[str]
+    ) -> Tuple[Search, Dict[str, Optional[str]]]:
+        """The datetime is filtered by `execute_search`, on the time coordinates of the products."""
+        return search, return_date(datetime)
+
+    @staticmethod
+    def apply_free_text_filter(search: Search, free_text_queries: Optional[List[str]]):
+        """Database logic to search the items matching any of the free text queries.
+
+        Each query must match with all its words, across the title, the description and the sources of the
+        keywords, see ITEM_TEXT_FIELDS. The match is a filter: the items are not scored, they keep their sort.
+        """
+        matches = [
+            {"bool": {"filter": [_word_query(word, ITEM_TEXT_FIELDS) for word in words]}}
+            for words in (re.findall(r"\w+", term) for term in free_text_queries or [])
+            if words
+        ]
+        if not matches:
+            return search
+        return search.filter("bool", should=matches, minimum_should_match=1)
+
+    async def apply_cql2_filter(self, search: Search, _filter: Optional[Dict[str, Any]]):
+        """Database logic to search the items matching a CQL2-JSON filter on the item queryables, see FilterCompiler."""
+        if _filter is None:
+            return search
+        return search.filter(self.filters.compile(_filter))
+
+    @staticmethod
+    def apply_bbox_filter(search: Search, bbox: List):
+        """Filter the items whose bounding polygon intersects the bounding box.
+
+        A bounding box crossing the antimeridian (west greater than east) is searched as a multipolygon of its
+        two sides of the antimeridian.
+        """
+        polygons = [box_to_polygon(box) for box in split_antimeridian(bbox)]
+        if len(polygons) == 1:
+            shape = {"type": "polygon", "coordinates": polygons[0]}
+        else:
+            shape = {"type": "multipolygon", "coordinates": polygons}
+        return search.filter(Q({"geo_shape": {"bbox_polygon": {"shape": shape, "relation": "intersects"}}}))
+
+    @staticmethod
+    def apply_intersects_filter(search: Search, intersects: Geometry):
+        """Filter the items whose bounding polygon intersects the geometry."""
+        if hasattr(intersects, "model_dump"):
+            intersects = intersects.model_dump(exclude_none=True)
+        shape = {"type": intersects["type"].lower()}
+        if "geometries" in intersects:
+            shape["geometries"] = intersects["geometries"]
+        else:
+            shape["coordinates"] = intersects["coordinates"]
+        return search.filter(Q({"geo_shape": {"bbox_polygon": {"shape": shape, "relation": "intersects"}}}))
+
+    def __prune_collections(
+            self,
+            search: Search,
+            collection_ids: Optional[List[str]],
+            interval: Optional[Interval],
+    ) -> Optional[List[str]]:
+        """Narrow the collections searched to the ones whose cached extents can match the search.
+
+        The spatial extents narrow any search with spatial filters. The time spans of the products of the collections
+        only narrow a search already restricted to some collections, since the collection cache does not know the
+        collections without bounding coordinates.
 
+        Returns:
+            Optional[List[str]]: the collections to search, None to search all of them.
+        """
+        if not self.collection_cache.ready:
+            return collection_ids or None
+
+        shapes = list(_geo_shapes(search.query.to_dict())) if search.query else []
+        candidates = set(collection_ids) if collection_ids else None
+        for shape in shapes:
+            if shape.get("type", "").lower() == "multipolygon":
+                parts = [{"type": "polygon", "coordinates": polygon} for polygon in shape["coordinates"]]
+            else:
+                parts = [shape]
+            boxes = [geometry_bounds(part) for part in parts]
+            if any(box is None for box in boxes):
+                # a shape without bounds, e.g. of an unknown type, cannot prune the collections
+                continue
+            matching = set()
+            for box in boxes:
+                matching |= self.collection_cache.spatial_index.query(box)
+            candidates = matching if candidates is None else candidates & matching
+
+        if candidates and interval and self.registry_settings.temporal_pruning:
+            candidates -= self.collection_cache.disjoint(interval)
+
+        return sorted(candidates) if candidates is not None else None
+
+    @staticmethod
+    def __product_filters(collection_ids: Optional[List[str]]) -> List[dict]:
+        """Filters on the observational products, of the given collections if any."""
+        filters: List[dict] = [{"term": {"product_class": "Product_Observational"}}]
+        if collection_ids:
+            filters.append({"terms": {ITEM_COLLECTION_FIELD: collection_ids}})
+        return filters
+
+    @staticmethod
+    def __searched_ids(search: Search) -> Optional[List[str]]:
+        """The ids of a search by ids only, None if the search has other filters."""
+        query = search.query.to_dict() if search.query else {}
+        filters = query.get("bool", {}).get("filter", [])
+        if query.keys() == {"bool"} and query["bool"].keys() == {"filter"} and len(filters) == 1 and "ids" in filters[0]:
+            return filters[0]["ids"]["values"]
+        return None
+
+    @timed("execute_search")
     async def execute_search(
             self,
             search: Search,
@@ -215,111 +724,607 @@ class PDSDatabaseLogic(DatabaseLogic):
 
         logger.info("Performing search in collecion's items")
 
-        search_after = None
+        interval = search_interval(datetime_search)
+
+        collection_ids = self.__prune_collections(search, collection_ids, interval)
+        if collection_ids is not None and not collection_ids:
+            # no collection extent can match the search
+            return iter(()), 0, None
+
+        item_ids = self.__searched_ids(search)
+        if item_ids is not None and interval is None and not token and len(item_ids) <= limit:
+            # a lookup of ids fitting in one page, whatever their sort
+            items = await self.get_items(item_ids, collection_ids, item_source_fields(*requested_fields.get()))
+            return items, len(items), None
+
+        search_after, pit_id = self.__decode_token(token)
 
         search_body: Dict[str, Any] = {}
 
-        if token:
-            search_after = orjson.loads(urlsafe_b64decode(token))
         if search_after:
             search_body["search_after"] = search_after
 
-        search_body["sort"] = sort if sort else self.DEFAULT_SORT
+        # the sort is on registry fields, see populate_sort
+        sort_clauses = [{field: order} for field, order in (sort or {}).items()] or [{self.DEFAULT_SORT: {"order": "asc"}}]
+        # the unique tiebreaker makes search_after skip or repeat no product sharing the sort values of another
+        if not any(self.TIEBREAKER_SORT in clause for clause in sort_clauses):
+            sort_clauses.append({self.TIEBREAKER_SORT: {"order": "asc"}})
+        search_body["sort"] = sort_clauses
 
-        filters = [{"term": {"product_class": "Product_Observational"}}]
+        filters = self.__product_filters(collection_ids)
 
-        if collection_ids:
-            filters.append({"terms": {"ops:Provenance/ops:parent_collection_identifier": collection_ids}})
+        if interval:
+            filters.append(temporal_filter(interval))
 
+        if search.query:
+            filters.append(search.query.to_dict())
 
         search_body["query"] = {"bool": {"filter": filters}}
 
+        search_body["_source"] = {"includes": item_source_fields(*requested_fields.get())}
+
         max_result_window = MAX_LIMIT
         size_limit = min(limit + 1, MAX_LIMIT)
 
-        search_task = asyncio.create_task(
-            self.client.search(
-                index=self.PRODUCT_INDEX_NAME,
-                ignore_unavailable=ignore_unavailable,
-                body=search_body,
-                size=size_limit,
-            )
+        stream = streamed_items.get()
+        chunk_size = self.registry_settings.stream_chunk_size
+        if stream is not None and 0 < chunk_size < limit:
+            # large pages are fetched and converted in chunks while the response is written
+            await self.__use_point_in_time(search_body, pit_id, open_one=bool(search_after))
+            with self.metrics.stage("registry"):
+                es_response, matched = await self.__search(
+                    search_body, chunk_size, ignore_unavailable, collection_ids, first_page=not search_after
+                )
+            stream.append(ItemStream(
+                es_response["hits"]["hits"],
+                partial(self.__fetch_chunk, search_body, ignore_unavailable=ignore_unavailable),
+                lambda sort_values: self.__next_token(sort_values, search_body.get("pit", {}).get("id")),
+                partial(self.__close_search, search_body),
+                limit,
+                chunk_size,
+            ))
+            return iter(()), matched, None
+
+        # the point in time is left out of the key, the results of a page are the same whichever it is read from
+        with self.metrics.stage("result_cache"):
+            result_key = self.result_cache.key(search_body, size_limit) if self.result_cache else None
+            cached_result = await self.result_cache.get(result_key) if result_key else None
+        if cached_result is not None:
+            await self.__use_point_in_time(search_body, pit_id)
+            es_response, matched = cached_result["response"], cached_result["matched"]
+        else:
+            await self.__use_point_in_time(search_body, pit_id, open_one=bool(search_after))
+            with self.metrics.stage("registry"):
+                es_response, matched = await self.__search(
+                    search_body, size_limit, ignore_unavailable, collection_ids, first_page=not search_after
+                )
+            if result_key:
+                with self.metrics.stage("result_cache"):
+                    await self.result_cache.set(result_key, {"response": es_response, "matched": matched})
+
+        hits = es_response["hits"]["hits"]
+        with self.metrics.stage("convert"):
+            items = items_to_stac(hit["_source"] for hit in hits[:limit])
+
+        next_token = None
+        with self.metrics.stage("pagination"):
+            if len(hits) > limit and limit < max_result_window:
+                if hits and (sort_array := hits[limit - 1].get("sort")):
+                    next_token = self.__next_token(sort_array, search_body.get("pit", {}).get("id"))
+            else:
+                await self.__close_search(search_body)
+
+        return items, matched, next_token
+
+    @staticmethod
+    def __decode_token(token: Optional[str]) -> Tuple[Optional[List[Any]], Optional[str]]:
+        """The sort values a page starts after and the point in time of the paged search, if any."""
+        if not token:
+            return None, None
+        decoded = orjson.loads(urlsafe_b64decode(token))
+        if isinstance(decoded, list):
+            # token of a search paged without point in time
+            return decoded, None
+        return decoded.get("after"), decoded.get("pit")
+
+    async def __use_point_in_time(self, search_body: Dict[str, Any], pit_id: Optional[str], open_one: bool = False):
+        """Read a search from the point in time of its token, or from a new one for a page following the first.
+
+        The point in time is only opened once a client reads past the first page, so that the searches whose first
+        page is all that is read, or whose pages are served from the result cache, open none.
+        """
+        if not pit_id and open_one and self.registry_settings.pagination_point_in_time:
+            pit_id = await self.__open_point_in_time(self.registry_settings.pagination_keep_alive)
+        if pit_id:
+            search_body["pit"] = {"id": pit_id, "keep_alive": self.registry_settings.pagination_keep_alive}
+
+    @staticmethod
+    def __next_token(sort_values: List[Any], pit_id: Optional[str] = None) -> str:
+        """Token of the page following the given sort values, read from the point in time `pit_id` if any.
+
+        The pages following the second are read from the point in time opened for the second page, see
+        __use_point_in_time, so that products harvested meanwhile do not shift the pages.
+        """
+        token: Dict[str, Any] = {"after": sort_values}
+        if pit_id:
+            token["pit"] = pit_id
+        return urlsafe_b64encode(orjson.dumps(token)).decode()
+
+    async def __close_search(self, search_body: Dict[str, Any]):
+        """Close the point in time of a paged search, once its last page is read."""
+        if "pit" in search_body:
+            await self.__close_point_in_time(search_body["pit"]["id"])
+
+    async def __run_search(self, search_body: Dict[str, Any], size: int, ignore_unavailable: bool) -> dict:
+        """Run a search on the point in time of the search body if any, or else on the registry index."""
+        if "pit" in search_body:
+            try:
+                es_response = await self.__request("search", self.client.search, body=search_body, size=size)
+            except (exceptions.NotFoundError, exceptions.RequestError) as e:
+                # the point in time expired: the sort values are unique, the search goes on in the live index
+                logger.info(f"Point in time of the search is lost, reading the registry index: {e}")
+                del search_body["pit"]
+            else:
+                # the id of a point in time may change from one request to the next
+                search_body["pit"]["id"] = es_response.get("pit_id", search_body["pit"]["id"])
+                self.metrics.observe_stage("took", es_response.get("took", 0) / 1000)
+                return es_response
+        es_response = await self.__request(
+            "search",
+            self.client.search,
+            index=self.PRODUCT_INDEX_NAME,
+            ignore_unavailable=ignore_unavailable,
+            body=search_body,
+            size=size,
         )
+        self.metrics.observe_stage("took", es_response.get("took", 0) / 1000)
+        return es_response
 
-        count_task = asyncio.create_task(
-            self.client.count(
-                index=self.PRODUCT_INDEX_NAME,
-                ignore_unavailable=ignore_unavailable,
-                body=search.to_dict(count=True),
+    async def __search(
+            self,
+            search_body: Dict[str, Any],
+            size_limit: int,
+            ignore_unavailable: bool,
+            collection_ids: Optional[List[str]],
+            first_page: bool,
+    ) -> Tuple[dict, Optional[int]]:
+        """Run a search of `size_limit` hits and count its results according to the count mode.
+
+        Returns:
+            Tuple[dict, Optional[int]]: the OpenSearch response and the number of products matching, if known.
+        """
+        count_mode = self.registry_settings.count_mode
+        count_key = fingerprint(search_body["query"])
+        matched = self.counts.get(count_key) if count_mode != "off" else None
+
+        count_task = None
+        if count_mode == "exact" and matched is None:
+            count_task = asyncio.create_task(
+                self.__request(
+                    "count",
+                    self.client.count,
+                    index=self.PRODUCT_INDEX_NAME,
+                    ignore_unavailable=ignore_unavailable,
+                    body={"query": search_body["query"]},
+                )
             )
-        )
+
+        if count_mode == "track_total_hits" and matched is None:
+            search_body["track_total_hits"] = self.registry_settings.count_track_total_hits
+        elif count_mode != "estimate" or matched is not None:
+            search_body["track_total_hits"] = False
+
+        search_task = asyncio.create_task(self.__run_search(search_body, size_limit, ignore_unavailable))
 
         try:
             es_response = await search_task
-        except exceptions.NotFoundError:
-            raise NotFoundError(f"Collections '{collection_ids}' do not exist")
+        except BaseException as e:
+            if count_task is not None:
+                _cancel(count_task)
+            if isinstance(e, exceptions.NotFoundError):
+                raise NotFoundError(f"Collections '{collection_ids}' do not exist")
+            raise
+
+        if matched is None and count_mode != "off":
+            last_page = len(es_response["hits"]["hits"]) < size_limit
+            matched = await self.__count(es_response, count_task, first_page=first_page, last_page=last_page)
+            if matched is not None:
+                self.counts.put(count_key, matched)
+
+        return es_response, matched
+
+    async def __fetch_chunk(
+            self,
+            search_body: Dict[str, Any],
+            search_after: List[Any],
+            size: int,
+            ignore_unavailable: bool,
+    ) -> List[dict]:
+        """Hits of a streamed search following the sort value `search_after`."""
+        search_body.update(search_after=search_after, track_total_hits=False)
+        es_response = await self.__run_search(search_body, size, ignore_unavailable)
+        return es_response["hits"]["hits"]
+
+    async def __count(
+            self,
+            es_response: dict,
+            count_task: Optional[asyncio.Task],
+            first_page: bool,
+            last_page: bool,
+    ) -> Optional[int]:
+        """Number of products matching a search, according to the count mode.
 
-        hits = es_response["hits"]["hits"]
-        items = (Item(hit["_source"]).to_stac() for hit in hits[:limit])
+        Returns:
+            Optional[int]: the number of products, None if it is not known.
+        """
+        if first_page and last_page:
+            # all the results fit in the first page, no need to count them
+            if count_task is not None:
+                _cancel(count_task)
+            return len(es_response["hits"]["hits"])
 
-        next_token = None
-        if len(hits) > limit and limit < max_result_window:
-            if hits and (sort_array := hits[limit - 1].get("sort")):
-                next_token = urlsafe_b64encode(orjson.dumps(sort_array)).decode()
-
-        matched = (
-            es_response["hits"]["total"]["value"]
-            if es_response["hits"]["total"]["relation"] == "eq"
-            else None
-        )
-        if count_task.done():
+        if count_task is not None:
             try:
-                matched = count_task.result().get("count")
+                return (await count_task).get("count")
             except Exception as e:
                 logger.error(f"Count task failed: {e}")
+                return None
 
-        return items, matched, next_token
+        total = es_response["hits"].get("total")
+        if not total:
+            return None
+        if total["relation"] == "eq" or self.registry_settings.count_mode == "estimate":
+            return total["value"]
+        return None
 
+    async def __request(self, kind: str, method: Callable[..., Awaitable[dict]], **kwargs: Any) -> dict:
+        """Send a request to the registry, or join the identical request in flight.
 
-    async def get_one_item(self, collection_id: str, item_id: str) -> Dict:
-        """Retrieve a single item from the database."""
+        The identical requests are those of the same kind with the same arguments, bodies compared key by key;
+        their response, or error, is shared, it must not be altered. The request times out after the timeout of
+        its kind and goes through the circuit breaker.
+
+        Args:
+            kind (str): the kind of request, for the timeout and the metrics.
+            method (Callable[..., Awaitable[dict]]): the method of the registry client.
+            **kwargs: the arguments of the request.
+        """
+        request = partial(
+            method, request_timeout=self.request_timeouts.get(kind, self.registry_settings.registry_timeout), **kwargs
+        )
+        if self.circuit_breaker is not None:
+            request = partial(self.circuit_breaker.call, request)
+        if self.single_flight is None:
+            return await request()
+        return await self.single_flight.do(fingerprint(kind, kwargs), request, kind=kind)
+
+    def metric_samples(self) -> Iterator[Sample]:
+        """Gauges and counters of the caches, the registry connections and the registry requests.
+
+        They are collected when the metrics are read, rather than maintained along the requests.
+        """
+        status = self.collection_cache.status()
+        yield Sample("collection_cache_ready", {}, status["ready"])
+        yield Sample("collection_cache_collections", {}, status["collections"])
+        status = self.catalog_cache.status()
+        yield Sample("catalog_cache_ready", {}, status["ready"])
+        yield Sample("catalog_cache_catalogs", {}, status["catalogs"])
+        for name, cache in (
+                ("counts", self.counts),
+                ("collection_documents", self.collection_documents),
+                ("facets", self.facets),
+                ("cql2_parsed", self.filters.parsed),
+                ("cql2_compiled", self.filters.compiled),
+        ):
+            stats = cache.stats()
+            yield Sample("cache_entries", {"cache": name}, stats["size"])
+            yield Sample("cache_max_entries", {"cache": name}, stats["maxsize"])
+            for counter in ("hits", "misses", "evictions"):
+                yield Sample(f"cache_{counter}_total", {"cache": name}, stats[counter])
+        if self.result_cache is not None:
+            stats = self.result_cache.stats()
+            for counter in ("hits", "misses", "stores", "evictions"):
+                if counter in stats:
+                    yield Sample(f"cache_{counter}_total", {"cache": "search_results"}, stats[counter])
+            if "entries" in stats:
+                yield Sample("cache_entries", {"cache": "search_results"}, stats["entries"])
+                yield Sample("cache_bytes", {"cache": "search_results"}, stats["size_bytes"])
+                yield Sample("cache_max_bytes", {"cache": "search_results"}, stats["max_bytes"])
+
+        # connections of the registry client, the connector of each node is created along its first request
+        connection_pool = getattr(getattr(self.client, "transport", None), "connection_pool", None)
+        for connection in getattr(connection_pool, "connections", ()):
+            session = getattr(connection, "session", None)
+            connector = getattr(session, "connector", None)
+            if connector is None:
+                continue
+            labels = {"host": str(getattr(connection, "host", ""))}
+            yield Sample("pool_connections_in_use", labels, len(getattr(connector, "_acquired", ())))
+            yield Sample("pool_connections_limit", labels, connector.limit_per_host or connector.limit)
+
+        if self.single_flight is not None:
+            stats = self.single_flight.stats()
+            yield Sample("registry_requests_in_flight", {}, stats["in_flight"])
+            for kind, count in stats["executed"].items():
+                yield Sample("registry_requests_total", {"kind": kind}, count)
+            for kind, count in stats["coalesced"].items():
+                yield Sample("registry_requests_coalesced_total", {"kind": kind}, count)
+        if self.circuit_breaker is not None:
+            stats = self.circuit_breaker.stats()
+            yield Sample("registry_circuit_open", {}, stats["state"] != "closed")
+            yield Sample("registry_requests_rejected_total", {}, stats["rejected"])
+
+    async def __open_point_in_time(self, keep_alive: str) -> Optional[str]:
+        """Open a point in time of the registry index, None if the registry does not support it."""
         try:
-            response = await self.client.search(
-                index=self.PRODUCT_INDEX_NAME,
-                body={
-                    "query": {"term": {"_id": item_id}},
-                    "size": 1,
-                },
-            )
-            if response["hits"]["total"]["value"] == 0:
-                raise NotFoundError(
-                    f"Item {item_id} does not exist inside Collection {collection_id}"
-                )
+            response = await self.client.create_pit(index=self.PRODUCT_INDEX_NAME, params={"keep_alive": keep_alive})
+            return response["pit_id"]
+        except exceptions.TransportError as e:
+            logger.warning(f"Point in time cannot be opened, reading the live index: {e}")
+            return None
 
-            candidate_item = response["hits"]["hits"][0]["_source"]
+    async def __close_point_in_time(self, pit_id: str):
+        try:
+            await self.client.delete_pit(body={"pit_id": [pit_id]})
+        except Exception as e:
+            logger.warning(f"Point in time cannot be closed, it expires on its own: {e}")
 
-            if candidate_item.get("product_class") != "Product_Observational":
-                raise NotFoundError(
-                    f"Item {item_id} does not exist inside Collection {collection_id}"
-                )
+    async def export_items(self, collection_id: str, after: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Walk all the observational products of a collection, in batches of STAC items sorted by id.
 
-            collection_id_found = candidate_item.get("ops:Provenance/ops:parent_collection_identifier", [None])[0]
-            if collection_id_found != collection_id:
-                raise NotFoundError(
-                    f"Item {item_id} does not exist inside Collection {collection_id} but was found in collection {collection_id_found}"
-                )
+        The walk reads a point in time of the registry index, so that it is consistent with the registry at its
+        start however long it takes, and pages it with `search_after` on the unique lidvid.
+
+        Args:
+            collection_id (str): the id of the collection exported.
+            after (Optional[str]): resume an export after the item of this id.
 
-            return Item(response["hits"]["hits"][0]["_source"]).to_stac()
+        Yields:
+            List[Dict[str, Any]]: the next batch of items.
+        """
+        batch_size = self.registry_settings.export_batch_size
+        keep_alive = self.registry_settings.export_keep_alive
+        search_body: Dict[str, Any] = {
+            "size": batch_size,
+            "query": {"bool": {"filter": self.__product_filters([collection_id])}},
+            "sort": [{self.TIEBREAKER_SORT: {"order": "asc"}}],
+            "_source": {"includes": item_source_fields()},
+            "track_total_hits": False,
+        }
+        if after:
+            search_body["search_after"] = [after]
+
+        pit_id = await self.__open_point_in_time(keep_alive)
+        if pit_id:
+            search_body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+        try:
+            while True:
+                es_response = await self.__run_search(search_body, batch_size, ignore_unavailable=True)
+                hits = es_response["hits"]["hits"]
+                if hits:
+                    yield items_to_stac(hit["_source"] for hit in hits)
+                if len(hits) < batch_size:
+                    return
+                search_body["search_after"] = hits[-1]["sort"]
+        finally:
+            if "pit" in search_body:
+                await self.__close_point_in_time(search_body["pit"]["id"])
+
+    @staticmethod
+    def __is_item(source: dict, collection_ids: Optional[List[str]]) -> bool:
+        """True if a registry document is an observational product, of one of the collections if any."""
+        if source.get("product_class") != "Product_Observational":
+            return False
+        return not collection_ids or source.get(ITEM_COLLECTION_FIELD, [None])[0] in collection_ids
+
+    @timed("get_one_item")
+    async def get_one_item(self, collection_id: str, item_id: str) -> Dict:
+        """Retrieve a single item from the database, with a direct lookup of its document."""
+        try:
+            with self.metrics.stage("registry"):
+                document = await self.__request(
+                    "get_one_item",
+                    self.client.get,
+                    index=self.PRODUCT_INDEX_NAME,
+                    id=item_id,
+                    _source_includes=["product_class", *item_source_fields()],
+                )
         except exceptions.NotFoundError:
             raise NotFoundError(
                 f"Item {item_id} does not exist inside Collection {collection_id}"
             )
 
+        candidate_item = document["_source"]
+
+        if not self.__is_item(candidate_item, None):
+            raise NotFoundError(
+                f"Item {item_id} does not exist inside Collection {collection_id}"
+            )
+
+        collection_id_found = candidate_item.get(ITEM_COLLECTION_FIELD, [None])[0]
+        if collection_id_found != collection_id:
+            raise NotFoundError(
+                f"Item {item_id} does not exist inside Collection {collection_id} but was found in collection {collection_id_found}"
+            )
+
+        with self.metrics.stage("convert"):
+            return item_to_stac(candidate_item)
+
+    async def get_items(
+            self,
+            item_ids: List[str],
+            collection_ids: Optional[List[str]] = None,
+            source_fields: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """Retrieve items by id in a single request.
+
+        Args:
+            item_ids (List[str]): the ids of the items.
+            collection_ids (Optional[List[str]]): the collections the items must belong to, any if None.
+            source_fields (Optional[List[str]]): the registry fields to fetch, see `item_source_fields`; all the
+                fields converted by default.
+
+        Returns:
+            List[Dict]: the items found, in the order of their ids; the ids which are not items of the collections
+            are skipped.
+        """
+        if not item_ids:
+            return []
+        with self.metrics.stage("registry"):
+            response = await self.__request(
+                "get_items",
+                self.client.mget,
+                index=self.PRODUCT_INDEX_NAME,
+                body={"ids": list(dict.fromkeys(item_ids))},
+                _source_includes=["product_class", *(source_fields or item_source_fields())],
+            )
+        with self.metrics.stage("convert"):
+            return items_to_stac(
+                doc["_source"] for doc in response["docs"]
+                if doc.get("found") and self.__is_item(doc["_source"], collection_ids)
+            )
+
+    async def __facets(self, collection_id: str) -> Dict[str, Optional[List[str]]]:
+        """Distinct values of the facet queryables of the items of a collection, from a single terms aggregation.
+
+        The facets are cached until the next refresh of the collection cache.
+
+        Returns:
+            Dict[str, Optional[List[str]]]: the values of each facet queryable, sorted by decreasing number of
+            items; None for the facets with more than `facets_max_values` values.
+        """
+        version = self.collection_cache.last_refresh
+        cached_facets = self.facets.get(collection_id, version)
+        if cached_facets is not None:
+            return cached_facets
+
+        max_values = self.registry_settings.facets_max_values
+        facet_fields = {name: queryable.field for name, queryable in ITEM_QUERYABLES.items() if queryable.facet}
+        response = await self.__request(
+            "aggregation",
+            self.client.search,
+            index=self.PRODUCT_INDEX_NAME,
+            body={
+                "size": 0,
+                "track_total_hits": False,
+                "query": {"bool": {"filter": self.__product_filters([collection_id])}},
+                # one more value than listed, to tell the facets which have too many values
+                "aggs": {name: {"terms": {"field": field, "size": max_values + 1}} for name, field in facet_fields.items()},
+            },
+            ignore_unavailable=True,
+            max_concurrent_shard_requests=self.registry_settings.aggregation_max_concurrent_shard_requests,
+        )
+        facets: Dict[str, Optional[List[str]]] = {}
+        for name in facet_fields:
+            values = [bucket["key"] for bucket in response.get("aggregations", {}).get(name, {}).get("buckets", [])]
+            if len(values) > max_values:
+                logger.warning(f"Facet {name} of collection {collection_id} has more than {max_values} values, not listed")
+                facets[name] = None
+            else:
+                facets[name] = values
+        self.facets.put(collection_id, facets, version)
+        return facets
+
     async def get_items_unique_values(
-        self, collection_id: str, field_names: Iterable[str], *, limit: int = ...
+        self, collection_id: str, field_names: Iterable[str], *, limit: Optional[int] = None
     ) -> Dict[str, List[str]]:
-        """Get the unique values for the given fields in the collection."""
-        return {}
+        """Get the unique values of the given facet queryables for the items of a collection.
+
+        Args:
+            collection_id (str): the id of the collection.
+            field_names (Iterable[str]): the queryables, e.g. `properties.pds:target` or `pds:target`; those which
+                are not facets are skipped.
+            limit (Optional[int]): facets with more values are skipped, `facets_max_values` by default.
+
+        Returns:
+            Dict[str, List[str]]: the values of each facet, by the name it was requested with.
+        """
+        if limit is None:
+            limit = self.registry_settings.facets_max_values
+        requested = {}
+        for name in field_names:
+            queryable = name if name in ITEM_QUERYABLES else f"properties.{name}"
+            if queryable in ITEM_QUERYABLES and ITEM_QUERYABLES[queryable].facet:
+                requested[name] = queryable
+        if not requested:
+            return {}
+
+        facets = await self.__facets(collection_id)
+        unique_values = {}
+        for name, queryable in requested.items():
+            values = facets[queryable]
+            if values is not None and len(values) <= limit:
+                unique_values[name] = list(values)
+        return unique_values
+
+    @timed("aggregate")
+    async def aggregate(
+            self,
+            collection_ids: Optional[List[str]],
+            aggregations: List[str],
+            search: Search,
+            centroid_geohash_grid_precision: int,
+            centroid_geohex_grid_precision: int,
+            centroid_geotile_grid_precision: int,
+            geometry_geohash_grid_precision: int,
+            geometry_geotile_grid_precision: int,
+            datetime_frequency_interval: str,
+            datetime_search: Dict[str, Optional[str]],
+            ignore_unavailable: bool = True,
+    ) -> Dict[str, Any]:
+        """Aggregate the items matching a search over the registry fields, see ITEM_AGGREGATIONS.
+
+        The aggregations are computed in one registry request, whose response is stored in the result cache by
+        fingerprint of the request: the same aggregations are served from the cache until new products are
+        harvested. The centroid and geohash precisions are ignored, the products only have a bounding polygon.
+
+        Returns:
+            Dict[str, Any]: the registry response, with the aggregations by name.
+        """
+        interval = search_interval(datetime_search)
+        collection_ids = self.__prune_collections(search, collection_ids, interval)
+        if collection_ids is not None and not collection_ids:
+            # no collection extent can match the search
+            return {"aggregations": {"total_count": {"value": 0}}}
+
+        filters = self.__product_filters(collection_ids)
+        if interval:
+            filters.append(temporal_filter(interval))
+        if search.query:
+            filters.append(search.query.to_dict())
+
+        requested = {}
+        for name in aggregations:
+            if name not in ITEM_AGGREGATIONS:
+                continue
+            aggregation = deepcopy(ITEM_AGGREGATIONS[name])
+            if "date_histogram" in aggregation:
+                aggregation["date_histogram"]["calendar_interval"] = datetime_frequency_interval
+            if "geotile_grid" in aggregation:
+                aggregation["geotile_grid"]["precision"] = geometry_geotile_grid_precision
+            requested[name] = aggregation
+        search_body = {"size": 0, "query": {"bool": {"filter": filters}}, "aggregations": requested}
+
+        with self.metrics.stage("result_cache"):
+            result_key = self.result_cache.key("aggregate", search_body) if self.result_cache else None
+            cached_result = await self.result_cache.get(result_key) if result_key else None
+        if cached_result is not None:
+            return cached_result
+
+        with self.metrics.stage("registry"):
+            response = await self.__request(
+                "aggregation",
+                self.client.search,
+                index=self.PRODUCT_INDEX_NAME,
+                body=search_body,
+                ignore_unavailable=ignore_unavailable,
+                max_concurrent_shard_requests=self.registry_settings.aggregation_max_concurrent_shard_requests,
+            )
+        result = {"aggregations": response.get("aggregations", {})}
+        if result_key:
+            with self.metrics.stage("result_cache"):
+                await self.result_cache.set(result_key, result)
+        return result
 
     async def create_item(self, item: Dict, refresh: bool = False) -> None:
         """Create an item in the database."""
@@ -355,8 +1360,21 @@ class PDSDatabaseLogic(DatabaseLogic):
         raise NotImplementedError()
 
     async def get_items_mapping(self, collection_id: str) -> Dict[str, Dict[str, Any]]:
-        """Get the mapping for the items in the collection."""
-        raise NotImplementedError()
+        """Get the mapping of the item queryables of a collection, as an index mapping of the STAC items.
+
+        The registry index maps the PDS fields, not the STAC fields; the mapping is built from the registry fields
+        the queryables are read from, see ITEM_QUERYABLES.
+        """
+        await self.find_collection(collection_id)
+
+        properties: Dict[str, Any] = {}
+        for name, queryable in ITEM_QUERYABLES.items():
+            *parents, leaf = name.split(".")
+            node = properties
+            for parent in parents:
+                node = node.setdefault(parent, {"properties": {}})["properties"]
+            node[leaf] = {"type": queryable.type}
+        return {self.PRODUCT_INDEX_NAME: {"mappings": {"properties": properties}}}
 
     async def create_collection(self, collection: Dict, refresh: bool = False) -> None:
         """Create a collection in the database."""
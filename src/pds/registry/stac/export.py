@@ -0,0 +1,214 @@
+import struct
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import orjson
+from starlette.responses import StreamingResponse
+
+from .temporal import parse_datetime
+
+_WKB_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+
+# depth of the coordinates of each geometry type, 0 for a single position
+_COORDINATES_DEPTH = {
+    "Point": 0,
+    "LineString": 1,
+    "Polygon": 2,
+    "MultiPoint": 1,
+    "MultiLineString": 2,
+    "MultiPolygon": 3,
+}
+
+
+def _wkb_coordinates(coordinates: Any, depth: int, out: bytearray):
+    if depth == 0:
+        out += struct.pack("<2d", coordinates[0], coordinates[1])
+        return
+    out += struct.pack("<I", len(coordinates))
+    for c in coordinates:
+        _wkb_coordinates(c, depth - 1, out)
+
+
+def to_wkb(geometry: Optional[dict]) -> Optional[bytes]:
+    """Well-known binary (little endian, 2D) of a GeoJSON geometry."""
+    if not geometry:
+        return None
+    return _geometry_wkb(geometry)
+
+
+def _geometry_wkb(geometry: dict) -> bytes:
+    geometry_type = geometry["type"]
+    out = bytearray(struct.pack("<BI", 1, _WKB_TYPES[geometry_type]))
+    if geometry_type == "GeometryCollection":
+        out += struct.pack("<I", len(geometry["geometries"]))
+        for member in geometry["geometries"]:
+            out += _geometry_wkb(member)
+    elif geometry_type.startswith("Multi"):
+        # the members of multi geometries are geometries themselves
+        members = geometry["coordinates"]
+        out += struct.pack("<I", len(members))
+        for member in members:
+            out += _geometry_wkb({"type": geometry_type[len("Multi"):], "coordinates": member})
+    else:
+        _wkb_coordinates(geometry["coordinates"], _COORDINATES_DEPTH[geometry_type], out)
+    return bytes(out)
+
+
+class _Sink:
+    """Write-only file collecting the bytes written by the Parquet writer until they are sent."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # the absolute position, as the Parquet footer refers to the row groups by their offset in the file
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class GeoParquetWriter:
+    """Writer of STAC items as a GeoParquet file, one row group per batch of items.
+
+    The geometry is WKB encoded, the bounding box is a covering column, the datetimes are UTC timestamps,
+    assets and providers are JSON strings. Requires pyarrow.
+    """
+
+    def __init__(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("pyarrow must be installed in order to export GeoParquet")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._sink = _Sink()
+        self._writer = None
+
+        timestamp = pyarrow.timestamp("us", tz="UTC")
+        self.schema = pyarrow.schema(
+            [
+                ("id", pyarrow.string()),
+                ("collection", pyarrow.string()),
+                ("title", pyarrow.string()),
+                ("description", pyarrow.string()),
+                ("keywords", pyarrow.list_(pyarrow.string())),
+                ("datetime", timestamp),
+                ("start_datetime", timestamp),
+                ("end_datetime", timestamp),
+                ("providers", pyarrow.string()),
+                ("assets", pyarrow.string()),
+                ("bbox", pyarrow.struct([(name, pyarrow.float64()) for name in ("xmin", "ymin", "xmax", "ymax")])),
+                ("geometry", pyarrow.binary()),
+            ],
+            metadata={"geo": orjson.dumps({
+                "version": "1.1.0",
+                "primary_column": "geometry",
+                "columns": {
+                    "geometry": {
+                        "encoding": "WKB",
+                        "geometry_types": [],
+                        "covering": {"bbox": {name: ["bbox", name] for name in ("xmin", "ymin", "xmax", "ymax")}},
+                    },
+                },
+            })},
+        )
+
+    def __rows(self, items: List[Dict[str, Any]]) -> Dict[str, list]:
+        def json_or_none(value: Any) -> Optional[str]:
+            return orjson.dumps(value).decode() if value else None
+
+        def bbox(value: Optional[List[float]]) -> Optional[dict]:
+            if not value:
+                return None
+            return dict(zip(("xmin", "ymin", "xmax", "ymax"), value if len(value) == 4 else value[:2] + value[3:5]))
+
+        properties = [item.get("properties", {}) for item in items]
+        return {
+            "id": [item.get("id") for item in items],
+            "collection": [item.get("collection") for item in items],
+            "title": [item.get("title") for item in items],
+            "description": [item.get("description") for item in items],
+            "keywords": [item.get("keywords") for item in items],
+            "datetime": [parse_datetime(p.get("datetime")) for p in properties],
+            "start_datetime": [parse_datetime(p.get("start_datetime")) for p in properties],
+            "end_datetime": [parse_datetime(p.get("end_datetime")) for p in properties],
+            "providers": [json_or_none(item.get("providers")) for item in items],
+            "assets": [json_or_none(item.get("assets")) for item in items],
+            "bbox": [bbox(item.get("bbox")) for item in items],
+            "geometry": [to_wkb(item.get("geometry")) for item in items],
+        }
+
+    def write(self, items: List[Dict[str, Any]]) -> bytes:
+        """Write a row group, returns the bytes of the file written so far."""
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._sink, self.schema)
+        self._writer.write_table(self._pa.Table.from_pydict(self.__rows(items), schema=self.schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Write the footer, returns the last bytes of the file."""
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._sink, self.schema)
+        self._writer.close()
+        return self._sink.drain()
+
+
+def export_response(
+        batches: AsyncIterator[List[Dict[str, Any]]],
+        serialize: Callable[[Dict[str, Any]], Dict[str, Any]],
+        geoparquet_writer: Optional[GeoParquetWriter] = None,
+        filename: str = "export",
+) -> StreamingResponse:
+    """Streamed export of batches of items, as newline delimited JSON or, given a writer, as GeoParquet.
+
+    Args:
+        batches (AsyncIterator[List[Dict[str, Any]]]): the items exported.
+        serialize (Callable): the conversion of an item into its newline delimited JSON, e.g. adding its links.
+        geoparquet_writer (Optional[GeoParquetWriter]): the writer of a GeoParquet export.
+        filename (str): the name of the file exported, without extension.
+    """
+
+    async def ndjson() -> AsyncIterator[bytes]:
+        async for batch in batches:
+            yield b"".join(orjson.dumps(serialize(item), option=orjson.OPT_APPEND_NEWLINE) for item in batch)
+
+    async def geoparquet(writer: GeoParquetWriter) -> AsyncIterator[bytes]:
+        async for batch in batches:
+            yield writer.write(batch)
+        yield writer.close()
+
+    if geoparquet_writer:
+        return StreamingResponse(
+            geoparquet(geoparquet_writer),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.parquet"'},
+        )
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+    )
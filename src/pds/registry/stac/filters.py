@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional
+
+import attr
+from stac_fastapi.sfeos_helpers.filter import EsAsyncBaseFiltersClient
+
+from .database_logic import PDSDatabaseLogic
+from .types import ITEM_QUERYABLES
+
+
+@attr.s
+class PDSFiltersClient(EsAsyncBaseFiltersClient):
+    """Queryables of the registry items, see ITEM_QUERYABLES.
+
+    The queryables of a collection list the values of its facets as their enum, served from the facets cache of the
+    database logic.
+    """
+
+    database: PDSDatabaseLogic = attr.ib()
+
+    async def get_queryables(self, collection_id: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        queryables = await super().get_queryables(collection_id, **kwargs)
+        # the default queryables include fields the registry products do not have, e.g. created
+        names = {name.removeprefix("properties.") for name in ITEM_QUERYABLES}
+        properties = queryables["properties"] = {k: v for k, v in queryables["properties"].items() if k in names}
+        if not collection_id:
+            return queryables
+
+        facet_names = [name.removeprefix("properties.") for name, queryable in ITEM_QUERYABLES.items() if queryable.facet]
+        unique_values = await self.database.get_items_unique_values(
+            collection_id, [name for name in facet_names if name in properties]
+        )
+        for name, values in unique_values.items():
+            # an empty enum would reject every value, the facet is missing from the items of the collection
+            if values:
+                properties[name]["enum"] = values
+        return queryables
@@ -0,0 +1,83 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+import orjson
+
+_ANY_VERSION = object()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Cache key of JSON serializable values, independent of the order of the keys of their dictionaries."""
+    return hashlib.sha1(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class _Entry(NamedTuple):
+    value: Any
+    version: Any
+    expires: float
+
+
+class LRUCache:
+    """Bounded least-recently-used cache whose entries expire after `ttl` seconds.
+
+    Each entry is stored with a version (e.g. the harvest date of the source document); reading an entry
+    with a different version evicts it, so that a re-harvested document is never served from the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: Any = _ANY_VERSION) -> Optional[Any]:
+        """Get a value from the cache.
+
+        Args:
+            key (Hashable): The key of the entry.
+            version (Any): When given, the entry is only returned if it was stored with this version, and evicted otherwise.
+
+        Returns:
+            Optional[Any]: The cached value, None if the entry is missing, expired or outdated.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (entry.expires < time.monotonic() or (version is not _ANY_VERSION and entry.version != version)):
+            del self._entries[key]
+            self.evictions += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: Hashable, value: Any, version: Any = None):
+        """Store a value in the cache, evicting the least recently used entries beyond `maxsize`."""
+        self._entries[key] = _Entry(value, version, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,145 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar, cast
+
+from opensearchpy.serializer import JSONSerializer
+
+# upper bounds, in seconds, of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "pds_registry_stac_"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# the operation whose stages are being timed, e.g. execute_search
+current_operation: ContextVar[Optional[str]] = ContextVar("current_operation", default=None)
+
+
+class Sample(NamedTuple):
+    """Value of a gauge or a counter at the time it is collected; counters are named with a `_total` suffix."""
+
+    name: str
+    labels: Dict[str, str]
+    value: float
+
+
+class Histogram:
+    """Latency histogram with fixed buckets."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # by bucket, not cumulative; the last one counts the values above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> Iterator[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip((*(repr(b) for b in self.buckets), "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics:
+    """Latency of the stages of the registry operations, by operation and stage.
+
+    The stages of an operation are timed with `stage`, within `operation` which names the operation the stages
+    belong to, including the stages timed deeper in the call, e.g. the decoding of the registry responses.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, operation: str, stage: str, seconds: float):
+        histogram = self.histograms.get((operation, stage))
+        if histogram is None:
+            histogram = self.histograms[(operation, stage)] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    @contextmanager
+    def operation(self, operation: str) -> Iterator[None]:
+        """Time an operation, as its `total` stage, and attribute the stages timed meanwhile to it."""
+        token = current_operation.set(operation)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(operation, "total", time.perf_counter() - start)
+            current_operation.reset(token)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time a stage of the current operation, if any."""
+        operation = current_operation.get()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if operation is not None:
+                self.observe(operation, stage, time.perf_counter() - start)
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Record the duration of a stage of the current operation measured elsewhere, e.g. by the registry."""
+        operation = current_operation.get()
+        if operation is not None:
+            self.observe(operation, stage, seconds)
+
+    def render(self, samples: Iterable[Sample] = ()) -> str:
+        """The histograms and the given samples in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {PREFIX}stage_seconds Latency of the stages of the registry operations.",
+            f"# TYPE {PREFIX}stage_seconds histogram",
+        ]
+        for (operation, stage), histogram in sorted(self.histograms.items()):
+            labels = f'operation="{operation}",stage="{stage}"'
+            for bound, count in histogram.cumulative_counts():
+                lines.append(f'{PREFIX}stage_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{PREFIX}stage_seconds_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"{PREFIX}stage_seconds_count{{{labels}}} {histogram.count}")
+
+        by_name: Dict[str, List[Sample]] = {}
+        for sample in samples:
+            by_name.setdefault(sample.name, []).append(sample)
+        for name, named_samples in by_name.items():
+            lines.append(f"# TYPE {PREFIX}{name} {'counter' if name.endswith('_total') else 'gauge'}")
+            for sample in named_samples:
+                labels = ",".join(f'{key}="{value}"' for key, value in sample.labels.items())
+                series = f"{PREFIX}{name}{{{labels}}}" if labels else f"{PREFIX}{name}"
+                lines.append(f"{series} {float(sample.value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+def timed(operation: str) -> Callable[[F], F]:
+    """Decorator timing the calls of an async method as an operation of the `metrics` of its object."""
+
+    def decorator(method: F) -> F:
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            with self.metrics.operation(operation):
+                return await method(self, *args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+class TimedJSONSerializer(JSONSerializer):
+    """JSON serializer of the registry client timing the decoding of the responses, as the `decode` stage."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    def loads(self, s: Any) -> Any:
+        with self.metrics.stage("decode"):
+            return super().loads(s)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+
+from .lru_cache import fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCacheBackend(ABC):
+    """Storage of the serialized search results."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a stored value, None if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        """Store a value for `ttl` seconds."""
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+        }
+
+
+class MemoryResultCacheBackend(ResultCacheBackend):
+    """In-process least-recently-used storage, bounded by the total size of the values stored."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple[bytes, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self.size_bytes += len(value)
+        self.stores += 1
+        while self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.size_bytes -= len(value)
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class RedisResultCacheBackend(ResultCacheBackend):
+    """Storage shared by the API instances in a Redis compatible store.
+
+    Args:
+        client: an async Redis client, or any object with the same `get(key)` and `set(key, value, px=milliseconds)`
+            coroutines (e.g. a local stand-in in tests).
+        prefix (str): prefix of the keys in the store.
+    """
+
+    def __init__(self, client: Any, prefix: str = "pds-registry-stac:search:"):
+        super().__init__()
+        self._client = client
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisResultCacheBackend":
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("redis must be installed in order to use the redis result cache backend")
+        return cls(aioredis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self._client.get(self._prefix + key)
+        except Exception as e:
+            logger.warning(f"Result cache store unavailable: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        try:
+            await self._client.set(self._prefix + key, value, px=int(ttl * 1000))
+            self.stores += 1
+        except Exception as e:
+            logger.warning(f"Result cache store unavailable: {e}")
+
+
+class ResultCache:
+    """Cache of search results, invalidated when new products are harvested.
+
+    The harvest watermark, i.e. the latest harvest date of the registry, is part of every key: it is polled
+    at most every `watermark_interval` seconds in the background, and once it moves the previous entries are
+    never read again and expire. Nothing is cached until the watermark is first known.
+    """
+
+    def __init__(
+            self,
+            backend: ResultCacheBackend,
+            watermark_loader: Callable[[], Awaitable[Optional[str]]],
+            ttl: float,
+            watermark_interval: float,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.watermark_interval = watermark_interval
+        self._watermark_loader = watermark_loader
+        self.watermark: Optional[str] = None
+        self._watermark_checked = float("-inf")
+        self._watermark_task: Optional[asyncio.Task] = None
+
+    def _poll_watermark(self):
+        now = time.monotonic()
+        if now - self._watermark_checked < self.watermark_interval:
+            return
+        if self._watermark_task is None or self._watermark_task.done():
+            self._watermark_checked = now
+            self._watermark_task = asyncio.get_running_loop().create_task(self._load_watermark())
+
+    async def _load_watermark(self):
+        try:
+            watermark = await self._watermark_loader()
+        except Exception as e:
+            logger.warning(f"Harvest watermark cannot be loaded, results are not cached: {e}")
+            watermark = None
+        if watermark != self.watermark:
+            logger.info(f"Harvest watermark moved to {watermark}")
+        self.watermark = watermark
+
+    def key(self, *parts: Any) -> Optional[str]:
+        """Key of a result under the current watermark, None if results cannot be cached yet."""
+        self._poll_watermark()
+        if self.watermark is None:
+            return None
+        return fingerprint(self.watermark, *parts)
+
+    async def get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+        value = await self.backend.get(key)
+        return orjson.loads(value) if value is not None else None
+
+    async def set(self, key: Optional[str], value: Any):
+        if key is None:
+            return
+        await self.backend.set(key, orjson.dumps(value), self.ttl)
+
+    def stats(self) -> dict:
+        return {"watermark": self.watermark, **self.backend.stats()}
@@ -0,0 +1,70 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalescing of concurrent identical calls: the calls made with the same key while one is in flight
+    share this call and its result, or its error.
+
+    The shared call runs in its own task: a caller cancelled while waiting does not cancel it for the others,
+    the call is only cancelled once none of its callers waits for it anymore.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        # by kind of call
+        self.executed: Counter = Counter()
+        self.coalesced: Counter = Counter()
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]], kind: str = "call") -> T:
+        """Run a call, or join the identical call in flight.
+
+        Args:
+            key (Hashable): identifies the identical calls, e.g. a fingerprint of their arguments.
+            call (Callable[[], Awaitable[T]]): makes the call, only invoked if no identical call is in flight.
+            kind (str): kind of call, for the metrics.
+
+        Returns:
+            T: the result of the call, shared by the callers.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self.__land(key, flight))
+            self.executed[kind] += 1
+        else:
+            self.coalesced[kind] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # the last caller gave up, nobody needs the result anymore
+                self.__land(key, flight)
+                flight.task.cancel()
+                flight.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def __land(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "executed": dict(self.executed),
+            "coalesced": dict(self.coalesced),
+        }
@@ -0,0 +1,152 @@
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionSnapshot:
+    """Content of the collection cache materialized in a file, written by one of the workers serving the API and
+    read by the others.
+
+    The snapshot holds the extents and the converted STAC documents of all the collections. A worker parses it
+    into its own copy of the collection cache, in milliseconds, instead of crawling the registry and converting
+    the collections: the file saves the crawl, not the memory of the workers, each of which keeps its parsed copy.
+    Only one worker at a time, holding the lock file of the snapshot, rebuilds it from the registry once it is
+    older than `max_age`. The snapshot is written aside and renamed over the previous one, so that it is always
+    read whole.
+    """
+
+    MAGIC = b"PDSSTAC1\n"
+
+    def __init__(self, path: str, max_age: float, poll_interval: float = 1.0):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        # the last content loaded, with the modification time and size of the file it was loaded from
+        self._loaded: Optional[Tuple[Tuple[int, int], Dict[str, dict]]] = None
+
+    def age(self) -> Optional[float]:
+        """Seconds since the snapshot was written, None if there is no snapshot."""
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def fresh(self) -> bool:
+        age = self.age()
+        return age is not None and age < self.max_age
+
+    def load(self) -> Optional[Dict[str, dict]]:
+        """Load the snapshot, None if there is none or it cannot be read."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._loaded is not None and self._loaded[0] == signature:
+            return self._loaded[1]
+
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(self.MAGIC)) != self.MAGIC:
+                    raise ValueError("not a collection snapshot")
+                collections = orjson.loads(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Collection snapshot {self.path} cannot be loaded: {e}")
+            return None
+
+        self._loaded = (signature, collections)
+        return collections
+
+    def write(self, collections: Dict[str, dict]):
+        """Replace the snapshot atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as f:
+                f.write(self.MAGIC)
+                f.write(orjson.dumps(collections))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        logger.info(f"Collection snapshot {self.path} written with {len(collections)} collections")
+
+    @contextmanager
+    def lock(self) -> Iterator[bool]:
+        """Try to take the lock of the snapshot rebuild, without waiting.
+
+        Yields:
+            bool: True if the lock is taken, False if another process holds it.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+            except BlockingIOError:
+                acquired = False
+            yield acquired
+        finally:
+            # closing the file releases the lock
+            os.close(fd)
+
+    async def collections(
+            self,
+            build: Callable[[], AsyncIterator[Dict[str, dict]]],
+            serve_stale: bool = False,
+    ) -> AsyncIterator[Dict[str, dict]]:
+        """Loader of the collection cache reading the snapshot, rebuilt with `build` when it is not fresh.
+
+        Args:
+            build (Callable[[], AsyncIterator[Dict[str, dict]]]): crawls the collections from the registry.
+            serve_stale (bool): yield an outdated snapshot first, while it is rebuilt, e.g. for the first load.
+
+        Yields:
+            Dict[str, dict]: the ancillary information of the collections, by collection id.
+        """
+        stale_served = not serve_stale
+        while True:
+            if self.fresh():
+                collections = await asyncio.to_thread(self.load)
+                if collections is not None:
+                    yield collections
+                    return
+
+            with self.lock() as acquired:
+                if acquired:
+                    # written by another worker meanwhile, unless it cannot be read and is rebuilt like an outdated one
+                    collections = await asyncio.to_thread(self.load) if self.fresh() else None
+                    if collections is not None:
+                        yield collections
+                        return
+                    if not stale_served:
+                        stale = await asyncio.to_thread(self.load)
+                        if stale is not None:
+                            yield stale
+                    built: Dict[str, dict] = {}
+                    async for chunk in build():
+                        built.update(chunk)
+                        yield chunk
+                    await asyncio.to_thread(self.write, built)
+                    return
+
+            # another worker is rebuilding the snapshot, wait for it
+            if not stale_served:
+                stale_served = True
+                stale = await asyncio.to_thread(self.load)
+                if stale is not None:
+                    yield stale
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,167 @@
+import math
+from typing import Any, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+# west, south, east, north, with west <= east
+Box = Tuple[float, float, float, float]
+
+
+def split_antimeridian(bbox: Sequence[float]) -> List[Box]:
+    """Split a STAC bounding box into boxes which do not cross the antimeridian.
+
+    Args:
+        bbox (Sequence[float]): [west, south, east, north] or [west, south, min elevation, east, north, max elevation],
+            crossing the antimeridian when west is greater than east.
+
+    Returns:
+        List[Box]: one box, or two boxes when the bounding box crosses the antimeridian.
+    """
+    if len(bbox) == 6:
+        bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+    west, south, east, north = bbox
+    if west > east:
+        return [(west, south, 180.0, north), (-180.0, south, east, north)]
+    return [(west, south, east, north)]
+
+
+def box_to_polygon(box: Box) -> List[List[List[float]]]:
+    """GeoJSON polygon coordinates of a box."""
+    west, south, east, north = box
+    return [[[west, south], [east, south], [east, north], [west, north], [west, south]]]
+
+
+def geometry_bounds(geometry: Any) -> Optional[Box]:
+    """Bounding box of a GeoJSON geometry, as a box not crossing the antimeridian, None if it has no position."""
+    if hasattr(geometry, "model_dump"):
+        geometry = geometry.model_dump()
+
+    # the GeoJSON types are capitalized, those of the OpenSearch shapes are lowercase
+    if (geometry.get("type") or "").lower() == "geometrycollection":
+        boxes = [box for box in (geometry_bounds(g) for g in geometry.get("geometries", [])) if box]
+        if not boxes:
+            return None
+        return (
+            min(box[0] for box in boxes),
+            min(box[1] for box in boxes),
+            max(box[2] for box in boxes),
+            max(box[3] for box in boxes),
+        )
+
+    positions = list(_positions(geometry.get("coordinates")))
+    if not positions:
+        return None
+    return (
+        min(p[0] for p in positions),
+        min(p[1] for p in positions),
+        max(p[0] for p in positions),
+        max(p[1] for p in positions),
+    )
+
+
+def _positions(coordinates: Any) -> Iterable[Sequence[float]]:
+    if not coordinates:
+        return
+    if isinstance(coordinates[0], (int, float)):
+        yield coordinates
+        return
+    for c in coordinates:
+        yield from _positions(c)
+
+
+def merge_longitude_ranges(regular: Optional[Tuple[float, float]], crossing: Optional[Tuple[float, float]]) -> Tuple[float, float]:
+    """West and east bounds covering both regular and antimeridian crossing longitude ranges.
+
+    Args:
+        regular (Optional[Tuple[float, float]]): (min west, max east) of the boxes not crossing the antimeridian.
+        crossing (Optional[Tuple[float, float]]): (min west, max east) of the boxes crossing the antimeridian.
+
+    Returns:
+        Tuple[float, float]: the west and east bounds of the union, west is greater than east when
+        the union crosses the antimeridian.
+
+    Raises:
+        ValueError: if neither range is given.
+    """
+    if crossing is None:
+        if regular is None:
+            raise ValueError("No longitude range to merge")
+        return regular
+    west, east = crossing
+    if regular is not None:
+        regular_west, regular_east = regular
+        if not (regular_west >= west or regular_east <= east):
+            # either stretch the crossing range eastward or westward, whichever adds the least
+            if regular_east - east <= west - regular_west:
+                east = regular_east
+            else:
+                west = regular_west
+    if west <= east:
+        # the union covers every longitude
+        return -180.0, 180.0
+    return west, east
+
+
+def boxes_intersect(a: Box, b: Box) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class _Node:
+    __slots__ = ("box", "children", "keys")
+
+    def __init__(self, box: Box, children: Optional[List["_Node"]] = None, keys: Optional[List[Tuple[Hashable, Box]]] = None):
+        self.box = box
+        self.children = children
+        self.keys = keys
+
+
+def _enclosing_box(boxes: Iterable[Box]) -> Box:
+    boxes = list(boxes)
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+def _sort_tile_recursive(entries: List[Any], box_of, node_capacity: int) -> List[List[Any]]:
+    """Group entries in tiles of at most `node_capacity` entries with the Sort-Tile-Recursive algorithm."""
+    slice_count = math.ceil(math.sqrt(math.ceil(len(entries) / node_capacity)))
+    slice_size = slice_count * node_capacity
+    entries = sorted(entries, key=lambda e: box_of(e)[0] + box_of(e)[2])
+    groups: List[List[Any]] = []
+    for i in range(0, len(entries), slice_size):
+        vertical_slice = sorted(entries[i:i + slice_size], key=lambda e: box_of(e)[1] + box_of(e)[3])
+        groups.extend(vertical_slice[j:j + node_capacity] for j in range(0, len(vertical_slice), node_capacity))
+    return groups
+
+
+class RTree:
+    """Static R-tree of bounding boxes, bulk loaded with the Sort-Tile-Recursive algorithm.
+
+    The boxes indexed must not cross the antimeridian, see `split_antimeridian`.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[Hashable, Box]], node_capacity: int = 16):
+        leaves = [
+            _Node(_enclosing_box(box for _, box in group), keys=group)
+            for group in _sort_tile_recursive(list(entries), lambda e: e[1], node_capacity)
+        ]
+        nodes = leaves
+        while len(nodes) > 1:
+            nodes = [
+                _Node(_enclosing_box(node.box for node in group), children=group)
+                for group in _sort_tile_recursive(nodes, lambda n: n.box, node_capacity)
+            ]
+        self._root = nodes[0] if nodes else None
+
+    def query(self, box: Box) -> Set[Hashable]:
+        """Keys of the entries whose box intersects the given box."""
+        found: Set[Hashable] = set()
+        stack = [self._root] if self._root and boxes_intersect(self._root.box, box) else []
+        while stack:
+            node = stack.pop()
+            if node.keys is not None:
+                found.update(key for key, key_box in node.keys if boxes_intersect(key_box, box))
+            else:
+                stack.extend(child for child in node.children or () if boxes_intersect(child.box, box))
+        return found
@@ -0,0 +1,134 @@
+import logging
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+from fastapi import Request
+from starlette.responses import StreamingResponse
+from stac_fastapi.core.models.links import PagingLinks
+from stac_fastapi.types import stac as stac_types
+
+from .types import items_to_stac
+
+logger = logging.getLogger(__name__)
+
+# the item streams of the current search, registered by PDSDatabaseLogic.execute_search when the client
+# accepts a streamed response (see PDSClient.post_search)
+streamed_items: ContextVar[Optional[List["ItemStream"]]] = ContextVar("streamed_items", default=None)
+
+# size of the writes of a streamed response
+_WRITE_BUFFER_SIZE = 64 * 1024
+
+
+class ItemStream:
+    """Items of one search page, fetched from the registry and converted chunk by chunk as they are consumed.
+
+    Args:
+        first_hits (List[dict]): the hits of the first chunk, already fetched.
+        fetch (Callable[[List[Any], int], Awaitable[List[dict]]]): fetches the `size` hits following a sort value.
+        tokenize (Callable[[List[Any]], str]): the token of the page following a sort value.
+        close (Callable[[], Awaitable[None]]): releases the resources of the search, called once its last page is read.
+        limit (int): the number of items of the page.
+        chunk_size (int): the number of hits fetched at once.
+    """
+
+    def __init__(
+            self,
+            first_hits: List[dict],
+            fetch: Callable[[List[Any], int], Awaitable[List[dict]]],
+            tokenize: Callable[[List[Any]], str],
+            close: Callable[[], Awaitable[None]],
+            limit: int,
+            chunk_size: int,
+    ):
+        self._first_hits: Optional[List[dict]] = first_hits
+        self._fetch = fetch
+        self._tokenize = tokenize
+        self._close = close
+        self.limit = limit
+        self.chunk_size = chunk_size
+        self.returned = 0
+        # known once the stream is consumed
+        self.next_token: Optional[str] = None
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        async for item in self.__items():
+            yield item
+        if self.next_token is None:
+            # the last page of the search
+            await self._close()
+
+    async def __items(self) -> AsyncIterator[Dict[str, Any]]:
+        hits, requested = self._first_hits or [], self.chunk_size
+        self._first_hits = None
+        while hits:
+            page = hits[:self.limit - self.returned]
+            for item in items_to_stac(hit["_source"] for hit in page):
+                yield item
+            self.returned += len(page)
+
+            if len(hits) < requested:
+                # the registry has no more results
+                return
+            last_sort = page[-1].get("sort") if page else None
+            if self.returned >= self.limit:
+                # one hit more than the page was fetched, so there is a next page
+                if len(hits) > len(page) and last_sort:
+                    self.next_token = self._tokenize(last_sort)
+                return
+            if not last_sort:
+                return
+            remaining = self.limit - self.returned
+            # the last chunk has one hit beyond the page, which tells whether there is a next page
+            requested = remaining + 1 if remaining <= self.chunk_size else self.chunk_size
+            hits = await self._fetch(last_sort, requested)
+
+
+def streaming_item_collection(
+        stream: ItemStream,
+        item_collection: stac_types.ItemCollection,
+        serialize: Callable[[Dict[str, Any]], Dict[str, Any]],
+        request: Request,
+) -> StreamingResponse:
+    """GeoJSON FeatureCollection response written item by item as the stream is consumed.
+
+    The envelope is taken from the item collection built by stac-fastapi without features; the paging links
+    and the number of items returned are written after the features, once they are known.
+
+    Args:
+        stream (ItemStream): the items of the page.
+        item_collection (ItemCollection): the item collection built without the streamed items.
+        serialize (Callable): the conversion of an item into its response, e.g. with the fields extension.
+        request (Request): the search request.
+    """
+
+    async def content() -> AsyncIterator[bytes]:
+        buffer = bytearray(b'{"type":"FeatureCollection","features":[')
+        separator = b""
+        try:
+            async for item in stream:
+                buffer += separator
+                buffer += orjson.dumps(serialize(item))
+                separator = b","
+                if len(buffer) >= _WRITE_BUFFER_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+        except Exception as e:
+            # the response has started, it can only be cut short
+            logger.error(f"Streamed search failed after {stream.returned} items: {e}")
+            raise
+
+        links = list(item_collection.get("links", []))
+        if stream.next_token:
+            paging_links = await PagingLinks(request=request, next=stream.next_token).get_links()
+            links.extend(link for link in paging_links if link["rel"] == "next")
+        tail = {
+            "links": links,
+            "numberReturned": stream.returned,
+            "numberMatched": item_collection.get("numberMatched"),
+        }
+        # the members following the features, without the braces of their own object
+        buffer += b"]," + orjson.dumps(tail)[1:]
+        yield bytes(buffer)
+
+    return StreamingResponse(content(), media_type="application/geo+json")
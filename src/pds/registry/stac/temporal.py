@@ -0,0 +1,98 @@
+import logging
+from datetime import datetime
+from datetime import timezone
+from typing import Dict, Optional, Tuple
+
+from stac_fastapi.sfeos_helpers.database import return_date
+from stac_fastapi.types.rfc3339 import rfc3339_str_to_datetime
+
+logger = logging.getLogger(__name__)
+
+START_DATE_TIME = "pds:Time_Coordinates/pds:start_date_time"
+STOP_DATE_TIME = "pds:Time_Coordinates/pds:stop_date_time"
+
+# bounds stac-fastapi substitutes to the open ends ("..") of datetime intervals, see return_date
+_OPEN_START = datetime.min.replace(tzinfo=timezone.utc)
+_OPEN_END = datetime.max.replace(tzinfo=timezone.utc)
+
+Interval = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse a RFC 3339 datetime, None if the value is missing or cannot be parsed."""
+    if not value or value == "..":
+        return None
+    try:
+        return rfc3339_str_to_datetime(value)
+    except ValueError:
+        logger.debug(f"Ignoring unparsable datetime {value}")
+        return None
+
+
+def search_interval(datetime_search: Optional[Dict[str, Optional[str]]]) -> Optional[Interval]:
+    """Convert the datetime search of stac-fastapi into a (start, end) interval.
+
+    Open ends, either missing or replaced by stac-fastapi with its minimum and maximum dates, are None.
+
+    Returns:
+        Optional[Interval]: the interval, None if the search is not bounded in time.
+    """
+    if not datetime_search:
+        return None
+    if datetime_search.get("eq"):
+        instant = parse_datetime(datetime_search["eq"])
+        return (instant, instant) if instant else None
+
+    start = parse_datetime(datetime_search.get("gte"))
+    end = parse_datetime(datetime_search.get("lte"))
+    if start is not None and start <= _OPEN_START:
+        start = None
+    if end is not None and end >= _OPEN_END:
+        end = None
+    if start is None and end is None:
+        return None
+    return start, end
+
+
+def parse_datetime_interval(interval: Optional[str]) -> Optional[Interval]:
+    """Parse a STAC datetime or datetime interval into a (start, end) tuple, None bounds are open."""
+    return search_interval(return_date(interval))
+
+
+def overlaps(start: Optional[datetime], end: Optional[datetime], interval: Interval) -> bool:
+    """True if the time span [start, end], where None bounds are open, overlaps the interval."""
+    interval_start, interval_end = interval
+    return (start is None or interval_end is None or start <= interval_end) and (end is None or interval_start is None or interval_start <= end)
+
+
+def _isoformat(instant: datetime) -> str:
+    return instant.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def temporal_filter(interval: Interval) -> dict:
+    """OpenSearch filter on the products whose time coordinates overlap the interval.
+
+    A product spans from its start to its stop date time; a product with only one of them is an instant.
+    Products without time coordinates never match.
+    """
+    start, end = interval
+    clauses = []
+    if start is not None:
+        # the product ends after the start of the interval
+        clauses.append({"bool": {"should": [
+            {"range": {STOP_DATE_TIME: {"gte": _isoformat(start)}}},
+            {"bool": {
+                "must_not": [{"exists": {"field": STOP_DATE_TIME}}],
+                "filter": [{"range": {START_DATE_TIME: {"gte": _isoformat(start)}}}],
+            }},
+        ], "minimum_should_match": 1}})
+    if end is not None:
+        # the product starts before the end of the interval
+        clauses.append({"bool": {"should": [
+            {"range": {START_DATE_TIME: {"lte": _isoformat(end)}}},
+            {"bool": {
+                "must_not": [{"exists": {"field": START_DATE_TIME}}],
+                "filter": [{"range": {STOP_DATE_TIME: {"lte": _isoformat(end)}}}],
+            }},
+        ], "minimum_should_match": 1}})
+    return {"bool": {"filter": clauses}}
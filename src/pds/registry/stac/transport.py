@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from opensearchpy import exceptions
+from stac_fastapi.opensearch.config import _es_config
+from stac_fastapi.types.errors import StacApiError
+
+from .config import PDSRegistrySettings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def client_config(settings: PDSRegistrySettings) -> Dict[str, Any]:
+    """Configuration of the registry clients: the hosts, credentials and TLS of stac-fastapi-opensearch (ES_*
+    environment variables) with the transport settings of the registry."""
+    config = _es_config()
+    config.update(
+        pool_maxsize=settings.registry_pool_maxsize,
+        http_compress=settings.registry_http_compress,
+        timeout=settings.registry_timeout,
+        max_retries=settings.registry_max_retries,
+        retry_on_timeout=settings.registry_retry_on_timeout,
+    )
+    return config
+
+
+def is_registry_failure(error: BaseException) -> bool:
+    """True if an error tells that the registry is degraded, rather than that a request is wrong.
+
+    Connection errors and timeouts are failures, as well as the server errors and the rejections of an
+    overloaded cluster; missing documents and invalid requests are not.
+    """
+    if isinstance(error, (exceptions.ConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, exceptions.TransportError):
+        return isinstance(error.status_code, int) and (error.status_code >= 500 or error.status_code == 429)
+    return False
+
+
+class RegistryUnavailableError(StacApiError):
+    """The registry is degraded, requests fail fast until it recovers."""
+
+
+class CircuitBreaker:
+    """Circuit breaker of the requests to the registry.
+
+    The circuit opens after `failure_threshold` consecutive failures: the requests fail fast with a
+    RegistryUnavailableError for `reset_timeout` seconds, then a single request probes the registry. The
+    circuit closes if it succeeds, or opens again if it fails.
+
+    Args:
+        failure_threshold (int): number of consecutive failures opening the circuit.
+        reset_timeout (float): seconds the circuit stays open before probing the registry.
+        is_failure (Callable[[BaseException], bool]): the errors counted as failures, the others are raised
+            without affecting the circuit.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int,
+            reset_timeout: float,
+            is_failure: Callable[[BaseException], bool] = is_registry_failure,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Send a request unless the circuit is open.
+
+        Raises:
+            RegistryUnavailableError: if the circuit is open, or half open with its probe in flight.
+        """
+        probe = False
+        if self.opened_at is not None:
+            if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise RegistryUnavailableError("The registry is unavailable, retry later")
+            self.probing = probe = True
+
+        try:
+            result = await request()
+        except BaseException as e:
+            if self.is_failure(e):
+                self.__failed()
+            elif probe:
+                # the probe was cancelled or its request was wrong, the next request probes again
+                self.probing = False
+            raise
+        else:
+            if self.opened_at is not None:
+                logger.info("Registry recovered, closing the circuit")
+            self.failures, self.opened_at, self.probing = 0, None, False
+            return result
+
+    def __failed(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Registry failed {self.failures} times in a row, opening the circuit")
+            self.opened_at, self.probing = time.monotonic(), False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
@@ -1,157 +1,239 @@
-from stac_pydantic.version import STAC_VERSION
-from stac_fastapi.types import stac as stac_types
-
-# TODO review the design as the object approach does not make a lot of sense here
-
-class STACObject:
-    """Base STAC Object model for PDS Registry."""
-
-    MAIN_API_BASE_URL = "http://pds.nasa.gov/api/search/1/"
-
-    def __init__(self, source: dict, ancillary: dict = None):
-        self.stac_vervion = STAC_VERSION
-        self.licence = "CC0-1.0"
-        self.id = source.get("lidvid")
-        self.title = source.get("pds:Identification_Area/pds:title", None)[0]
-        self.description = source.get("pds:Citation_Information/pds:description", [None])[0]
-        keywords = []
-        keywords.extend(source.get("pds:Observing_System/pds:name", []))
-        keywords.extend(source.get("pds:Target_Identification/pds:name", []))
-        keywords.extend(source.get("pds:Investigation_Area/pds:name", []))
-        keywords.extend(source.get("pds:Observing_System_Component/pds:name", []))
-        keywords.extend(source.get("pds:Science_Facets/pds:domain", []))
-        self.keywords = keywords
-
-        main_api_prefix = STACObject.MAIN_API_BASE_URL + "products/"
-        self.investigation = main_api_prefix + source.get("ref_lid_investigation")[0] if "ref_lid_investigation" in source else None
-        self.platform = main_api_prefix + source.get("ref_lid_platform")[0] if "ref_lid_platform" in source else None
-        self.instrument = main_api_prefix + source.get("ref_lid_instrument")[0] if "ref_lid_instrument" in source else None
-
-        providers = []
-        discipline_node = {}
-        discipline_node["name"] = source["ops:Harvest_Info/ops:node_name"][0]
-        discipline_node["role"] = "custodian"
-        discipline_node["url"] = "https://pds.nasa.gov/"
-        providers.append(discipline_node)
-
-        if providers:
-            self.providers = providers
-
-        if "pds:Time_Coordinates/pds:start_date_time" in source or "pds:Time_Coordinates/pds:stop_date_time" in source:
-            self.temporal_interval = [
-                source.get("pds:Time_Coordinates/pds:start_date_time", [None])[0],
-                source.get("pds:Time_Coordinates/pds:stop_date_time", [None])[0]
-            ]
-
-    def to_stac(self):
-        return dict(
-            stac_version=self.stac_vervion,
-            license=self.licence,
-            id=self.id,
-        )
-
-
-class Collection(STACObject):
-    """STAC Collection model for PDS Registry."""
-
-    def __init__(self, source: dict, ancillary: dict = None):
-        super().__init__(source)
-        self.bbox = ancillary["bbox"]
-
-    def to_stac(self):
-        collection = super().to_stac()
-        collection["type"] = "Collection"
-        if self.title:
-            collection["title"] = self.title
-
-        if self.description:
-            collection["description"] = self.description
-
-        if self.keywords:
-            collection["keywords"] = self.keywords
-
-        collection["providers"] = self.providers
-        collection["extent"] = {
-            "spatial": {
-                "bbox": self.bbox
-            },
-            "temporal": {
-                "interval": [self.temporal_interval]
-            }
-        }
-        return collection
-
-
-
-class Item(STACObject):
-    """STAC Item model for PDS Registry."""
-
-    def __init__(self, source: dict, ancillary: dict = None):
-        super().__init__(source)
-        self.type = "Collection"
-        self.collection = source.get("ops:Provenance/ops:parent_collection_identifier", [None])[0]
-
-        self.geometry = source.get("bbox_polygon", None)
-
-        self.bbox = None
-        polygon = self.geometry["coordinates"][0] if self.geometry else None
-        if polygon:
-            self.bbox = [
-                polygon[0][0],
-                polygon[1][0],
-                polygon[0][1],
-                polygon[2][1],
-            ]
-
-        if "ops:Data_File_Info/ops:file_ref" in source:
-            assets = {}
-            file_refs = source["ops:Data_File_Info/ops:file_ref"]
-            for idx, file_ref in enumerate(file_refs):
-                asset_key = f"data_file_{idx+1}"
-                assets[asset_key] = {
-                    "href": file_ref,
-                    "title": source.get("ops:Data_File_Info/ops:file_name", ["Data File"])[0],
-                    "type": source.get("ops:Data_File_Info/ops:mime_type", ["application/octet-stream"])[0],
-                }
-            self.assets = assets
-
-
-    def to_stac(self):
-        item = super().to_stac()
-        item["type"] = "Feature"
-        item["collection"] = self.collection
-
-        item["geometry"] = self.geometry
-
-        item["bbox"] = self.bbox
-
-        item["assets"] = self.assets
-
-
-        if self.title:
-            item["title"] = self.title
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
 
-        if self.description:
-            item["description"] = self.description
-
-        if self.keywords:
-            item["keywords"] = self.keywords
-
-        if self.providers:
-            item["providers"] = self.providers
+from stac_pydantic.version import STAC_VERSION
 
+# the whole sky, extent of a collection until the collection cache is loaded
+DEFAULT_BBOX = [[-180.0, -90.0, 180.0, 90.0]]
+
+# registry fields read by the item conversion, by STAC field they are converted to: item_to_stac reads the fields
+# bound below, and the item searches only fetch those of the STAC fields requested, see item_source_fields
+ITEM_SOURCE_FIELDS: Dict[str, List[str]] = {
+    "id": ["lidvid"],
+    "collection": ["ops:Provenance/ops:parent_collection_identifier"],
+    "geometry": ["bbox_polygon"],
+    "bbox": ["bbox_polygon"],
+    "assets": ["ops:Data_File_Info/ops:file_ref", "ops:Data_File_Info/ops:file_name", "ops:Data_File_Info/ops:mime_type"],
+    "title": ["pds:Identification_Area/pds:title"],
+    "description": ["pds:Citation_Information/pds:description"],
+    "keywords": [
+        "pds:Observing_System/pds:name",
+        "pds:Target_Identification/pds:name",
+        "pds:Investigation_Area/pds:name",
+        "pds:Observing_System_Component/pds:name",
+        "pds:Science_Facets/pds:domain",
+    ],
+    "providers": ["ops:Harvest_Info/ops:node_name"],
+    "properties": ["pds:Time_Coordinates/pds:start_date_time", "pds:Time_Coordinates/pds:stop_date_time"],
+}
+
+[_LIDVID] = ITEM_SOURCE_FIELDS["id"]
+[_COLLECTION] = ITEM_SOURCE_FIELDS["collection"]
+[_BBOX_POLYGON] = ITEM_SOURCE_FIELDS["geometry"]
+_FILE_REF, _FILE_NAME, _MIME_TYPE = ITEM_SOURCE_FIELDS["assets"]
+[_TITLE] = ITEM_SOURCE_FIELDS["title"]
+[_DESCRIPTION] = ITEM_SOURCE_FIELDS["description"]
+_KEYWORDS_FIELDS = tuple(ITEM_SOURCE_FIELDS["keywords"])
+[_NODE_NAME] = ITEM_SOURCE_FIELDS["providers"]
+_START_DATE_TIME, _STOP_DATE_TIME = ITEM_SOURCE_FIELDS["properties"]
+
+# registry fields searched by the free text queries: those of the title, the description and the keywords
+ITEM_TEXT_FIELDS = [*ITEM_SOURCE_FIELDS["title"], *ITEM_SOURCE_FIELDS["description"], *ITEM_SOURCE_FIELDS["keywords"]]
+
+# keys of the assets of the data files, the products rarely have more
+_ASSET_KEYS = tuple(f"data_file_{idx}" for idx in range(1, 17))
+
+
+def _keywords(get) -> List[str]:
+    keywords: List[str] = []
+    for field in _KEYWORDS_FIELDS:
+        values = get(field)
+        if values:
+            keywords += values
+    return keywords
+
+
+def _providers(node_names: Optional[List[str]]) -> Optional[List[dict]]:
+    if not node_names:
+        return None
+    return [{"name": node_names[0], "role": "custodian", "url": "https://pds.nasa.gov/"}]
+
+
+def item_to_stac(source: dict) -> dict:
+    """Convert a registry product into a STAC item.
+
+    The registry fields are lists; the optional STAC fields whose registry fields are missing or empty are omitted.
+    Only the fields of ITEM_SOURCE_FIELDS are read, a product may have been fetched with a subset of them.
+    """
+    get = source.get
+    collection = get(_COLLECTION)
+    geometry = get(_BBOX_POLYGON)
+    # west, south, east, north: the polygon starts at the south west corner and goes east then north
+    polygon = geometry["coordinates"][0] if geometry else None
+    file_refs = get(_FILE_REF)
+    assets = {}
+    if file_refs:
+        file_names = get(_FILE_NAME)
+        mime_types = get(_MIME_TYPE)
+        title = file_names[0] if file_names else "Data File"
+        media_type = mime_types[0] if mime_types else "application/octet-stream"
+        if len(file_refs) > len(_ASSET_KEYS):
+            keys: Iterable[str] = (f"data_file_{idx}" for idx in range(1, len(file_refs) + 1))
+        else:
+            keys = _ASSET_KEYS
+        for key, file_ref in zip(keys, file_refs):
+            assets[key] = {"href": file_ref, "title": title, "type": media_type}
+    item = {
+        "stac_version": STAC_VERSION,
+        "license": "CC0-1.0",
+        "id": get(_LIDVID),
+        "type": "Feature",
+        "collection": collection[0] if collection else None,
+        "geometry": geometry,
+        "bbox": [polygon[0][0], polygon[0][1], polygon[1][0], polygon[2][1]] if polygon else None,
+        "assets": assets,
+    }
+
+    title = get(_TITLE)
+    if title and title[0]:
+        item["title"] = title[0]
+    description = get(_DESCRIPTION)
+    if description and description[0]:
+        item["description"] = description[0]
+    keywords = _keywords(get)
+    if keywords:
+        item["keywords"] = keywords
+    node_names = get(_NODE_NAME)
+    if node_names:
+        item["providers"] = [{"name": node_names[0], "role": "custodian", "url": "https://pds.nasa.gov/"}]
+
+    starts = get(_START_DATE_TIME)
+    stops = get(_STOP_DATE_TIME)
+    start = starts[0] if starts else None
+    stop = stops[0] if stops else None
+    if start or stop:
         properties = {}
-        if self.temporal_interval:
-            if self.temporal_interval[0]:
-                properties["start_datetime"] = self.temporal_interval[0]
-                properties["datetime"] = self.temporal_interval[0]
-
-            if self.temporal_interval[1]:
-                properties["end_datetime"] = self.temporal_interval[1]
-                if not "datetime" in properties:
-                    properties["datetime"] = self.temporal_interval[1]
-
-        if properties:
-            item["properties"] = properties
-
-        return item
+        if start:
+            properties["start_datetime"] = start
+        # the datetime is the start date time, or the stop date time of the products without start
+        datetime = start if starts else stop
+        if datetime:
+            properties["datetime"] = datetime
+        if stop:
+            properties["end_datetime"] = stop
+        item["properties"] = properties
+    return item
+
+
+def items_to_stac(sources: Iterable[dict]) -> List[dict]:
+    """Convert registry products, e.g. the sources of a page of search hits, into STAC items."""
+    return [item_to_stac(source) for source in sources]
+
+
+def collection_to_stac(source: dict, ancillary: Optional[dict] = None) -> dict:
+    """Convert a registry collection into a STAC collection.
+
+    Args:
+        source (dict): the registry document of the collection.
+        ancillary (Optional[dict]): the ancillary information of the collection, its `bbox` computed from its
+            products; the whole sky when missing.
+    """
+    get = source.get
+    collection = {
+        "stac_version": STAC_VERSION,
+        "license": "CC0-1.0",
+        "id": get(_LIDVID),
+        "type": "Collection",
+    }
+
+    title = get(_TITLE)
+    if title and title[0]:
+        collection["title"] = title[0]
+    description = get(_DESCRIPTION)
+    if description and description[0]:
+        collection["description"] = description[0]
+    keywords = _keywords(get)
+    if keywords:
+        collection["keywords"] = keywords
+    providers = _providers(get(_NODE_NAME))
+    if providers:
+        collection["providers"] = providers
+
+    # the bounds missing from the registry are open, an undated collection has the open interval
+    start, stop = get(_START_DATE_TIME), get(_STOP_DATE_TIME)
+    interval = [[start[0] if start else None, stop[0] if stop else None]]
+    collection["extent"] = {
+        "spatial": {"bbox": (ancillary or {}).get("bbox") or DEFAULT_BBOX},
+        "temporal": {"interval": interval},
+    }
+    return collection
+
+
+# STAC fields always converted, whatever the fields extension requests
+ITEM_REQUIRED_FIELDS = {"id", "collection", "title", "providers"}
+
+
+class Queryable(NamedTuple):
+    """Registry field an item queryable is read from."""
+
+    field: str
+    # type of the registry field in the index mapping, e.g. keyword or date
+    type: str
+    # its distinct values are listed as the enum of the queryable, see get_items_unique_values
+    facet: bool = False
+
+
+# queryables of the items, by STAC field; the fields of the properties are queried without their `properties.` prefix
+ITEM_QUERYABLES: Dict[str, Queryable] = {
+    "id": Queryable("lidvid", "keyword"),
+    "collection": Queryable("ops:Provenance/ops:parent_collection_identifier", "keyword"),
+    "geometry": Queryable("bbox_polygon", "geo_shape"),
+    "properties.datetime": Queryable(_START_DATE_TIME, "date"),
+    "properties.start_datetime": Queryable(_START_DATE_TIME, "date"),
+    "properties.end_datetime": Queryable(_STOP_DATE_TIME, "date"),
+    # the sources of the keywords, as facets
+    "properties.pds:observing_system": Queryable(_KEYWORDS_FIELDS[0], "keyword", facet=True),
+    "properties.pds:target": Queryable(_KEYWORDS_FIELDS[1], "keyword", facet=True),
+    "properties.pds:investigation": Queryable(_KEYWORDS_FIELDS[2], "keyword", facet=True),
+    "properties.pds:observing_system_component": Queryable(_KEYWORDS_FIELDS[3], "keyword", facet=True),
+    "properties.pds:science_domain": Queryable(_KEYWORDS_FIELDS[4], "keyword", facet=True),
+}
+
+
+# aggregations of the items, by name in the aggregation extension, over the registry fields of the queryables
+ITEM_AGGREGATIONS: Dict[str, dict] = {
+    "total_count": {"value_count": {"field": ITEM_QUERYABLES["id"].field}},
+    "datetime_min": {"min": {"field": ITEM_QUERYABLES["properties.datetime"].field}},
+    "datetime_max": {"max": {"field": ITEM_QUERYABLES["properties.datetime"].field}},
+    # the interval is the one requested, month by default
+    "datetime_frequency": {
+        "date_histogram": {"field": ITEM_QUERYABLES["properties.datetime"].field, "calendar_interval": "month"}
+    },
+    "collection_frequency": {"terms": {"field": ITEM_QUERYABLES["collection"].field, "size": 100}},
+    "target_frequency": {"terms": {"field": ITEM_QUERYABLES["properties.pds:target"].field, "size": 100}},
+    "observing_system_frequency": {
+        "terms": {"field": ITEM_QUERYABLES["properties.pds:observing_system"].field, "size": 100}
+    },
+    "investigation_frequency": {"terms": {"field": ITEM_QUERYABLES["properties.pds:investigation"].field, "size": 100}},
+    "science_domain_frequency": {"terms": {"field": ITEM_QUERYABLES["properties.pds:science_domain"].field, "size": 100}},
+    # the precision is the one requested, 0 by default
+    "geometry_geotile_grid_frequency": {"geotile_grid": {"field": ITEM_QUERYABLES["geometry"].field, "precision": 0}},
+}
+
+
+def item_source_fields(include: Optional[Set[str]] = None, exclude: Optional[Set[str]] = None) -> List[str]:
+    """Get the registry fields needed to convert items, honoring the include/exclude of the STAC fields extension.
+
+    Args:
+        include (Optional[Set[str]]): STAC fields to include (e.g. `properties.datetime`), all the fields if empty.
+        exclude (Optional[Set[str]]): STAC fields to exclude, only whole top level fields (e.g. `assets`) are excluded from the registry request.
+
+    Returns:
+        List[str]: the registry fields to request as `_source` includes.
+    """
+    stac_fields = set(ITEM_SOURCE_FIELDS.keys())
+    if include:
+        stac_fields &= {field.split(".")[0] for field in include}
+    if exclude:
+        stac_fields -= set(exclude)
+    stac_fields |= ITEM_REQUIRED_FIELDS
+    return sorted({source_field for stac_field in stac_fields for source_field in ITEM_SOURCE_FIELDS[stac_field]})
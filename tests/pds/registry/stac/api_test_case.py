@@ -0,0 +1,86 @@
+"""Base test case driving the STAC API application in-process, with the registry replaced by FakeAsyncOpenSearch."""
+import os
+import unittest
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+import httpx
+
+from pds.registry.stac import app as app_module
+from pds.registry.stac.database_logic import PDSDatabaseLogic
+
+from .fake_opensearch import FakeAsyncOpenSearch
+from .fake_opensearch import synthetic_registry
+
+
+class APITestCase(unittest.IsolatedAsyncioTestCase):
+    """The API application served through its ASGI interface, with a fresh database logic over synthetic registry
+    documents for each test, so that no cache is shared between tests.
+
+    The settings of the database logic are those of the environment, overridden by `settings`.
+    """
+
+    collections = 3
+    items_per_collection = 40
+    # PDS_REGISTRY_ settings, by name without the prefix, e.g. {"stream_chunk_size": 10}
+    settings: Dict[str, Any] = {}
+
+    async def asyncSetUp(self):
+        self.documents = synthetic_registry(self.collections, self.items_per_collection, seed=0)
+        self.registry = FakeAsyncOpenSearch(self.documents)
+        environment = {f"PDS_REGISTRY_{name.upper()}": str(value) for name, value in self.settings.items()}
+        with mock.patch.dict(os.environ, environment):
+            self.database = PDSDatabaseLogic()
+        self.database.client = self.registry
+
+        # the application, its client and its extensions all use the database logic of the test
+        for target, attribute in (
+                (app_module, "database_logic"),
+                (app_module.client, "database"),
+                (app_module.filter_extension.client, "database"),
+                (app_module.aggregation_extension.client, "database"),
+        ):
+            patcher = mock.patch.object(target, attribute, self.database)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://testserver")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.database.collection_cache.stop()
+        await self.database.catalog_cache.stop()
+
+    def collection_ids(self) -> List[str]:
+        return sorted(k for k, v in self.documents.items() if v["product_class"] == "Product_Collection")
+
+    def item_ids(self, collection_id: Optional[str] = None) -> List[str]:
+        return sorted(
+            k for k, v in self.documents.items()
+            if v["product_class"] == "Product_Observational"
+            and (collection_id is None or v["ops:Provenance/ops:parent_collection_identifier"][0] == collection_id)
+        )
+
+    async def get_json(self, path: str, **kwargs) -> dict:
+        response = await self.client.get(path, **kwargs)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    async def page_through(self, path: str, body: Optional[dict] = None, params: Optional[dict] = None) -> List[dict]:
+        """All the pages of a search, following its next links, with a POST request if `body` is given."""
+        if body is not None:
+            response = await self.client.post(path, json=body)
+        else:
+            response = await self.client.get(path, params=params)
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, 200, response.text)
+            page = response.json()
+            pages.append(page)
+            next_link = next((link for link in page["links"] if link["rel"] == "next"), None)
+            if next_link is None:
+                return pages
+            if next_link.get("method") == "POST":
+                response = await self.client.post(next_link["href"], json=next_link["body"])
+            else:
+                response = await self.client.get(next_link["href"])
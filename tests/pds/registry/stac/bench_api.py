@@ -0,0 +1,163 @@
+"""Offline benchmark of the STAC API, served in-process from synthetic registry documents.
+
+The API application is driven through its ASGI interface, with the registry client replaced by the
+in-process stand-in of fake_opensearch.py, so that no network nor OpenSearch cluster is needed. Each scenario
+sends requests with a bounded concurrency and reports its throughput and latency percentiles:
+
+    python tests/pds/registry/stac/bench_api.py --collections 50 --items-per-collection 2000 --json results.json
+
+The settings of the API are read from the environment as usual, e.g. PDS_REGISTRY_RESULT_CACHE_BACKEND=off
+to benchmark without the search result cache.
+"""
+import argparse
+import asyncio
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Callable, Dict, List
+
+import httpx
+import orjson
+
+from fake_opensearch import FakeAsyncOpenSearch
+from fake_opensearch import synthetic_registry
+
+from pds.registry.stac.app import app
+from pds.registry.stac.app import database_logic
+
+
+def _datetime_interval(rng: random.Random) -> str:
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc) + timedelta(days=rng.randrange(0, 9000))
+    end = start + timedelta(days=rng.randrange(1, 720))
+    return f"{start:%Y-%m-%dT%H:%M:%SZ}/{end:%Y-%m-%dT%H:%M:%SZ}"
+
+
+def scenarios(documents: Dict[str, dict], page_size: int) -> Dict[str, Callable[[random.Random], str]]:
+    """Paths requested by each scenario, drawn at random so that the requests are not all identical."""
+    collection_ids = [k for k, v in documents.items() if v["product_class"] == "Product_Collection"]
+    items = [(v["ops:Provenance/ops:parent_collection_identifier"][0], k)
+             for k, v in documents.items() if v["product_class"] == "Product_Observational"]
+    return {
+        "item_search": lambda rng: (
+            f"/search?collections={rng.choice(collection_ids)}&limit={page_size}&datetime={_datetime_interval(rng)}"
+        ),
+        "item_get": lambda rng: "/collections/{}/items/{}".format(*rng.choice(items)),
+        "collection_list": lambda rng: f"/collections?limit={min(page_size, 100)}",
+    }
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        path: Callable[[random.Random], str],
+        requests: int,
+        concurrency: int,
+        rng: random.Random,
+) -> dict:
+    paths = [path(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+    next_request = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_request:
+            start = time.perf_counter()
+            response = await client.get(paths[i])
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": requests / elapsed,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies) * 1000,
+            "p50": percentile(50),
+            "p90": percentile(90),
+            "p99": percentile(99),
+            "max": latencies[-1] * 1000,
+        },
+    }
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    documents = synthetic_registry(args.collections, args.items_per_collection, seed=args.seed)
+    fake = FakeAsyncOpenSearch(documents, latency=args.latency_ms / 1000)
+    database_logic.client = fake
+
+    database_logic.collection_cache.start()
+    try:
+        await database_logic.collection_cache.wait_ready(timeout=60)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = {}
+            for name, path in scenarios(documents, args.page_size).items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                rng = random.Random(args.seed)
+                if args.warmup:
+                    await run_scenario(client, path, args.warmup, args.concurrency, rng)
+                registry_requests = fake.requests
+                results[name] = await run_scenario(client, path, args.requests, args.concurrency, rng)
+                results[name]["registry_requests"] = fake.requests - registry_requests
+    finally:
+        await database_logic.collection_cache.stop()
+
+    return {
+        "benchmark": "api",
+        "parameters": vars(args) | {"documents": len(documents)},
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", type=int, default=20, help="number of synthetic collections")
+    parser.add_argument("--items-per-collection", type=int, default=1000, help="number of products per collection")
+    parser.add_argument("--requests", type=int, default=500, help="number of requests measured per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="number of requests sent before measuring")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of requests in flight")
+    parser.add_argument("--page-size", type=int, default=100, help="limit of the item searches")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay of each registry request")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data and of the requests")
+    parser.add_argument("--scenarios", nargs="*", help="scenarios run, all by default")
+    parser.add_argument("--json", help="write the results to this file as JSON, - for the standard output")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args))
+
+    for name, result in report["results"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:16} {result['throughput_rps']:9.1f} req/s"
+            f" p50 {latency['p50']:8.2f} ms p99 {latency['p99']:8.2f} ms"
+            f" errors {result['errors']} registry requests {result['registry_requests']}",
+            file=sys.stderr if args.json == "-" else sys.stdout,
+        )
+    if args.json == "-":
+        sys.stdout.write(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode() + "\n")
+    elif args.json:
+        with open(args.json, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+
+
+if __name__ == "__main__":
+    main()
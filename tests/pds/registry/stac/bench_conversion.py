@@ -0,0 +1,195 @@
+"""Micro-benchmark of the conversion of registry products into STAC items.
+
+Compares the conversion functions of the types module, one product at a time and in batch, with the former conversion
+done by the STACObject/Item classes, on synthetic pages of products:
+
+    python tests/pds/registry/stac/bench_conversion.py --page-size 10000 --repeat 5
+"""
+import argparse
+import random
+import timeit
+
+from stac_pydantic.version import STAC_VERSION
+
+from pds.registry.stac.types import item_to_stac
+from pds.registry.stac.types import items_to_stac
+
+
+class LegacySTACObject:
+    """Former base STAC Object model, kept verbatim as the baseline of the benchmark."""
+
+    MAIN_API_BASE_URL = "http://pds.nasa.gov/api/search/1/"
+
+    def __init__(self, source: dict, ancillary: dict = None):
+        self.stac_vervion = STAC_VERSION
+        self.licence = "CC0-1.0"
+        self.id = source.get("lidvid")
+        self.title = source.get("pds:Identification_Area/pds:title", None)[0]
+        self.description = source.get("pds:Citation_Information/pds:description", [None])[0]
+        keywords = []
+        keywords.extend(source.get("pds:Observing_System/pds:name", []))
+        keywords.extend(source.get("pds:Target_Identification/pds:name", []))
+        keywords.extend(source.get("pds:Investigation_Area/pds:name", []))
+        keywords.extend(source.get("pds:Observing_System_Component/pds:name", []))
+        keywords.extend(source.get("pds:Science_Facets/pds:domain", []))
+        self.keywords = keywords
+
+        main_api_prefix = LegacySTACObject.MAIN_API_BASE_URL + "products/"
+        self.investigation = main_api_prefix + source.get("ref_lid_investigation")[0] if "ref_lid_investigation" in source else None
+        self.platform = main_api_prefix + source.get("ref_lid_platform")[0] if "ref_lid_platform" in source else None
+        self.instrument = main_api_prefix + source.get("ref_lid_instrument")[0] if "ref_lid_instrument" in source else None
+
+        providers = []
+        discipline_node = {}
+        discipline_node["name"] = source["ops:Harvest_Info/ops:node_name"][0]
+        discipline_node["role"] = "custodian"
+        discipline_node["url"] = "https://pds.nasa.gov/"
+        providers.append(discipline_node)
+
+        if providers:
+            self.providers = providers
+
+        self.temporal_interval = None
+        if "pds:Time_Coordinates/pds:start_date_time" in source or "pds:Time_Coordinates/pds:stop_date_time" in source:
+            self.temporal_interval = [
+                source.get("pds:Time_Coordinates/pds:start_date_time", [None])[0],
+                source.get("pds:Time_Coordinates/pds:stop_date_time", [None])[0]
+            ]
+
+    def to_stac(self):
+        return dict(
+            stac_version=self.stac_vervion,
+            license=self.licence,
+            id=self.id,
+        )
+
+
+class LegacyItem(LegacySTACObject):
+    """Former STAC Item model, kept verbatim as the baseline of the benchmark."""
+
+    def __init__(self, source: dict, ancillary: dict = None):
+        super().__init__(source)
+        self.type = "Collection"
+        self.collection = source.get("ops:Provenance/ops:parent_collection_identifier", [None])[0]
+
+        self.geometry = source.get("bbox_polygon", None)
+
+        self.bbox = None
+        polygon = self.geometry["coordinates"][0] if self.geometry else None
+        if polygon:
+            # west, south, east, north: the polygon starts at the south west corner and goes east then north
+            self.bbox = [
+                polygon[0][0],
+                polygon[0][1],
+                polygon[1][0],
+                polygon[2][1],
+            ]
+
+        self.assets = {}
+        if "ops:Data_File_Info/ops:file_ref" in source:
+            assets = {}
+            file_refs = source["ops:Data_File_Info/ops:file_ref"]
+            for idx, file_ref in enumerate(file_refs):
+                asset_key = f"data_file_{idx+1}"
+                assets[asset_key] = {
+                    "href": file_ref,
+                    "title": source.get("ops:Data_File_Info/ops:file_name", ["Data File"])[0],
+                    "type": source.get("ops:Data_File_Info/ops:mime_type", ["application/octet-stream"])[0],
+                }
+            self.assets = assets
+
+    def to_stac(self):
+        item = super().to_stac()
+        item["type"] = "Feature"
+        item["collection"] = self.collection
+
+        item["geometry"] = self.geometry
+
+        item["bbox"] = self.bbox
+
+        item["assets"] = self.assets
+
+
+        if self.title:
+            item["title"] = self.title
+
+        if self.description:
+            item["description"] = self.description
+
+        if self.keywords:
+            item["keywords"] = self.keywords
+
+        if self.providers:
+            item["providers"] = self.providers
+
+        properties = {}
+        if self.temporal_interval:
+            if self.temporal_interval[0]:
+                properties["start_datetime"] = self.temporal_interval[0]
+                properties["datetime"] = self.temporal_interval[0]
+
+            if self.temporal_interval[1]:
+                properties["end_datetime"] = self.temporal_interval[1]
+                if not "datetime" in properties:
+                    properties["datetime"] = self.temporal_interval[1]
+
+        if properties:
+            item["properties"] = properties
+
+        return item
+
+
+def synthetic_product(i: int, rng: random.Random) -> dict:
+    """A registry product with the fields read by the item conversion."""
+    west, south = rng.uniform(-180, 170), rng.uniform(-90, 80)
+    east, north = west + rng.uniform(0, 10), south + rng.uniform(0, 10)
+    product = {
+        "lidvid": f"urn:nasa:pds:bench:data:product_{i:08d}::1.0",
+        "ops:Provenance/ops:parent_collection_identifier": ["urn:nasa:pds:bench:data::1.0"],
+        "pds:Identification_Area/pds:title": [f"Product {i}"],
+        "pds:Observing_System/pds:name": ["Bench Observing System"],
+        "pds:Target_Identification/pds:name": ["Mars"],
+        "pds:Investigation_Area/pds:name": ["Bench Mission"],
+        "ops:Harvest_Info/ops:node_name": ["PDS_GEO"],
+        "pds:Time_Coordinates/pds:start_date_time": ["2020-01-01T00:00:00Z"],
+        "ops:Data_File_Info/ops:file_ref": [f"https://pds.nasa.gov/data/bench/product_{i:08d}.dat"],
+        "ops:Data_File_Info/ops:file_name": [f"product_{i:08d}.dat"],
+        "ops:Data_File_Info/ops:mime_type": ["application/octet-stream"],
+        "bbox_polygon": {
+            "type": "Polygon",
+            "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]],
+        },
+    }
+    if i % 2:
+        product["pds:Citation_Information/pds:description"] = [f"Description of the product {i}"]
+        product["pds:Time_Coordinates/pds:stop_date_time"] = ["2020-01-02T00:00:00Z"]
+    return product
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=10000, help="number of products per page")
+    parser.add_argument("--repeat", type=int, default=5, help="number of conversions of the page, the best is reported")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    hits = [{"_source": synthetic_product(i, rng)} for i in range(args.page_size)]
+
+    baseline = [LegacyItem(hit["_source"]).to_stac() for hit in hits]
+    assert [item_to_stac(hit["_source"]) for hit in hits] == baseline
+    assert items_to_stac(hit["_source"] for hit in hits) == baseline
+
+    candidates = {
+        "legacy Item(...).to_stac()": lambda: [LegacyItem(hit["_source"]).to_stac() for hit in hits],
+        "item_to_stac": lambda: [item_to_stac(hit["_source"]) for hit in hits],
+        "items_to_stac (batch)": lambda: items_to_stac(hit["_source"] for hit in hits),
+    }
+    reference = None
+    for name, convert in candidates.items():
+        best = min(timeit.repeat(convert, number=1, repeat=args.repeat))
+        reference = reference or best
+        print(f"{name:30} {best * 1000:9.2f} ms/page {best / args.page_size * 1e6:7.2f} us/item x{reference / best:.2f}")
+
+
+if __name__ == "__main__":
+    main()
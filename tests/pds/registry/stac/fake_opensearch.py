@@ -0,0 +1,627 @@
+"""In-process stand-in of the registry OpenSearch client, serving synthetic registry documents.
+
+`FakeAsyncOpenSearch` implements the subset of the `AsyncOpenSearch` API used by `PDSDatabaseLogic`: searches
+with the bool, term(s), ids, exists, range, wildcard, regexp, geo_shape (bounding box intersection) and antimeridian
+script queries, sorts with `search_after` and points in time, the collection extents and harvest watermark
+aggregations, the terms, date histogram and geotile grid aggregations, counts, gets and multi gets, with source
+filtering. The responses are encoded and decoded as JSON, as the real client does, and optionally delayed to
+model the network.
+
+`synthetic_registry` generates the documents: collections of observational products with realistic field
+shapes (bounding coordinates, `bbox_polygon`, data file information, time coordinates, harvest dates).
+"""
+import asyncio
+import fnmatch
+import itertools
+import math
+import random
+import re
+import time
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from opensearchpy import exceptions
+
+COLLECTION_FIELD = "ops:Provenance/ops:parent_collection_identifier"
+HARVEST_DATE_TIME = "ops:Harvest_Info/ops:harvest_date_time"
+BOUNDING_COORDINATES = "cart:Bounding_Coordinates/cart:{}_bounding_coordinate"
+
+_TARGETS = ["Mars", "Moon", "Jupiter", "Europa", "Titan", "Ceres"]
+_NODES = ["PDS_GEO", "PDS_IMG", "PDS_ATM", "PDS_PPI", "PDS_SBN", "PDS_RMS"]
+_DOMAINS = ["Surface", "Atmosphere", "Magnetosphere", "Interior"]
+_MIME_TYPES = ["application/octet-stream", "text/plain", "image/x-fits", "image/jpeg"]
+
+
+def _isoformat(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def synthetic_registry(
+        collections: int,
+        items_per_collection: int,
+        seed: int = 0,
+) -> Dict[str, dict]:
+    """Registry documents of `collections` collections of `items_per_collection` observational products each.
+
+    Each collection covers a region and a time span its products are drawn from; about one product in fifty
+    crosses the antimeridian, products have one to three data files and one in four has no stop date time.
+
+    Returns:
+        Dict[str, dict]: the documents by lidvid.
+    """
+    rng = random.Random(seed)
+    epoch = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    documents = {}
+    for c in range(collections):
+        bundle = f"urn:nasa:pds:bench_{c:04d}"
+        collection_id = f"{bundle}:data::1.0"
+        target = rng.choice(_TARGETS)
+        node = rng.choice(_NODES)
+        mission = f"Bench Mission {c % 7}"
+        instrument = f"Bench Instrument {c}"
+        west, south = rng.uniform(-180, 150), rng.uniform(-90, 60)
+        width, height = rng.uniform(5, 30), rng.uniform(5, 30)
+        start = epoch + timedelta(days=rng.uniform(0, 8000))
+        span = timedelta(days=rng.uniform(30, 1500))
+        harvest = epoch + timedelta(days=9000 + c)
+
+        documents[collection_id] = {
+            "lidvid": collection_id,
+            "product_class": "Product_Collection",
+            "pds:Identification_Area/pds:title": [f"Bench collection {c}"],
+            "pds:Citation_Information/pds:description": [f"Synthetic data collection {c} observing {target}"],
+            "pds:Observing_System/pds:name": [instrument],
+            "pds:Target_Identification/pds:name": [target],
+            "pds:Investigation_Area/pds:name": [mission],
+            "pds:Science_Facets/pds:domain": [rng.choice(_DOMAINS)],
+            "ops:Harvest_Info/ops:node_name": [node],
+            HARVEST_DATE_TIME: [_isoformat(harvest)],
+            "pds:Time_Coordinates/pds:start_date_time": [_isoformat(start)],
+            "pds:Time_Coordinates/pds:stop_date_time": [_isoformat(start + span)],
+        }
+
+        for i in range(items_per_collection):
+            lidvid = f"{bundle}:data:product_{i:08d}::1.0"
+            product_start = start + span * rng.random()
+            product_west = west + rng.uniform(0, width)
+            product_south = south + rng.uniform(0, height)
+            product_east = product_west + rng.uniform(0.01, 2)
+            product_north = min(product_south + rng.uniform(0.01, 2), 90)
+            if rng.random() < 0.02:
+                # crossing the antimeridian: the west bound is greater than the east bound
+                product_west, product_east = rng.uniform(178, 180), rng.uniform(-180, -178)
+                polygon_east = 180.0
+            else:
+                product_east = min(product_east, 180)
+                polygon_east = product_east
+            files = [f"product_{i:08d}_{f}.dat" for f in range(rng.randint(1, 3))]
+            product = {
+                "lidvid": lidvid,
+                "product_class": "Product_Observational",
+                COLLECTION_FIELD: [collection_id],
+                "pds:Identification_Area/pds:title": [f"Product {i} of collection {c}"],
+                "pds:Observing_System/pds:name": [instrument],
+                "pds:Observing_System_Component/pds:name": [instrument, f"{instrument} detector"],
+                "pds:Target_Identification/pds:name": [target],
+                "pds:Investigation_Area/pds:name": [mission],
+                "ref_lid_instrument": [f"urn:nasa:pds:context:instrument:bench.{c}"],
+                "ref_lid_investigation": [f"urn:nasa:pds:context:investigation:mission.bench_{c % 7}"],
+                "ops:Harvest_Info/ops:node_name": [node],
+                HARVEST_DATE_TIME: [_isoformat(harvest + timedelta(seconds=i))],
+                "pds:Time_Coordinates/pds:start_date_time": [_isoformat(product_start)],
+                BOUNDING_COORDINATES.format("west"): [product_west],
+                BOUNDING_COORDINATES.format("east"): [product_east],
+                BOUNDING_COORDINATES.format("south"): [product_south],
+                BOUNDING_COORDINATES.format("north"): [product_north],
+                "bbox_polygon": {
+                    "type": "Polygon",
+                    "coordinates": [[
+                        [product_west, product_south],
+                        [polygon_east, product_south],
+                        [polygon_east, product_north],
+                        [product_west, product_north],
+                        [product_west, product_south],
+                    ]],
+                },
+                "ops:Data_File_Info/ops:file_ref": [
+                    f"https://pds.nasa.gov/data/bench_{c:04d}/{name}" for name in files
+                ],
+                "ops:Data_File_Info/ops:file_name": files,
+                "ops:Data_File_Info/ops:file_size": [rng.randint(1_000, 50_000_000) for _ in files],
+                "ops:Data_File_Info/ops:mime_type": [rng.choice(_MIME_TYPES) for _ in files],
+                "ops:Data_File_Info/ops:md5_checksum": [f"{rng.getrandbits(128):032x}" for _ in files],
+            }
+            if rng.random() < 0.75:
+                product["pds:Time_Coordinates/pds:stop_date_time"] = [
+                    _isoformat(product_start + timedelta(seconds=rng.uniform(1, 86400)))
+                ]
+            if i % 3 == 0:
+                product["pds:Citation_Information/pds:description"] = [f"Observation {i} of {target}"]
+            documents[lidvid] = product
+    return documents
+
+
+def _values(document: dict, field: str) -> List[Any]:
+    value = document.get(field)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _tiles(document: dict, field: str, precision: int) -> List[str]:
+    """Keys of the map tiles, at the zoom level `precision`, the envelopes of the shapes of a field intersect."""
+    n = 2 ** precision
+
+    def column(longitude: float) -> int:
+        return min(int((longitude + 180) / 360 * n), n - 1)
+
+    def row(latitude: float) -> int:
+        latitude = math.radians(max(min(latitude, 85.0511287798), -85.0511287798))
+        return min(int((1 - math.asinh(math.tan(latitude)) / math.pi) / 2 * n), n - 1)
+
+    tiles = set()
+    for shape in _values(document, field):
+        west, south, east, north = _envelope(shape)
+        for x in range(column(west), column(east) + 1):
+            for y in range(row(north), row(south) + 1):
+                tiles.add(f"{precision}/{x}/{y}")
+    return sorted(tiles)
+
+
+def _truncate(value: datetime, interval: str) -> datetime:
+    """Start of the calendar interval of a date, in UTC."""
+    value = value.astimezone(timezone.utc)
+    if interval == "week":
+        return (value - timedelta(days=value.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "quarter":
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    units = ["year", "month", "day", "hour", "minute", "second"]
+    reset = {"month": 1, "day": 1, "hour": 0, "minute": 0, "second": 0}
+    return value.replace(microsecond=0, **{unit: reset[unit] for unit in units[units.index(interval) + 1:]})
+
+
+def _envelope(shape: dict) -> Tuple[float, float, float, float]:
+    """West, south, east and north bounds of the positions of a GeoJSON geometry."""
+
+    def positions(coordinates: Any) -> Iterable[List[float]]:
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            yield coordinates
+        else:
+            for member in coordinates:
+                yield from positions(member)
+
+    if "geometries" in shape:
+        envelopes = [_envelope(member) for member in shape["geometries"]]
+        return (
+            min(e[0] for e in envelopes), min(e[1] for e in envelopes),
+            max(e[2] for e in envelopes), max(e[3] for e in envelopes),
+        )
+    points = list(positions(shape["coordinates"]))
+    return (
+        min(p[0] for p in points), min(p[1] for p in points),
+        max(p[0] for p in points), max(p[1] for p in points),
+    )
+
+
+def _shape_parts(shape: dict) -> List[dict]:
+    if shape["type"].lower() == "multipolygon":
+        return [{"type": "polygon", "coordinates": polygon} for polygon in shape["coordinates"]]
+    if shape["type"].lower() == "geometrycollection":
+        return [part for member in shape["geometries"] for part in _shape_parts(member)]
+    return [shape]
+
+
+def _intersects(a: Tuple[float, ...], b: Tuple[float, ...]) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _range_matches(values: List[Any], bounds: Dict[str, Any]) -> bool:
+    for value in values:
+        if (
+                ("gte" not in bounds or value >= bounds["gte"])
+                and ("gt" not in bounds or value > bounds["gt"])
+                and ("lte" not in bounds or value <= bounds["lte"])
+                and ("lt" not in bounds or value < bounds["lt"])
+        ):
+            return True
+    return False
+
+
+def compile_query(query: Optional[dict]) -> Callable[[dict], bool]:
+    """Predicate on the documents of an OpenSearch query, for the clauses used by the registry backend.
+
+    The geo_shape queries compare the bounding boxes of the shapes, which is exact for the rectangles the
+    backend searches with; the relations other than disjoint are taken as intersects.
+
+    Raises:
+        NotImplementedError: if the query has clauses the stand-in does not support.
+    """
+    if not query:
+        return lambda document: True
+    (kind, clause), = query.items()
+
+    if kind == "match_all":
+        return lambda document: True
+    if kind == "bool":
+        def clauses(occurrence: str) -> List[dict]:
+            queries = clause.get(occurrence, [])
+            return queries if isinstance(queries, list) else [queries]
+
+        must = [compile_query(q) for q in [*clauses("filter"), *clauses("must")]]
+        must_not = [compile_query(q) for q in clauses("must_not")]
+        should = [compile_query(q) for q in clauses("should")]
+        minimum = clause.get("minimum_should_match", 1 if should and not must else 0)
+
+        def matches(document: dict) -> bool:
+            return (
+                all(m(document) for m in must)
+                and not any(m(document) for m in must_not)
+                and (not minimum or sum(1 for m in should if m(document)) >= minimum)
+            )
+
+        return matches
+    if kind == "term":
+        (field, value), = clause.items()
+        value = value["value"] if isinstance(value, dict) else value
+        return lambda document: value in _values(document, field)
+    if kind == "terms":
+        (field, values), = clause.items()
+        values = set(values)
+        return lambda document: any(v in values for v in _values(document, field))
+    if kind == "ids":
+        ids = set(clause["values"])
+        return lambda document: document.get("lidvid") in ids
+    if kind == "exists":
+        field = clause["field"]
+        return lambda document: bool(_values(document, field))
+    if kind == "range":
+        (field, bounds), = clause.items()
+        return lambda document: _range_matches(_values(document, field), bounds)
+    if kind == "geo_shape":
+        (field, spec), = clause.items()
+        envelopes = [_envelope(part) for part in _shape_parts(spec["shape"])]
+        disjoint = spec.get("relation") == "disjoint"
+        return lambda document: bool(document.get(field)) and disjoint != any(
+            _intersects(_envelope(document[field]), envelope) for envelope in envelopes
+        )
+    if kind == "wildcard":
+        (field, spec), = clause.items()
+        pattern = spec["value"].lower() if spec.get("case_insensitive") else spec["value"]
+        return lambda document: any(
+            fnmatch.fnmatchcase(str(v).lower() if spec.get("case_insensitive") else str(v), pattern)
+            for v in _values(document, field)
+        )
+    if kind == "regexp":
+        # the Lucene regular expressions are anchored; those of the backend use no syntax Python reads otherwise
+        (field, spec), = clause.items()
+        flags = re.DOTALL | (re.IGNORECASE if spec.get("case_insensitive") else 0)
+        expression = re.compile(spec["value"], flags)
+        return lambda document: any(expression.fullmatch(str(v)) for v in _values(document, field))
+    if kind == "multi_match":
+        # the fields of the registry are keywords: the whole query matches whole values, case sensitively
+        fields = clause["fields"]
+        return lambda document: any(str(v) == clause["query"] for field in fields for v in _values(document, field))
+    if kind == "script":
+        # the only script of the backend: products crossing the antimeridian
+        west, east = BOUNDING_COORDINATES.format("west"), BOUNDING_COORDINATES.format("east")
+        return lambda document: bool(document.get(west) and document.get(east)) and document[west][0] > document[east][0]
+    raise NotImplementedError(f"Query {kind} is not supported by the stand-in")
+
+
+class _SortKey:
+    """Sort values of a hit, ordered by the sort clauses, missing values last."""
+
+    __slots__ = ("values", "orders")
+
+    def __init__(self, values: List[Any], orders: List[bool]):
+        self.values = values
+        self.orders = orders
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        return _compare(self.values, other.values, self.orders) < 0
+
+
+def _compare(a: List[Any], b: List[Any], descending: List[bool]) -> int:
+    for x, y, desc in zip(a, b, descending):
+        if x == y:
+            continue
+        if x is None:
+            return 1
+        if y is None:
+            return -1
+        result = -1 if x < y else 1
+        return -result if desc else result
+    return 0
+
+
+class FakeAsyncOpenSearch:
+    """Stand-in of `AsyncOpenSearch` serving registry documents from memory.
+
+    The documents matching each distinct query, and their sorts, are computed once and kept, as the caches of a real cluster
+    would, so that the cost of a search is mostly that of its page.
+
+    Args:
+        documents (Dict[str, dict]): the registry documents, by lidvid.
+        latency (float): seconds each request is delayed by, to model the network and the cluster.
+    """
+
+    def __init__(self, documents: Dict[str, dict], latency: float = 0.0):
+        self.documents = documents
+        self.latency = latency
+        self.requests = 0
+        self._matches: Dict[bytes, List[Tuple[str, dict]]] = {}
+        self._hits: Dict[bytes, Tuple[List[dict], List[_SortKey]]] = {}
+        self._pits = set()
+        self._pit_ids = itertools.count()
+        self._aggregations: Dict[bytes, dict] = {}
+        # the documents of each collection, the candidates of the searches filtered by collection
+        self._by_collection: Dict[str, Dict[str, dict]] = {}
+        for document_id, document in documents.items():
+            for collection_id in _values(document, COLLECTION_FIELD):
+                self._by_collection.setdefault(collection_id, {})[document_id] = document
+
+    @property
+    def open_pits(self) -> int:
+        """Number of points in time opened and not deleted yet."""
+        return len(self._pits)
+
+    def index(self, document: dict):
+        """Add or replace a document, as a harvest followed by a refresh of the index would."""
+        self.documents[document["lidvid"]] = document
+        for collection_id in _values(document, COLLECTION_FIELD):
+            self._by_collection.setdefault(collection_id, {})[document["lidvid"]] = document
+        self._matches.clear()
+        self._hits.clear()
+        self._aggregations.clear()
+
+    async def __respond(self, response: dict, started: float) -> dict:
+        self.requests += 1
+        if "took" in response:
+            response["took"] = int((time.perf_counter() - started) * 1000)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        # the client decodes a fresh response for each request
+        return orjson.loads(orjson.dumps(response))
+
+    @staticmethod
+    def __filter_source(source: dict, includes: Optional[List[str]]) -> dict:
+        if not includes:
+            return source
+        fields = set(includes)
+        patterns = [pattern for pattern in includes if "*" in pattern]
+        return {
+            field: value for field, value in source.items()
+            if field in fields or any(fnmatch.fnmatchcase(field, pattern) for pattern in patterns)
+        }
+
+    @staticmethod
+    def __includes(body: dict, kwargs: dict) -> Optional[List[str]]:
+        if "_source_includes" in kwargs:
+            return list(kwargs["_source_includes"])
+        source = body.get("_source")
+        if isinstance(source, dict):
+            return source.get("includes")
+        if isinstance(source, list):
+            return source
+        return None
+
+    def __candidates(self, query: Optional[dict]) -> Dict[str, dict]:
+        """The documents a query can match, narrowed by its filter on the collections if any."""
+        for clause in (query or {}).get("bool", {}).get("filter", []):
+            if COLLECTION_FIELD in clause.get("terms", {}):
+                candidates = {}
+                for collection_id in clause["terms"][COLLECTION_FIELD]:
+                    candidates.update(self._by_collection.get(collection_id, {}))
+                return candidates
+        return self.documents
+
+    def __matching(self, query: Optional[dict]) -> List[Tuple[str, dict]]:
+        key = orjson.dumps(query, option=orjson.OPT_SORT_KEYS)
+        if key not in self._matches:
+            matches = compile_query(query)
+            self._matches[key] = [
+                (document_id, document) for document_id, document in self.__candidates(query).items() if matches(document)
+            ]
+        return self._matches[key]
+
+    def __sorted_hits(self, query: Optional[dict], sort: List[dict]) -> Tuple[List[dict], List[_SortKey]]:
+        key = orjson.dumps([query, sort], option=orjson.OPT_SORT_KEYS)
+        if key not in self._hits:
+            fields = [next(iter(clause)) for clause in sort]
+            descending = [
+                (value if isinstance(value, str) else value.get("order", "asc")) == "desc"
+                for clause in sort for value in clause.values()
+            ]
+            hits = [
+                {"_id": document_id, "_source": document, "sort": [(_values(document, f) or [None])[0] for f in fields]}
+                for document_id, document in self.__matching(query)
+            ]
+            # stable sorts from the last sort field to the first, missing values last
+            for j in reversed(range(len(fields))):
+                present = [hit for hit in hits if hit["sort"][j] is not None]
+                present.sort(key=lambda hit: hit["sort"][j], reverse=descending[j])
+                hits = present + [hit for hit in hits if hit["sort"][j] is None]
+            self._hits[key] = hits, [_SortKey(hit["sort"], descending) for hit in hits]
+        return self._hits[key]
+
+    async def search(self, body: Optional[dict] = None, index: Optional[str] = None, size: Optional[int] = None, **kwargs):
+        started = time.perf_counter()
+        body = body or {}
+        if "pit" in body:
+            if index is not None:
+                raise exceptions.RequestError(400, "illegal_argument_exception", "index with a point in time")
+            if body["pit"]["id"] not in self._pits:
+                raise exceptions.NotFoundError(404, "search_context_missing_exception", {})
+        size = body.get("size", 10) if size is None else size
+
+        if "aggs" in body or "aggregations" in body:
+            return await self.__respond(
+                {"took": 0, "hits": {"hits": []}, "aggregations": self.__aggregate(body)}, started
+            )
+
+        hits, keys = self.__sorted_hits(body.get("query"), body.get("sort") or [{"_id": {"order": "asc"}}])
+        start = 0
+        if body.get("search_after") is not None:
+            start = bisect_right(keys, _SortKey(body["search_after"], keys[0].orders)) if keys else 0
+        includes = self.__includes(body, kwargs)
+        page = [
+            {"_id": hit["_id"], "_source": self.__filter_source(hit["_source"], includes), "sort": hit["sort"]}
+            for hit in hits[start:start + size]
+        ]
+        response = {"took": 0, "hits": {"hits": page}}
+        track_total_hits = body.get("track_total_hits", 10000)
+        if track_total_hits is not False:
+            limit = len(hits) if track_total_hits is True else track_total_hits
+            response["hits"]["total"] = (
+                {"value": len(hits), "relation": "eq"} if len(hits) <= limit else {"value": limit, "relation": "gte"}
+            )
+        if "pit" in body:
+            response["pit_id"] = body["pit"]["id"]
+        return await self.__respond(response, started)
+
+    def __aggregate(self, body: dict) -> dict:
+        key = orjson.dumps(body, option=orjson.OPT_SORT_KEYS)
+        if key in self._aggregations:
+            return self._aggregations[key]
+        aggregations = body.get("aggs") or body["aggregations"]
+        matches = compile_query(body.get("query"))
+        documents = [document for document in self.documents.values() if matches(document)]
+        result = {}
+        for name, aggregation in aggregations.items():
+            if "composite" in aggregation:
+                result[name] = self.__composite(documents, aggregation)
+            elif "terms" in aggregation:
+                counts = Counter(v for document in documents for v in set(_values(document, aggregation["terms"]["field"])))
+                result[name] = self.__ranked(counts, aggregation["terms"].get("size", 10))
+            elif "date_histogram" in aggregation:
+                result[name] = self.__date_histogram(documents, aggregation["date_histogram"])
+            elif "geotile_grid" in aggregation:
+                grid = aggregation["geotile_grid"]
+                counts = Counter(
+                    tile for document in documents for tile in _tiles(document, grid["field"], grid.get("precision", 7))
+                )
+                result[name] = self.__ranked(counts, grid.get("size", 10000))
+            else:
+                result[name] = self.__metrics(documents, {name: aggregation})[name]
+        self._aggregations[key] = result
+        return result
+
+    @staticmethod
+    def __ranked(counts: Counter, size: int) -> dict:
+        """The buckets of the most frequent keys, with the count of the documents left out."""
+        ranked = sorted(counts.items(), key=lambda bucket: (-bucket[1], bucket[0]))
+        return {
+            "buckets": [{"key": k, "doc_count": n} for k, n in ranked[:size]],
+            "sum_other_doc_count": sum(n for _, n in ranked[size:]),
+        }
+
+    @staticmethod
+    def __date_histogram(documents: List[dict], histogram: dict) -> dict:
+        """A date histogram by calendar interval; unlike OpenSearch, the stand-in leaves out the empty buckets."""
+        interval = histogram.get("calendar_interval", "month")
+        counts = Counter(
+            _truncate(datetime.fromisoformat(v.replace("Z", "+00:00")), interval)
+            for document in documents
+            for v in _values(document, histogram["field"])[:1]
+        )
+        return {
+            "buckets": [
+                {
+                    "key": int(start.timestamp() * 1000),
+                    "key_as_string": start.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                    "doc_count": counts[start],
+                }
+                for start in sorted(counts)
+            ]
+        }
+
+    @staticmethod
+    def __metrics(products: List[dict], aggregations: dict) -> dict:
+        """The min, max, value count and filter sub-aggregations of a bucket of products."""
+        result: Dict[str, Any] = {"doc_count": len(products)}
+        for name, aggregation in aggregations.items():
+            if "value_count" in aggregation:
+                field = aggregation["value_count"]["field"]
+                result[name] = {"value": sum(len(_values(product, field)) for product in products)}
+            elif "max" in aggregation or "min" in aggregation:
+                function = max if "max" in aggregation else min
+                field = aggregation["max" if "max" in aggregation else "min"]["field"]
+                values = [v for product in products for v in _values(product, field)]
+                result[name] = {"value": function(values) if values else None}
+                if values and isinstance(result[name]["value"], str):
+                    result[name]["value_as_string"] = result[name]["value"]
+            elif "filter" in aggregation:
+                matches = compile_query(aggregation["filter"])
+                result[name] = FakeAsyncOpenSearch.__metrics(
+                    [p for p in products if matches(p)], aggregation.get("aggs", {})
+                )
+            else:
+                raise NotImplementedError(f"Aggregation {name} is not supported by the stand-in")
+        return result
+
+    @staticmethod
+    def __composite(documents: List[dict], aggregation: dict) -> dict:
+        """A composite aggregation over terms sources, with min, max and filter sub-aggregations."""
+        composite = aggregation["composite"]
+        sources = [(name, source["terms"]["field"]) for entry in composite["sources"] for name, source in entry.items()]
+
+        groups: Dict[Tuple, List[dict]] = {}
+        for document in documents:
+            for key in itertools.product(*(set(_values(document, field)) for _, field in sources)):
+                groups.setdefault(key, []).append(document)
+
+        keys = sorted(groups)
+        if "after" in composite:
+            after = tuple(composite["after"][name] for name, _ in sources)
+            keys = [k for k in keys if k > after]
+        buckets = []
+        for key in keys[:composite["size"]]:
+            bucket = FakeAsyncOpenSearch.__metrics(groups[key], aggregation.get("aggs", {}))
+            bucket["key"] = {name: value for (name, _), value in zip(sources, key)}
+            buckets.append(bucket)
+        result = {"buckets": buckets}
+        if buckets:
+            result["after_key"] = buckets[-1]["key"]
+        return result
+
+    async def count(self, body: Optional[dict] = None, index: Optional[str] = None, **kwargs):
+        started = time.perf_counter()
+        return await self.__respond({"count": len(self.__matching((body or {}).get("query")))}, started)
+
+    async def get(self, index: str, id: str, **kwargs):
+        started = time.perf_counter()
+        if id not in self.documents:
+            await self.__respond({}, started)
+            raise exceptions.NotFoundError(404, "not_found", {"_id": id, "found": False})
+        source = self.__filter_source(self.documents[id], kwargs.get("_source_includes"))
+        return await self.__respond({"_index": index, "_id": id, "found": True, "_source": source}, started)
+
+    async def mget(self, body: dict, index: Optional[str] = None, **kwargs):
+        started = time.perf_counter()
+        includes = kwargs.get("_source_includes")
+        docs = [
+            {"_id": i, "found": True, "_source": self.__filter_source(self.documents[i], includes)}
+            if i in self.documents else {"_id": i, "found": False}
+            for i in body["ids"]
+        ]
+        return await self.__respond({"docs": docs}, started)
+
+    async def create_pit(self, index: str, params: Optional[dict] = None, **kwargs):
+        started = time.perf_counter()
+        pit_id = f"pit-{next(self._pit_ids)}"
+        self._pits.add(pit_id)
+        return await self.__respond({"pit_id": pit_id}, started)
+
+    async def delete_pit(self, body: Optional[dict] = None, **kwargs):
+        started = time.perf_counter()
+        for pit_id in (body or {}).get("pit_id", []):
+            self._pits.discard(pit_id)
+        return await self.__respond({"pits": []}, started)
+
+    async def close(self):
+        pass
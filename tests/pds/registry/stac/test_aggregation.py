@@ -0,0 +1,51 @@
+import unittest
+
+from .api_test_case import APITestCase
+
+_COLLECTION = "ops:Provenance/ops:parent_collection_identifier"
+
+
+def _aggregations(response: dict) -> dict:
+    return {aggregation["name"]: aggregation for aggregation in response["aggregations"]}
+
+
+class AggregationTests(APITestCase):
+    """The aggregations of the items are available on the whole catalog and on each collection."""
+
+    async def test_aggregations(self):
+        names = set(_aggregations(await self.get_json("/aggregations")))
+        self.assertIn("total_count", names)
+        self.assertIn("collection_frequency", names)
+        collection_id = self.collection_ids()[0]
+        page = await self.get_json(f"/collections/{collection_id}/aggregations")
+        self.assertEqual(set(_aggregations(page)), names)
+
+    async def test_aggregate_cold(self):
+        # the collection cache is not loaded yet: no collection is pruned
+        self.assertFalse(self.database.collection_cache.ready)
+        page = await self.get_json("/aggregate", params={"aggregations": "total_count"})
+        self.assertEqual(_aggregations(page)["total_count"]["value"], len(self.item_ids()))
+
+    async def test_aggregate(self):
+        await self.database.collection_cache.wait_ready()
+        page = await self.get_json("/aggregate", params={"aggregations": "total_count,collection_frequency"})
+        aggregations = _aggregations(page)
+        self.assertEqual(aggregations["total_count"]["value"], len(self.item_ids()))
+        self.assertEqual(
+            {bucket["key"]: bucket["frequency"] for bucket in aggregations["collection_frequency"]["buckets"]},
+            {collection_id: len(self.item_ids(collection_id)) for collection_id in self.collection_ids()},
+        )
+
+    async def test_aggregate_collection(self):
+        collection_id = self.collection_ids()[1]
+        expected = len(self.item_ids(collection_id))
+        page = await self.get_json(f"/collections/{collection_id}/aggregate", params={"aggregations": "total_count"})
+        self.assertEqual(_aggregations(page)["total_count"]["value"], expected)
+
+        response = await self.client.post("/aggregate", json={"collections": [collection_id], "aggregations": ["total_count"]})
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(_aggregations(response.json())["total_count"]["value"], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from urllib.parse import unquote
+
+from stac_pydantic.version import STAC_VERSION
+
+from .api_test_case import APITestCase
+
+_TARGET = "pds:Target_Identification/pds:name"
+_COLLECTION = "ops:Provenance/ops:parent_collection_identifier"
+
+
+class CatalogsTests(APITestCase):
+    """The target catalogs are paged by (target, collection) pairs and cached apart from the collections."""
+
+    settings = {"catalog_cache_page_size": 2}
+
+    def expected(self):
+        catalogs = {}
+        for item_id in self.item_ids():
+            document = self.documents[item_id]
+            catalogs.setdefault(document[_TARGET][0], set()).add(document[_COLLECTION][0])
+        return {target: sorted(collections) for target, collections in catalogs.items()}
+
+    async def test_catalogs(self):
+        expected = self.expected()
+        page = await self.get_json("/catalogs")
+        self.assertEqual(
+            {catalog["id"]: sorted(unquote(link["href"].rsplit("/", 1)[-1]) for link in catalog["links"] if link["rel"] == "child")
+             for catalog in page["catalogs"]},
+            expected,
+        )
+        self.assertEqual(sum(len(collections) for collections in expected.values()), self.collections)
+        self.assertTrue(all(catalog["stac_version"] == STAC_VERSION for catalog in page["catalogs"]))
+        catalog = await self.get_json(f"/catalogs/{next(iter(expected))}")
+        self.assertEqual(catalog["stac_version"], STAC_VERSION)
+
+    async def test_ready(self):
+        await self.database.catalog_cache.wait_ready()
+        await self.database.collection_cache.wait_ready()
+        status = await self.get_json("/ready")
+        self.assertEqual(status["collections"], self.collections)
+        self.assertEqual(status["catalogs"]["catalogs"], len(self.expected()))
+
+
+if __name__ == "__main__":
+    unittest.main()
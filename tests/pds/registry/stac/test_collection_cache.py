@@ -0,0 +1,150 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from opensearchpy import exceptions
+
+from pds.registry.stac.collection_cache import CacheState
+from pds.registry.stac.collection_cache import CollectionCache
+
+from .api_test_case import APITestCase
+
+
+class _Loader:
+    """Loader of a collection cache yielding the chunks it is given, pausing after each until it is resumed."""
+
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+        self.error = None
+        self.paused = asyncio.Event()
+        self.resumed = asyncio.Event()
+        self.pause = False
+
+    async def __call__(self):
+        for chunk in self.chunks:
+            yield chunk
+            if self.pause:
+                self.paused.set()
+                await self.resumed.wait()
+                self.resumed.clear()
+        if self.error is not None:
+            raise self.error
+
+
+class CollectionCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.loader = _Loader({"a": {"n": 1}}, {"b": {"n": 1}})
+        self.cache = CollectionCache(self.loader, refresh_interval=60, retry_interval=0.01)
+        self.builds = 0
+
+    async def asyncTearDown(self):
+        await self.cache.stop()
+
+    def derived(self):
+        def build(collections):
+            self.builds += 1
+            return sorted(collections)
+
+        return self.cache._derive("ids", build)
+
+    async def step(self, refresh: asyncio.Task):
+        """Let a paused refresh publish its next chunk."""
+        self.loader.paused.clear()
+        self.loader.resumed.set()
+        await asyncio.wait([refresh, asyncio.create_task(self.loader.paused.wait())], return_when=asyncio.FIRST_COMPLETED)
+
+    async def test_first_load_published_by_chunk(self):
+        self.loader.pause = True
+        refresh = asyncio.create_task(self.cache.refresh())
+        await self.loader.paused.wait()
+        self.assertEqual(self.cache.state, CacheState.LOADING)
+        self.assertFalse(self.cache.ready)
+        self.assertEqual(self.derived(), ["a"])
+        await self.step(refresh)
+        self.assertEqual(self.derived(), ["a", "b"])
+        await self.step(refresh)
+        self.assertTrue(await refresh)
+        self.assertEqual(self.cache.state, CacheState.READY)
+        self.assertEqual(self.derived(), ["a", "b"])
+        self.assertEqual(self.builds, 2)
+
+    async def test_refresh_published_at_once(self):
+        await self.cache.refresh()
+        self.assertEqual(self.derived(), ["a", "b"])
+
+        # b is removed from the registry, c is added
+        self.loader.chunks = [{"a": {"n": 2}}, {"c": {"n": 2}}]
+        self.loader.pause = True
+        refresh = asyncio.create_task(self.cache.refresh())
+        await self.loader.paused.wait()
+        await self.step(refresh)
+        # the previous content is served until the refresh completes, without rebuilding what derives from it
+        self.assertEqual(self.cache.get("a"), {"n": 1})
+        self.assertEqual(self.derived(), ["a", "b"])
+        self.assertEqual(self.builds, 1)
+        await self.step(refresh)
+        self.assertTrue(await refresh)
+
+        self.assertEqual(self.cache.get("a"), {"n": 2})
+        self.assertNotIn("b", self.cache)
+        self.assertEqual(self.derived(), ["a", "c"])
+        self.assertEqual(self.builds, 2)
+
+    async def test_stale(self):
+        await self.cache.refresh()
+        self.loader.chunks = [{"a": {"n": 2}}]
+        self.loader.error = ConnectionError("registry down")
+        self.assertFalse(await self.cache.refresh())
+
+        # the previous content is served as it was
+        self.assertEqual(self.cache.state, CacheState.STALE)
+        self.assertTrue(self.cache.ready)
+        self.assertEqual(self.cache.get("a"), {"n": 1})
+        self.assertEqual(self.derived(), ["a", "b"])
+        status = self.cache.status()
+        self.assertEqual(status["last_error"], "registry down")
+        self.assertEqual(status["collections"], 2)
+
+        self.loader.error = None
+        self.assertTrue(await self.cache.refresh())
+        self.assertEqual(self.cache.state, CacheState.READY)
+        self.assertIsNone(self.cache.status()["last_error"])
+
+    async def test_first_load_failed(self):
+        self.loader.error = ConnectionError("registry down")
+        self.assertFalse(await self.cache.refresh())
+        self.assertEqual(self.cache.state, CacheState.COLD)
+        self.assertFalse(self.cache.ready)
+        self.assertFalse(await self.cache.wait_ready(timeout=0))
+
+    async def test_retried(self):
+        self.loader.error = ConnectionError("registry down")
+        self.cache.start()
+        await asyncio.sleep(0)
+        self.assertFalse(self.cache.ready)
+        self.loader.error = None
+        # the failed load is retried after the retry interval
+        self.assertTrue(await self.cache.wait_ready(timeout=1))
+        self.assertEqual(sorted(self.cache.ids()), ["a", "b"])
+
+
+class StaleCollectionsTests(APITestCase):
+    """The collections are served from the cache while the registry is down."""
+
+    async def test_stale_collections(self):
+        await self.database.collection_cache.wait_ready()
+        expected = (await self.get_json("/collections"))["collections"]
+
+        async def down(*args, **kwargs):
+            raise exceptions.ConnectionError("N/A", "registry down", None)
+
+        with mock.patch.object(self.registry, "search", down):
+            self.assertFalse(await self.database.collection_cache.refresh())
+            self.assertEqual((await self.get_json("/collections"))["collections"], expected)
+            status = await self.get_json("/ready")
+        self.assertEqual(status["state"], "stale")
+        self.assertEqual(status["collections"], len(self.collection_ids()))
+
+
+if __name__ == "__main__":
+    unittest.main()
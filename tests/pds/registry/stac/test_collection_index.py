@@ -0,0 +1,127 @@
+import unittest
+from copy import deepcopy
+
+from pds.registry.stac.collection_index import CollectionIndex
+
+from .api_test_case import APITestCase
+
+
+def _collection(collection_id, bbox, interval, title="", keywords=()):
+    return {
+        "id": collection_id,
+        "title": title,
+        "description": "",
+        "keywords": list(keywords),
+        "extent": {"spatial": {"bbox": [bbox]}, "temporal": {"interval": [interval]}},
+    }
+
+
+def _ids(collections):
+    return [collection["id"] for collection in collections]
+
+
+class CollectionIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = CollectionIndex([
+            _collection("c", [170, -10, -170, 10], ["2010-01-01T00:00:00Z", "2011-01-01T00:00:00Z"], "Crossing"),
+            _collection("a", [0, 0, 10, 10], ["2000-01-01T00:00:00Z", "2001-01-01T00:00:00Z"], "Mars Odyssey THEMIS"),
+            _collection("b", [20, 20, 30, 30], ["2005-01-01T00:00:00Z", None], "Lunar orbiter", ["Moon"]),
+            _collection("d", [-50, -50, -40, -40], [None, None], "Mars Express"),
+        ])
+
+    def test_pages_by_id(self):
+        page, token, matched = self.index.search(limit=3)
+        self.assertEqual(_ids(page), ["a", "b", "c"])
+        self.assertEqual(matched, 4)
+        page, token, _ = self.index.search(limit=3, token=token)
+        self.assertEqual(_ids(page), ["d"])
+        self.assertIsNone(token)
+
+    def test_bbox(self):
+        self.assertEqual(_ids(self.index.search(limit=10, bbox=[5, 5, 25, 25])[0]), ["a", "b"])
+        # the extent of c crosses the antimeridian
+        self.assertEqual(_ids(self.index.search(limit=10, bbox=[-175, -5, -172, 5])[0]), ["c"])
+        self.assertEqual(_ids(self.index.search(limit=10, bbox=[175, -5, -175, 5])[0]), ["c"])
+
+    def test_datetime(self):
+        page = self.index.search(limit=10, datetime="2006-01-01T00:00:00Z/2010-06-01T00:00:00Z")[0]
+        # d has no temporal extent, b is open ended
+        self.assertEqual(_ids(page), ["b", "c", "d"])
+
+    def test_undated(self):
+        for interval in ([None], [], [[None]], [["2000-01-01T00:00:00Z"]]):
+            index = CollectionIndex([{"id": "u", "extent": {"temporal": {"interval": interval}}}])
+            page = index.search(limit=10, datetime="2000-06-01T00:00:00Z/2000-07-01T00:00:00Z")[0]
+            self.assertEqual(_ids(page), ["u"])
+
+    def test_free_text(self):
+        self.assertEqual(_ids(self.index.search(limit=10, q=["mars"])[0]), ["a", "d"])
+        self.assertEqual(_ids(self.index.search(limit=10, q=["mars odys"])[0]), ["a"])
+        self.assertEqual(_ids(self.index.search(limit=10, q=["moon", "express"])[0]), ["b", "d"])
+        self.assertEqual(_ids(self.index.search(limit=10, q=["venus"])[0]), [])
+
+
+class CollectionsEndpointTests(APITestCase):
+    """/collections is served from the collection cache, without querying the registry once it is loaded."""
+
+    async def test_collections(self):
+        await self.database.collection_cache.wait_ready()
+        requests = self.registry.requests
+        page = await self.get_json("/collections", params={"limit": 2})
+        self.assertEqual(_ids(page["collections"]), self.collection_ids()[:2])
+        next_link = next(link for link in page["links"] if link["rel"] == "next")
+        page = await self.get_json(next_link["href"])
+        self.assertEqual(_ids(page["collections"]), self.collection_ids()[2:])
+        self.assertEqual(self.registry.requests, requests)
+
+    async def test_collections_free_text(self):
+        await self.database.collection_cache.wait_ready()
+        target = self.documents[self.collection_ids()[1]]["pds:Target_Identification/pds:name"][0]
+        page = await self.get_json("/collections", params={"q": f"observing {target.lower()}"})
+        expected = [
+            collection_id for collection_id in self.collection_ids()
+            if self.documents[collection_id]["pds:Target_Identification/pds:name"][0] == target
+        ]
+        self.assertEqual(_ids(page["collections"]), expected)
+
+
+class UndatedCollectionTests(APITestCase):
+    """A collection without time coordinates is listed like the others."""
+
+    async def test_collections(self):
+        collection_id = self.collection_ids()[0]
+        del self.documents[collection_id]["pds:Time_Coordinates/pds:start_date_time"]
+        del self.documents[collection_id]["pds:Time_Coordinates/pds:stop_date_time"]
+        await self.database.collection_cache.wait_ready()
+        page = await self.get_json("/collections")
+        self.assertEqual(_ids(page["collections"]), self.collection_ids())
+
+
+class TemporalPruningTests(APITestCase):
+    """The collections searched by datetime are narrowed with the dates of their products, not of their labels."""
+
+    async def test_product_dated_outside_its_collection(self):
+        collection_id = self.collection_ids()[0]
+        product = deepcopy(self.documents[self.item_ids(collection_id)[0]])
+        product["lidvid"] = product["lidvid"].replace("product_", "late_")
+        product["pds:Time_Coordinates/pds:start_date_time"] = ["2099-01-01T00:00:00.000Z"]
+        product["pds:Time_Coordinates/pds:stop_date_time"] = ["2099-01-02T00:00:00.000Z"]
+        self.registry.index(product)
+        self.documents[product["lidvid"]] = product
+        await self.database.collection_cache.wait_ready()
+
+        params = {"collections": collection_id, "datetime": "2099-01-01T12:00:00Z/.."}
+        page = await self.get_json("/search", params=params)
+        self.assertEqual([f["id"] for f in page["features"]], [product["lidvid"]])
+
+    async def test_no_product_in_interval(self):
+        await self.database.collection_cache.wait_ready()
+        requests = self.registry.requests
+        params = {"collections": ",".join(self.collection_ids()), "datetime": "1900-01-01T00:00:00Z/1900-12-31T00:00:00Z"}
+        page = await self.get_json("/search", params=params)
+        self.assertEqual(page["features"], [])
+        self.assertEqual(self.registry.requests, requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import unittest
+
+import orjson
+
+from pds.registry.stac.export import to_wkb
+
+from .api_test_case import APITestCase
+
+
+class ExportTests(APITestCase):
+    """A collection export has all the items of the collection, sorted by id, and leaves no point in time open."""
+
+    async def test_ndjson(self):
+        collection_id = self.collection_ids()[0]
+        response = await self.client.get(f"/collections/{collection_id}/export")
+        self.assertEqual(response.status_code, 200, response.text)
+        ids = [orjson.loads(line)["id"] for line in response.content.splitlines()]
+        self.assertEqual(ids, self.item_ids(collection_id))
+        self.assertEqual(self.registry.open_pits, 0)
+
+    async def test_resumed(self):
+        collection_id = self.collection_ids()[0]
+        after = self.item_ids(collection_id)[9]
+        response = await self.client.get(f"/collections/{collection_id}/export", params={"cursor": after})
+        ids = [orjson.loads(line)["id"] for line in response.content.splitlines()]
+        self.assertEqual(ids, self.item_ids(collection_id)[10:])
+
+    async def test_geoparquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        collection_id = self.collection_ids()[1]
+        response = await self.client.get(f"/collections/{collection_id}/export", params={"format": "geoparquet"})
+        self.assertEqual(response.status_code, 200, response.text)
+        table = pq.read_table(io.BytesIO(response.content))
+        self.assertEqual(table.column("id").to_pylist(), self.item_ids(collection_id))
+
+
+class WKBTests(unittest.TestCase):
+    def test_polygon(self):
+        polygon = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+        wkb = to_wkb(polygon)
+        # little endian polygon of one ring of four points
+        self.assertEqual(wkb[:13], bytes([1, 3, 0, 0, 0, 1, 0, 0, 0, 4, 0, 0, 0]))
+        self.assertEqual(len(wkb), 13 + 4 * 16)
+
+    def test_multipolygon(self):
+        ring = [[0, 0], [1, 0], [1, 1], [0, 0]]
+        wkb = to_wkb({"type": "MultiPolygon", "coordinates": [[ring], [ring]]})
+        self.assertEqual(wkb[:9], bytes([1, 6, 0, 0, 0, 2, 0, 0, 0]))
+        self.assertEqual(wkb[9:], to_wkb({"type": "Polygon", "coordinates": [ring]}) * 2)
+
+    def test_missing(self):
+        self.assertIsNone(to_wkb(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
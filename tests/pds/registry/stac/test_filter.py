@@ -0,0 +1,82 @@
+import unittest
+
+from .api_test_case import APITestCase
+
+
+def _box(west, south, east, north):
+    return {"type": "Polygon", "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]]}
+
+
+def _intersects(document, box):
+    coordinates = document["bbox_polygon"]["coordinates"][0]
+    west, south = min(c[0] for c in coordinates), min(c[1] for c in coordinates)
+    east, north = max(c[0] for c in coordinates), max(c[1] for c in coordinates)
+    return west <= box[2] and box[0] <= east and south <= box[3] and box[1] <= north
+
+
+def _s_intersects(box):
+    return {"op": "s_intersects", "args": [{"property": "geometry"}, _box(*box)]}
+
+
+class SpatialFilterTests(APITestCase):
+    """CQL2 spatial filters match the same items whether or not the collections are pruned by their extents."""
+
+    def box_of(self, collection_id):
+        """A box around the first products of a collection."""
+        documents = [self.documents[i] for i in self.item_ids(collection_id)[:5]]
+        west = min(d["cart:Bounding_Coordinates/cart:west_bounding_coordinate"][0] for d in documents)
+        south = min(d["cart:Bounding_Coordinates/cart:south_bounding_coordinate"][0] for d in documents)
+        return west, south, west + 3, south + 3
+
+    def expected(self, matches):
+        return sorted(i for i in self.item_ids() if matches(self.documents[i]))
+
+    async def assert_filter(self, cql2, expected):
+        body = {"filter": cql2, "filter-lang": "cql2-json", "limit": 1000}
+        self.assertFalse(self.database.collection_cache.ready)
+        cold = await self.page_through("/search", body=body)
+        await self.database.collection_cache.refresh()
+        self.assertTrue(self.database.collection_cache.ready)
+        pruned = await self.page_through("/search", body=body)
+        for pages in (cold, pruned):
+            self.assertEqual(sorted(f["id"] for page in pages for f in page["features"]), expected)
+
+    async def test_intersects(self):
+        box = self.box_of(self.collection_ids()[0])
+        await self.assert_filter(_s_intersects(box), self.expected(lambda d: _intersects(d, box)))
+
+    async def test_not_intersects(self):
+        box = self.box_of(self.collection_ids()[0])
+        expected = self.expected(lambda d: not _intersects(d, box))
+        self.assertGreater(len(expected), self.items_per_collection)
+        await self.assert_filter({"op": "not", "args": [_s_intersects(box)]}, expected)
+
+    async def test_disjoint(self):
+        box = self.box_of(self.collection_ids()[0])
+        cql2 = {"op": "s_disjoint", "args": [{"property": "geometry"}, _box(*box)]}
+        await self.assert_filter(cql2, self.expected(lambda d: not _intersects(d, box)))
+
+    async def test_or_intersects(self):
+        first, second = (self.box_of(collection_id) for collection_id in self.collection_ids()[:2])
+        expected = self.expected(lambda d: _intersects(d, first) or _intersects(d, second))
+        self.assertTrue(any(not _intersects(self.documents[i], first) for i in expected))
+        self.assertTrue(any(not _intersects(self.documents[i], second) for i in expected))
+        await self.assert_filter({"op": "or", "args": [_s_intersects(first), _s_intersects(second)]}, expected)
+
+    async def test_and_intersects(self):
+        first = self.box_of(self.collection_ids()[0])
+        second = (first[0] + 1, first[1] + 1, first[2] + 1, first[3] + 1)
+        expected = self.expected(lambda d: _intersects(d, first) and _intersects(d, second))
+        await self.assert_filter({"op": "and", "args": [_s_intersects(first), _s_intersects(second)]}, expected)
+
+    async def test_text_filter(self):
+        box = self.box_of(self.collection_ids()[1])
+        page = await self.get_json("/search", params={
+            "filter": "NOT S_INTERSECTS(geometry, POLYGON(({0} {1}, {2} {1}, {2} {3}, {0} {3}, {0} {1})))".format(*box),
+            "limit": 1000,
+        })
+        self.assertEqual(sorted(f["id"] for f in page["features"]), self.expected(lambda d: not _intersects(d, box)))
+
+
+if __name__ == "__main__":
+    unittest.main()
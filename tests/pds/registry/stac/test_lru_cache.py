@@ -0,0 +1,88 @@
+import unittest
+from copy import deepcopy
+
+from pds.registry.stac.lru_cache import LRUCache
+from pds.registry.stac.lru_cache import fingerprint
+
+from .api_test_case import APITestCase
+
+TITLE = "pds:Identification_Area/pds:title"
+HARVEST_DATE_TIME = "ops:Harvest_Info/ops:harvest_date_time"
+
+
+class LRUCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats(), {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1})
+
+    def test_expires(self):
+        cache = LRUCache(maxsize=2, ttl=-1)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_versioned(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.put("a", 1, version="2024-01-01T00:00:00Z")
+        self.assertEqual(cache.get("a", version="2024-01-01T00:00:00Z"), 1)
+        # any version is read when none is given
+        self.assertEqual(cache.get("a"), 1)
+        # an entry read with another version is outdated
+        self.assertIsNone(cache.get("a", version="2024-02-01T00:00:00Z"))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint({"a": 1, "b": [1, 2]}), fingerprint({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(fingerprint({"a": 1, "b": [1, 2]}), fingerprint({"a": 1, "b": [2, 1]}))
+
+
+class CollectionDocumentsCacheTests(APITestCase):
+    """The collections are converted once, and converted again when they are harvested again."""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.database.collection_cache.wait_ready()
+        self.collection_id = self.collection_ids()[0]
+
+    def harvest(self, title, harvest_date):
+        collection = deepcopy(self.documents[self.collection_id])
+        collection[TITLE] = [title]
+        collection[HARVEST_DATE_TIME] = [harvest_date]
+        self.registry.index(collection)
+
+    async def test_served_from_cache(self):
+        collection = await self.get_json(f"/collections/{self.collection_id}")
+        requests = self.registry.requests
+        self.assertEqual(await self.get_json(f"/collections/{self.collection_id}"), collection)
+        self.assertEqual(self.registry.requests, requests)
+        self.assertGreater(self.database.collection_documents.stats()["hits"], 0)
+
+    async def test_harvested_again(self):
+        harvest_date = self.documents[self.collection_id][HARVEST_DATE_TIME][0]
+        # an update which is not a harvest is not seen
+        self.harvest("Retitled", harvest_date)
+        await self.database.collection_cache.refresh()
+        collection = await self.get_json(f"/collections/{self.collection_id}")
+        self.assertNotEqual(collection["title"], "Retitled")
+
+        self.harvest("Harvested again", "2099-01-01T00:00:00.000000Z")
+        evictions = self.database.collection_documents.evictions
+        await self.database.collection_cache.refresh()
+        self.assertEqual(self.database.collection_documents.evictions, evictions + 1)
+        collection = await self.get_json(f"/collections/{self.collection_id}")
+        self.assertEqual(collection["title"], "Harvested again")
+        collections = (await self.get_json("/collections"))["collections"]
+        self.assertIn("Harvested again", [c.get("title") for c in collections])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import re
+import unittest
+
+from pds.registry.stac.metrics import PREFIX
+from pds.registry.stac.metrics import Metrics
+from pds.registry.stac.metrics import Sample
+
+from .api_test_case import APITestCase
+
+_SERIES = re.compile(r"^(?P<name>\w+)(?:\{(?P<labels>.*)\})? (?P<value>\S+)$")
+
+
+def _series(text):
+    """The values of the series of a Prometheus exposition, by name without the prefix and sorted labels."""
+    series = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = _SERIES.match(line)
+        labels = tuple(sorted(re.findall(r'(\w+)="([^"]*)"', match["labels"] or "")))
+        series[match["name"].removeprefix(PREFIX), labels] = float(match["value"])
+    return series
+
+
+class MetricsTests(unittest.TestCase):
+    def test_render(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        with metrics.operation("search"):
+            metrics.observe_stage("took", 0.5)
+        # the stages out of an operation are not attributed to any
+        metrics.observe_stage("took", 0.05)
+        metrics.observe("search", "took", 2.0)
+        text = metrics.render([Sample("cache_hits_total", {"cache": "counts"}, 3), Sample("ready", {}, True)])
+
+        self.assertIn(f"# TYPE {PREFIX}stage_seconds histogram", text)
+        self.assertIn(f"# TYPE {PREFIX}cache_hits_total counter", text)
+        self.assertIn(f"# TYPE {PREFIX}ready gauge", text)
+        series = _series(text)
+        took = (("operation", "search"), ("stage", "took"))
+        self.assertEqual(series["stage_seconds_bucket", (("le", "0.1"), *took)], 0)
+        self.assertEqual(series["stage_seconds_bucket", (("le", "1.0"), *took)], 1)
+        self.assertEqual(series["stage_seconds_bucket", (("le", "+Inf"), *took)], 2)
+        self.assertEqual(series["stage_seconds_count", took], 2)
+        self.assertEqual(series["stage_seconds_sum", took], 2.5)
+        self.assertEqual(series["stage_seconds_count", (("operation", "search"), ("stage", "total"))], 1)
+        self.assertEqual(series["cache_hits_total", (("cache", "counts"),)], 3)
+        self.assertEqual(series["ready", ()], 1)
+
+
+class MetricsEndpointTests(APITestCase):
+    """/metrics exposes the latency of the stages of the operations served, and the gauges and counters of the
+    caches and the registry requests."""
+
+    async def test_metrics(self):
+        collection_id = self.collection_ids()[0]
+        await self.page_through("/search", params={"collections": collection_id, "limit": 15})
+        await self.get_json(f"/collections/{collection_id}/items/{self.item_ids(collection_id)[0]}")
+
+        response = await self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        series = _series(response.text)
+
+        def stage(operation, name):
+            return series["stage_seconds_count", (("operation", operation), ("stage", name))]
+
+        # 3 pages of 15 items
+        self.assertEqual(stage("post_search", "total"), 3)
+        self.assertEqual(stage("execute_search", "total"), 3)
+        self.assertEqual(stage("execute_search", "registry"), 3)
+        self.assertEqual(stage("execute_search", "convert"), 3)
+        self.assertEqual(stage("get_one_item", "total"), 1)
+        total = (("operation", "execute_search"), ("stage", "total"))
+        self.assertEqual(series["stage_seconds_bucket", (("le", "+Inf"), *total)], 3)
+
+        self.assertEqual(series["registry_requests_total", (("kind", "search"),)], 3)
+        self.assertEqual(series["registry_requests_total", (("kind", "count"),)], 1)
+        self.assertEqual(series["cache_entries", (("cache", "counts"),)], 1)
+        self.assertEqual(series["cache_hits_total", (("cache", "counts"),)], 2)
+        self.assertEqual(series["registry_circuit_open", ()], 0)
+        self.assertIn(("collection_cache_ready", ()), series)
+        self.assertIn(("catalog_cache_ready", ()), series)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from .api_test_case import APITestCase
+
+
+class QueryablesTests(APITestCase):
+    """The facet queryables of a collection list the distinct values of its items, from one cached aggregation."""
+
+    async def test_facets(self):
+        collection_id = self.collection_ids()[0]
+        product = self.documents[self.item_ids(collection_id)[0]]
+        queryables = await self.get_json(f"/collections/{collection_id}/queryables")
+        properties = queryables["properties"]
+        self.assertEqual(properties["pds:target"]["enum"], product["pds:Target_Identification/pds:name"])
+        self.assertEqual(
+            sorted(properties["pds:observing_system_component"]["enum"]),
+            sorted(product["pds:Observing_System_Component/pds:name"]),
+        )
+
+        requests = self.registry.requests
+        self.assertEqual(await self.get_json(f"/collections/{collection_id}/queryables"), queryables)
+        self.assertEqual(self.registry.requests, requests)
+
+    async def test_too_many_values(self):
+        unique_values = await self.database.get_items_unique_values(
+            self.collection_ids()[0], ["pds:target", "pds:observing_system_component"], limit=1
+        )
+        self.assertEqual(list(unique_values), ["pds:target"])
+
+
+if __name__ == "__main__":
+    unittest.main()
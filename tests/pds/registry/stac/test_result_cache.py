@@ -0,0 +1,120 @@
+import unittest
+from copy import deepcopy
+
+from pds.registry.stac.result_cache import MemoryResultCacheBackend
+from pds.registry.stac.result_cache import RedisResultCacheBackend
+from pds.registry.stac.result_cache import ResultCache
+
+from .api_test_case import APITestCase
+
+
+class _Store:
+    """Stand-in of an async Redis client."""
+
+    def __init__(self, available: bool = True):
+        self.values = {}
+        self.available = available
+
+    async def get(self, key):
+        if not self.available:
+            raise ConnectionError("store down")
+        return self.values.get(key)
+
+    async def set(self, key, value, px):
+        if not self.available:
+            raise ConnectionError("store down")
+        self.values[key] = value
+
+
+class ResultCacheBackendTests(unittest.IsolatedAsyncioTestCase):
+    async def test_memory_evicts_least_recently_used(self):
+        backend = MemoryResultCacheBackend(max_bytes=10)
+        await backend.set("a", b"1234", ttl=60)
+        await backend.set("b", b"1234", ttl=60)
+        self.assertEqual(await backend.get("a"), b"1234")
+        await backend.set("c", b"1234", ttl=60)
+        self.assertIsNone(await backend.get("b"))
+        self.assertEqual(await backend.get("a"), b"1234")
+        self.assertEqual(backend.stats()["evictions"], 1)
+        self.assertEqual(backend.size_bytes, 8)
+
+    async def test_memory_expires(self):
+        backend = MemoryResultCacheBackend(max_bytes=10)
+        await backend.set("a", b"1234", ttl=-1)
+        self.assertIsNone(await backend.get("a"))
+        self.assertEqual(backend.size_bytes, 0)
+
+    async def test_memory_skips_large_values(self):
+        backend = MemoryResultCacheBackend(max_bytes=10)
+        await backend.set("a", b"12345678901", ttl=60)
+        self.assertIsNone(await backend.get("a"))
+
+    async def test_redis(self):
+        store = _Store()
+        backend = RedisResultCacheBackend(store, prefix="test:")
+        await backend.set("a", b"1234", ttl=1.5)
+        self.assertEqual(store.values, {"test:a": b"1234"})
+        self.assertEqual(await backend.get("a"), b"1234")
+        self.assertIsNone(await backend.get("b"))
+        self.assertEqual(backend.stats(), {"hits": 1, "misses": 1, "stores": 1})
+
+    async def test_redis_unavailable(self):
+        backend = RedisResultCacheBackend(_Store(available=False))
+        await backend.set("a", b"1234", ttl=60)
+        self.assertIsNone(await backend.get("a"))
+
+
+class ResultCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.watermark = None
+
+        async def load_watermark():
+            return self.watermark
+
+        self.cache = ResultCache(MemoryResultCacheBackend(max_bytes=1024), load_watermark, ttl=60, watermark_interval=0)
+
+    async def test_keyed_by_watermark(self):
+        # nothing is cached until the watermark is known
+        self.assertIsNone(self.cache.key({"query": 1}))
+        self.watermark = "2024-01-01T00:00:00Z"
+        await self.cache._load_watermark()
+        key = self.cache.key({"query": 1})
+        await self.cache.set(key, {"hits": [1]})
+        self.assertEqual(await self.cache.get(self.cache.key({"query": 1})), {"hits": [1]})
+        self.assertIsNone(await self.cache.get(self.cache.key({"query": 2})))
+
+        self.watermark = "2024-01-02T00:00:00Z"
+        await self.cache._load_watermark()
+        self.assertNotEqual(self.cache.key({"query": 1}), key)
+        self.assertIsNone(await self.cache.get(self.cache.key({"query": 1})))
+
+
+class SearchResultCacheTests(APITestCase):
+    """Item searches are served from the result cache until new products are harvested."""
+
+    async def test_search_cached_until_harvest(self):
+        result_cache = self.database.result_cache
+        await result_cache._load_watermark()
+        collection_id = self.collection_ids()[0]
+        params = {"collections": collection_id, "limit": 100}
+
+        first = await self.get_json("/search", params=params)
+        requests = self.registry.requests
+        second = await self.get_json("/search", params=params)
+        self.assertEqual(self.registry.requests, requests)
+        self.assertEqual(second["features"], first["features"])
+        self.assertEqual(result_cache.stats()["hits"], 1)
+
+        product = deepcopy(self.documents[self.item_ids(collection_id)[0]])
+        product["lidvid"] = product["lidvid"].replace("product_", "harvested_")
+        product["ops:Harvest_Info/ops:harvest_date_time"] = ["2099-01-01T00:00:00.000000Z"]
+        self.registry.index(product)
+        await result_cache._load_watermark()
+
+        third = await self.get_json("/search", params=params)
+        self.assertEqual(third["features"][-1]["id"], product["lidvid"])
+        self.assertEqual(len(third["features"]), len(first["features"]) + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,318 @@
+import unittest
+from copy import deepcopy
+from unittest import mock
+
+import orjson
+
+from pds.registry.stac.types import item_source_fields
+from pds.registry.stac.types import item_to_stac
+
+from .api_test_case import APITestCase
+
+
+def _ids(pages):
+    return [feature["id"] for page in pages for feature in page["features"]]
+
+
+class SearchPagingTests(APITestCase):
+    """Paging through item searches returns every matching item once."""
+
+    async def test_get_search_pages(self):
+        pages = await self.page_through("/search", params={"limit": 7})
+        ids = _ids(pages)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(sorted(ids), self.item_ids())
+        self.assertTrue(all(len(page["features"]) == 7 for page in pages[:-1]))
+        self.assertEqual(pages[0]["numberMatched"], len(self.item_ids()))
+
+    async def test_post_search_pages(self):
+        collection_id = self.collection_ids()[1]
+        pages = await self.page_through("/search", body={"collections": [collection_id], "limit": 9})
+        ids = _ids(pages)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(sorted(ids), self.item_ids(collection_id))
+
+    async def test_sorted_by_id(self):
+        pages = await self.page_through("/search", body={"limit": 11, "sortby": [{"field": "id", "direction": "desc"}]})
+        self.assertEqual(_ids(pages), sorted(self.item_ids(), reverse=True))
+
+    async def test_sorted_by_datetime(self):
+        start = "pds:Time_Coordinates/pds:start_date_time"
+        expected = sorted(self.item_ids(), key=lambda i: self.documents[i][start][0], reverse=True)
+        pages = await self.page_through("/search", params={"sortby": "-properties.datetime", "limit": 13})
+        self.assertEqual(_ids(pages), expected)
+        body = {"limit": 13, "sortby": [{"field": "properties.datetime", "direction": "desc"}]}
+        self.assertEqual(_ids(await self.page_through("/search", body=body)), expected)
+
+    async def test_sorted_by_unknown_field(self):
+        response = await self.client.get("/search", params={"sortby": "-properties.unknown"})
+        self.assertEqual(response.status_code, 400, response.text)
+        response = await self.client.post("/search", json={"sortby": [{"field": "geometry", "direction": "asc"}]})
+        self.assertEqual(response.status_code, 400, response.text)
+
+    async def test_collection_items_pages(self):
+        collection_id = self.collection_ids()[0]
+        pages = await self.page_through(f"/collections/{collection_id}/items", params={"limit": 6})
+        self.assertEqual(sorted(_ids(pages)), self.item_ids(collection_id))
+
+    async def test_points_in_time_closed(self):
+        await self.page_through("/search", params={"limit": 7})
+        await self.page_through("/search", body={"limit": 9})
+        self.assertEqual(self.registry.open_pits, 0)
+
+    async def test_first_pages_open_no_point_in_time(self):
+        for _ in range(5):
+            page = await self.get_json("/search", params={"limit": 5})
+            self.assertTrue(any(link["rel"] == "next" for link in page["links"]))
+        self.assertEqual(self.registry.open_pits, 0)
+
+    async def test_point_in_time_opened_for_second_page(self):
+        page = await self.get_json("/search", params={"limit": 5})
+        next_link = next(link for link in page["links"] if link["rel"] == "next")
+        page = await self.get_json(next_link["href"])
+        self.assertEqual(self.registry.open_pits, 1)
+        next_link = next(link for link in page["links"] if link["rel"] == "next")
+        await self.get_json(next_link["href"])
+        self.assertEqual(self.registry.open_pits, 1)
+
+    async def test_free_text(self):
+        pages = await self.page_through("/search", params={"q": "observation", "limit": 10})
+        expected = [i for i in self.item_ids() if "pds:Citation_Information/pds:description" in self.documents[i]]
+        self.assertEqual(sorted(_ids(pages)), expected)
+        # every word of a query in any of the fields
+        page = await self.get_json("/search", params={"q": "product 1 collection 2", "limit": 100})
+        self.assertEqual(sorted(_ids([page])), [
+            "urn:nasa:pds:bench_0001:data:product_00000002::1.0",
+            "urn:nasa:pds:bench_0002:data:product_00000001::1.0",
+        ])
+
+    async def test_free_text_case_insensitive(self):
+        target = "pds:Target_Identification/pds:name"
+        expected = [i for i in self.item_ids() if self.documents[i][target][0] == "Mars"]
+        self.assertTrue(expected)
+        for q in ("mars", "MARS"):
+            pages = await self.page_through("/search", params={"q": q, "limit": 100})
+            self.assertEqual(sorted(_ids(pages)), expected)
+        # the words are matched whole
+        page = await self.get_json("/search", params={"q": "mar", "limit": 100})
+        self.assertEqual(page["features"], [])
+
+    async def test_items_by_ids(self):
+        ids = self.item_ids()[:3]
+        page = await self.get_json("/search", params={"ids": ",".join(ids)})
+        self.assertEqual(sorted(_ids([page])), ids)
+
+
+def _box(west, south, east, north):
+    return {"type": "Polygon", "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]]}
+
+
+def _intersects(document, box):
+    coordinates = document["bbox_polygon"]["coordinates"][0]
+    west, south = min(c[0] for c in coordinates), min(c[1] for c in coordinates)
+    east, north = max(c[0] for c in coordinates), max(c[1] for c in coordinates)
+    return west <= box[2] and box[0] <= east and south <= box[3] and box[1] <= north
+
+
+class SpatialSearchTests(APITestCase):
+    """The bbox and intersects searches are pushed down to the registry and match the same items, whether or not
+    the collections are pruned by their cached extents."""
+
+    def box_of(self, collection_id):
+        """A box around the first products of a collection."""
+        documents = [self.documents[i] for i in self.item_ids(collection_id)[:5]]
+        west = min(d["cart:Bounding_Coordinates/cart:west_bounding_coordinate"][0] for d in documents)
+        south = min(d["cart:Bounding_Coordinates/cart:south_bounding_coordinate"][0] for d in documents)
+        return west, south, west + 3, south + 3
+
+    def expected(self, *boxes):
+        return sorted(i for i in self.item_ids() if any(_intersects(self.documents[i], box) for box in boxes))
+
+    async def assert_search(self, expected, params=None, body=None):
+        self.assertTrue(expected)
+        cold = await self.page_through("/search", params=params, body=body)
+        await self.database.collection_cache.wait_ready()
+        pruned = await self.page_through("/search", params=params, body=body)
+        for pages in (cold, pruned):
+            self.assertEqual(sorted(_ids(pages)), expected)
+
+    async def test_bbox(self):
+        box = self.box_of(self.collection_ids()[0])
+        expected = self.expected(box)
+        await self.assert_search(expected, params={"bbox": ",".join(map(str, box)), "limit": 100})
+
+    async def test_post_bbox(self):
+        box = self.box_of(self.collection_ids()[1])
+        await self.assert_search(self.expected(box), body={"bbox": list(box), "limit": 100})
+
+    async def test_bbox_crossing_antimeridian(self):
+        # a product on both sides of the antimeridian, in a collection far from it
+        product = deepcopy(self.documents[self.item_ids(self.collection_ids()[0])[0]])
+        product["lidvid"] = product["lidvid"].replace("product_", "crossing_")
+        for side, value in (("west", 179.0), ("east", -179.0), ("south", 0.0), ("north", 1.0)):
+            product[f"cart:Bounding_Coordinates/cart:{side}_bounding_coordinate"] = [value]
+        product["bbox_polygon"] = _box(179.0, 0.0, 180.0, 1.0)
+        self.registry.index(product)
+        self.documents[product["lidvid"]] = product
+
+        expected = self.expected((175, -1, 180, 2), (-180, -1, -175, 2))
+        self.assertIn(product["lidvid"], expected)
+        await self.assert_search(expected, params={"bbox": "175,-1,-175,2", "limit": 100})
+
+    async def test_intersects(self):
+        box = self.box_of(self.collection_ids()[2])
+        expected = self.expected(box)
+        await self.assert_search(expected, params={"intersects": orjson.dumps(_box(*box)).decode(), "limit": 100})
+        await self.assert_search(expected, body={"intersects": _box(*box), "limit": 100})
+
+    async def test_intersects_geometry_collection(self):
+        first, second = (self.box_of(collection_id) for collection_id in self.collection_ids()[:2])
+        geometries = {"type": "GeometryCollection", "geometries": [_box(*first), _box(*second)]}
+        await self.assert_search(self.expected(first, second), body={"intersects": geometries, "limit": 100})
+
+
+class SourceFieldsTests(APITestCase):
+    """Only the registry fields read by the conversion of the items are fetched, and the items are complete."""
+
+    def record_includes(self):
+        """The `_source` includes of the item requests sent to the registry."""
+        includes = []
+        search, mget = self.registry.search, self.registry.mget
+
+        async def recorded_search(body=None, **kwargs):
+            if "aggs" not in body and "aggregations" not in body:
+                includes.append(body["_source"]["includes"])
+            return await search(body=body, **kwargs)
+
+        async def recorded_mget(body=None, **kwargs):
+            includes.append(kwargs["_source_includes"])
+            return await mget(body=body, **kwargs)
+
+        for name, recorded in (("search", recorded_search), ("mget", recorded_mget)):
+            patcher = mock.patch.object(self.registry, name, recorded)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return includes
+
+    def assert_complete(self, feature):
+        expected = item_to_stac(self.documents[feature["id"]])
+        for field in ("id", "collection", "geometry", "bbox", "properties", "assets"):
+            self.assertEqual(feature[field], expected[field], field)
+
+    async def test_search(self):
+        includes = self.record_includes()
+        page = await self.get_json("/search", params={"limit": 10})
+        self.assertEqual(includes, [item_source_fields()])
+        self.assertNotIn("ops:Harvest_Info/ops:harvest_date_time", includes[0])
+        self.assertEqual(len(page["features"]), 10)
+        for feature in page["features"]:
+            self.assert_complete(feature)
+
+    async def test_items_by_ids(self):
+        includes = self.record_includes()
+        page = await self.get_json("/search", params={"ids": ",".join(self.item_ids()[:3])})
+        self.assertEqual(includes, [["product_class", *item_source_fields()]])
+        for feature in page["features"]:
+            self.assert_complete(feature)
+
+    async def test_fields(self):
+        includes = self.record_includes()
+        page = await self.get_json("/search", params={"limit": 10, "fields": "-assets"})
+        self.assertEqual(includes, [item_source_fields(exclude={"assets"})])
+        self.assertNotIn("file_ref", " ".join(includes[0]))
+        self.assertTrue(all("assets" not in feature for feature in page["features"]))
+
+
+def _record_counts(test):
+    """The queries of the count requests a test sends to the registry."""
+    queries = []
+    count = test.registry.count
+
+    async def recorded(body=None, **kwargs):
+        queries.append(body["query"])
+        return await count(body=body, **kwargs)
+
+    patcher = mock.patch.object(test.registry, "count", recorded)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return queries
+
+
+class ExactCountTests(APITestCase):
+    """numberMatched is counted by a count request along the first page, reused by the next pages."""
+
+    settings = {"count_mode": "exact"}
+
+    async def test_counted_once(self):
+        queries = _record_counts(self)
+        pages = await self.page_through("/search", params={"limit": 50})
+        self.assertEqual([page["numberMatched"] for page in pages], [len(self.item_ids())] * 3)
+        self.assertEqual(len(queries), 1)
+
+    async def test_counts_the_query_searched(self):
+        target = "pds:Target_Identification/pds:name"
+        expected = [i for i in self.item_ids() if self.documents[i][target][0] == "Mars"]
+        queries = _record_counts(self)
+        page = await self.get_json("/search", params={"q": "mars", "limit": 5})
+        self.assertEqual(page["numberMatched"], len(expected))
+        self.assertEqual(len(queries), 1)
+
+    async def test_first_page_holds_all(self):
+        collection_id = self.collection_ids()[0]
+        page = await self.get_json("/search", params={"collections": collection_id, "limit": 100})
+        self.assertEqual(page["numberMatched"], len(self.item_ids(collection_id)))
+
+
+class TrackTotalHitsCountTests(APITestCase):
+    """numberMatched is the total of the hits, up to count_track_total_hits."""
+
+    settings = {"count_mode": "track_total_hits", "count_track_total_hits": 50}
+
+    async def test_counted_by_search(self):
+        queries = _record_counts(self)
+        collection_id = self.collection_ids()[0]
+        page = await self.get_json("/search", params={"collections": collection_id, "limit": 10})
+        self.assertEqual(page["numberMatched"], len(self.item_ids(collection_id)))
+        # beyond count_track_total_hits, the number of products is not known
+        page = await self.get_json("/search", params={"limit": 10})
+        self.assertIsNone(page.get("numberMatched"))
+        self.assertEqual(queries, [])
+
+
+class EstimateCountTests(APITestCase):
+    """numberMatched is the default total of the hits, a lower bound beyond the registry limit."""
+
+    settings = {"count_mode": "estimate"}
+
+    async def test_counted_by_search(self):
+        queries = _record_counts(self)
+        pages = await self.page_through("/search", params={"limit": 50})
+        self.assertEqual([page["numberMatched"] for page in pages], [len(self.item_ids())] * 3)
+        self.assertEqual(queries, [])
+
+    async def test_lower_bound(self):
+        search = self.registry.search
+
+        async def capped(body=None, **kwargs):
+            response = await search(body=body, **kwargs)
+            if "total" in response["hits"]:
+                response["hits"]["total"] = {"value": 100, "relation": "gte"}
+            return response
+
+        with mock.patch.object(self.registry, "search", capped):
+            page = await self.get_json("/search", params={"limit": 10})
+        self.assertEqual(page["numberMatched"], 100)
+
+
+class CountOffTests(APITestCase):
+    settings = {"count_mode": "off"}
+
+    async def test_not_counted(self):
+        queries = _record_counts(self)
+        page = await self.get_json("/search", params={"limit": 10})
+        self.assertIsNone(page.get("numberMatched"))
+        self.assertEqual(queries, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
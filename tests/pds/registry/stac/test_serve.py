@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pds.registry.stac import app as app_module
+from pds.registry.stac.database_logic import PDSDatabaseLogic
+
+from .fake_opensearch import FakeAsyncOpenSearch
+from .fake_opensearch import synthetic_registry
+
+
+class ServeTests(unittest.TestCase):
+    """app.run starts the development server, or the workers of the production mode with the collection snapshot
+    built beforehand."""
+
+    def serve(self, **settings):
+        """The arguments app.run starts uvicorn with, under the PDS_REGISTRY_ `settings`."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        environment = {f"PDS_REGISTRY_{name.upper()}": str(value) for name, value in settings.items()}
+        with mock.patch.dict(os.environ, environment):
+            self.database = PDSDatabaseLogic()
+        self.database.client = FakeAsyncOpenSearch(synthetic_registry(3, 10, seed=0))
+
+        with (
+            mock.patch.dict(os.environ),
+            mock.patch.object(app_module, "database_logic", self.database),
+            mock.patch.object(tempfile, "gettempdir", return_value=directory.name),
+            mock.patch("os.cpu_count", return_value=4),
+            mock.patch("uvicorn.run") as run,
+        ):
+            app_module.run()
+            self.environment = dict(os.environ)
+        run.assert_called_once()
+        self.assertEqual(run.call_args.args, ("pds.registry.stac.app:app",))
+        return run.call_args.kwargs
+
+    def test_development(self):
+        kwargs = self.serve()
+        self.assertNotIn("workers", kwargs)
+        self.assertEqual(kwargs["reload"], app_module.settings.reload)
+        self.assertIsNone(self.database.collection_snapshot)
+
+    def test_workers(self):
+        kwargs = self.serve(serve_workers=3, serve_log_level="warning", serve_graceful_timeout=5)
+        self.assertEqual(kwargs["workers"], 3)
+        self.assertEqual(kwargs["log_level"], "warning")
+        self.assertEqual(kwargs["log_config"]["loggers"]["pds"]["level"], "WARNING")
+        self.assertEqual(kwargs["log_config"]["loggers"]["opensearch"]["level"], "WARNING")
+        self.assertEqual(kwargs["timeout_graceful_shutdown"], 5)
+        self.assertNotIn("reload", kwargs)
+
+        # the snapshot the workers load is built before they start, and its path handed over to them
+        snapshot = self.database.collection_snapshot
+        self.assertEqual(self.environment["PDS_REGISTRY_COLLECTION_SNAPSHOT_PATH"], snapshot.path)
+        self.assertTrue(snapshot.fresh())
+        self.assertEqual(sorted(snapshot.load()), sorted(self.database.collection_cache.ids()))
+        self.assertEqual(len(snapshot.load()), 3)
+
+    def test_workers_by_cpu(self):
+        kwargs = self.serve(serve_workers=0)
+        self.assertEqual(kwargs["workers"], 4)
+
+    def test_single_worker(self):
+        kwargs = self.serve(serve_workers=1)
+        self.assertEqual(kwargs["workers"], 1)
+        # a single worker crawls the registry on its own
+        self.assertIsNone(self.database.collection_snapshot)
+        self.assertNotIn("PDS_REGISTRY_COLLECTION_SNAPSHOT_PATH", self.environment)
+
+
+if __name__ == "__main__":
+    unittest.main()
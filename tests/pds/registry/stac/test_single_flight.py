@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from pds.registry.stac.single_flight import SingleFlight
+
+from .api_test_case import APITestCase
+
+
+class SingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.single_flight = SingleFlight()
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def call(self):
+        self.calls += 1
+        await self.release.wait()
+        return {"calls": self.calls}
+
+    async def test_shared(self):
+        callers = [asyncio.create_task(self.single_flight.do("key", self.call, kind="search")) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(await asyncio.gather(*callers), [{"calls": 1}] * 5)
+        self.assertEqual(self.single_flight.stats(), {"in_flight": 0, "executed": {"search": 1}, "coalesced": {"search": 4}})
+        # the calls made once the shared call landed are not coalesced
+        self.assertEqual(await self.single_flight.do("key", self.call, kind="search"), {"calls": 2})
+
+    async def test_distinct_keys(self):
+        self.release.set()
+        await asyncio.gather(self.single_flight.do("a", self.call), self.single_flight.do("b", self.call))
+        self.assertEqual(self.calls, 2)
+
+    async def test_error_shared(self):
+        async def fail():
+            self.calls += 1
+            await self.release.wait()
+            raise ConnectionError("registry down")
+
+        callers = [asyncio.create_task(self.single_flight.do("key", fail)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+        for result in await asyncio.gather(*callers, return_exceptions=True):
+            self.assertIsInstance(result, ConnectionError)
+        self.assertEqual(self.calls, 1)
+
+    async def test_caller_cancelled(self):
+        first = asyncio.create_task(self.single_flight.do("key", self.call))
+        second = asyncio.create_task(self.single_flight.do("key", self.call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        # the other caller still waits for the shared call
+        self.release.set()
+        self.assertEqual(await second, {"calls": 1})
+        self.assertTrue(first.cancelled())
+
+    async def test_last_caller_cancelled(self):
+        caller = asyncio.create_task(self.single_flight.do("key", self.call))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await caller
+        self.assertEqual(self.single_flight.stats()["in_flight"], 0)
+        self.release.set()
+        self.assertEqual(await self.single_flight.do("key", self.call), {"calls": 2})
+
+
+class CoalescedSearchTests(APITestCase):
+    """Concurrent identical searches share their registry requests."""
+
+    def record_searches(self):
+        """The bodies of the item searches sent to the registry."""
+        bodies = []
+        search = self.registry.search
+
+        async def recorded(body=None, **kwargs):
+            if "aggs" not in body and "aggregations" not in body:
+                bodies.append(body)
+            return await search(body=body, **kwargs)
+
+        patcher = mock.patch.object(self.registry, "search", recorded)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return bodies
+
+    async def search_concurrently(self, n):
+        self.registry.latency = 0.05
+        collection_id = self.collection_ids()[0]
+        params = {"collections": collection_id, "limit": 10}
+        return await asyncio.gather(*(self.get_json("/search", params=params) for _ in range(n)))
+
+    async def test_one_registry_search(self):
+        bodies = self.record_searches()
+        pages = await self.search_concurrently(5)
+        self.assertEqual(len(bodies), 1)
+        # the shared response is not altered by the conversion of any of the searches
+        self.assertTrue(all(page["features"] == pages[0]["features"] for page in pages))
+        stats = self.database.single_flight.stats()
+        self.assertEqual(stats["executed"]["search"], 1)
+        self.assertEqual(stats["coalesced"]["search"], 4)
+
+
+class UncoalescedSearchTests(CoalescedSearchTests):
+    settings = {"coalesce_requests": False}
+
+    async def test_one_registry_search(self):
+        bodies = self.record_searches()
+        await self.search_concurrently(5)
+        self.assertEqual(len(bodies), 5)
+        self.assertIsNone(self.database.single_flight)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from pds.registry.stac.snapshot import CollectionSnapshot
+
+
+class CollectionSnapshotTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.snapshot = CollectionSnapshot(os.path.join(directory.name, "collections.snapshot"), max_age=60)
+        self.builds = 0
+
+    async def build(self):
+        self.builds += 1
+        yield {"a": {"bbox": [[0, 0, 1, 1]]}}
+        yield {"b": {"bbox": [[1, 1, 2, 2]]}}
+
+    async def load(self, **kwargs):
+        collections = {}
+        async for chunk in self.snapshot.collections(self.build, **kwargs):
+            collections.update(chunk)
+        return collections
+
+    def test_write_load(self):
+        self.assertIsNone(self.snapshot.load())
+        self.snapshot.write({"a": {"bbox": [[0, 0, 1, 1]]}})
+        self.assertEqual(self.snapshot.load(), {"a": {"bbox": [[0, 0, 1, 1]]}})
+        self.assertTrue(self.snapshot.fresh())
+
+    def test_not_a_snapshot(self):
+        with open(self.snapshot.path, "wb") as f:
+            f.write(b"{}")
+        self.assertIsNone(self.snapshot.load())
+
+    async def test_built_once(self):
+        self.assertEqual(await self.load(), {"a": {"bbox": [[0, 0, 1, 1]]}, "b": {"bbox": [[1, 1, 2, 2]]}})
+        self.assertEqual(await self.load(), {"a": {"bbox": [[0, 0, 1, 1]]}, "b": {"bbox": [[1, 1, 2, 2]]}})
+        self.assertEqual(self.builds, 1)
+
+    async def test_rebuilt_when_unreadable(self):
+        with open(self.snapshot.path, "wb") as f:
+            f.write(self.snapshot.MAGIC + b"{not json")
+        self.assertTrue(self.snapshot.fresh())
+        collections = await asyncio.wait_for(self.load(), timeout=5)
+        self.assertEqual(collections, {"a": {"bbox": [[0, 0, 1, 1]]}, "b": {"bbox": [[1, 1, 2, 2]]}})
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(self.snapshot.load(), collections)
+
+    async def test_rebuilt_when_outdated(self):
+        self.snapshot.write({"old": {"bbox": [[0, 0, 1, 1]]}})
+        os.utime(self.snapshot.path, (0, 0))
+        chunks = [chunk async for chunk in self.snapshot.collections(self.build, serve_stale=True)]
+        # the outdated snapshot first, then the collections crawled
+        self.assertEqual(list(chunks[0]), ["old"])
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(self.snapshot.load(), {"a": {"bbox": [[0, 0, 1, 1]]}, "b": {"bbox": [[1, 1, 2, 2]]}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from .api_test_case import APITestCase
+
+
+def _ids(pages):
+    return [feature["id"] for page in pages for feature in page["features"]]
+
+
+class StreamedSearchTests(APITestCase):
+    """Pages larger than the stream chunk size are streamed, with the same items and links as other pages."""
+
+    settings = {"stream_chunk_size": 10}
+
+    async def test_streamed_pages(self):
+        pages = await self.page_through("/search", body={"limit": 25})
+        ids = _ids(pages)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(sorted(ids), self.item_ids())
+        self.assertTrue(all(page["numberReturned"] == 25 for page in pages[:-1]))
+        self.assertEqual(pages[-1]["numberReturned"], len(ids) - 25 * (len(pages) - 1))
+
+    async def test_streamed_page_matches_unstreamed_page(self):
+        streamed = await self.page_through("/search", body={"limit": 30})
+        unstreamed = await self.page_through("/search", body={"limit": 5})
+        self.assertEqual(_ids(streamed), _ids(unstreamed))
+
+    async def test_streamed_fields(self):
+        pages = await self.page_through("/search", body={"limit": 25, "fields": {"include": ["id"], "exclude": ["assets"]}})
+        self.assertTrue(all("assets" not in feature for page in pages for feature in page["features"]))
+        self.assertEqual(sorted(_ids(pages)), self.item_ids())
+
+    async def test_streamed_get_pages(self):
+        pages = await self.page_through("/search", params={"limit": 25})
+        self.assertEqual(sorted(_ids(pages)), self.item_ids())
+
+    async def test_points_in_time_closed(self):
+        await self.page_through("/search", params={"limit": 25})
+        await self.page_through("/search", body={"limit": 25})
+        self.assertEqual(self.registry.open_pits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
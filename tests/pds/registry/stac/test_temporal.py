@@ -0,0 +1,39 @@
+import unittest
+from datetime import datetime
+from datetime import timezone
+
+from pds.registry.stac.temporal import overlaps
+from pds.registry.stac.temporal import parse_datetime_interval
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class DatetimeIntervalTests(unittest.TestCase):
+    def test_open_ends(self):
+        self.assertEqual(parse_datetime_interval("../2000-01-01T00:00:00Z"), (None, _utc(2000, 1, 1)))
+        self.assertEqual(parse_datetime_interval("2000-01-01T00:00:00Z/.."), (_utc(2000, 1, 1), None))
+        self.assertIsNone(parse_datetime_interval("../.."))
+        self.assertIsNone(parse_datetime_interval(None))
+
+    def test_bounds_beyond_the_epoch(self):
+        # only the bounds substituted to "..", 0001 and 9999, are open
+        self.assertEqual(
+            parse_datetime_interval("1965-01-01T00:00:00Z/2300-01-01T00:00:00Z"), (_utc(1965, 1, 1), _utc(2300, 1, 1))
+        )
+        self.assertEqual(parse_datetime_interval("1962-07-10T00:00:00Z/.."), (_utc(1962, 7, 10), None))
+
+    def test_instant(self):
+        self.assertEqual(parse_datetime_interval("2000-01-01T00:00:00Z"), (_utc(2000, 1, 1), _utc(2000, 1, 1)))
+
+    def test_overlaps(self):
+        interval = (_utc(2000, 1, 1), _utc(2001, 1, 1))
+        self.assertTrue(overlaps(_utc(2000, 6, 1), None, interval))
+        self.assertTrue(overlaps(None, _utc(2000, 1, 1), interval))
+        self.assertFalse(overlaps(_utc(1965, 1, 1), _utc(1999, 1, 1), interval))
+        self.assertFalse(overlaps(_utc(1965, 1, 1), _utc(1966, 1, 1), (_utc(1966, 6, 1), None)))
+
+
+if __name__ == "__main__":
+    unittest.main()
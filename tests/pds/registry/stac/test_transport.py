@@ -0,0 +1,140 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from opensearchpy import exceptions
+
+from pds.registry.stac.transport import CircuitBreaker
+from pds.registry.stac.transport import RegistryUnavailableError
+from pds.registry.stac.transport import is_registry_failure
+
+from .api_test_case import APITestCase
+
+
+def _down():
+    return exceptions.ConnectionError("N/A", "registry down", None)
+
+
+class CircuitBreakerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+        self.requests = 0
+
+    async def request(self, error=None):
+        self.requests += 1
+        if error is not None:
+            raise error
+        return {"ok": True}
+
+    async def fail(self, n):
+        for _ in range(n):
+            with self.assertRaises(exceptions.ConnectionError):
+                await self.breaker.call(lambda: self.request(_down()))
+
+    async def test_is_registry_failure(self):
+        self.assertTrue(is_registry_failure(_down()))
+        self.assertTrue(is_registry_failure(asyncio.TimeoutError()))
+        self.assertTrue(is_registry_failure(exceptions.TransportError(503, "unavailable", {})))
+        self.assertTrue(is_registry_failure(exceptions.TransportError(429, "rejected", {})))
+        self.assertFalse(is_registry_failure(exceptions.NotFoundError(404, "missing", {})))
+        self.assertFalse(is_registry_failure(exceptions.RequestError(400, "parsing_exception", {})))
+
+    async def test_opens(self):
+        await self.fail(2)
+        self.assertEqual(self.breaker.state, "closed")
+        await self.fail(1)
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(RegistryUnavailableError):
+            await self.breaker.call(self.request)
+        self.assertEqual(self.requests, 3)
+        self.assertEqual(self.breaker.stats(), {"state": "open", "consecutive_failures": 3, "rejected": 1})
+
+    async def test_successes_reset_failures(self):
+        await self.fail(2)
+        await self.breaker.call(self.request)
+        await self.fail(2)
+        self.assertEqual(self.breaker.state, "closed")
+
+    async def test_wrong_requests_are_not_failures(self):
+        for _ in range(5):
+            with self.assertRaises(exceptions.NotFoundError):
+                await self.breaker.call(lambda: self.request(exceptions.NotFoundError(404, "missing", {})))
+        self.assertEqual(self.breaker.state, "closed")
+
+    async def test_half_open_probe_recovers(self):
+        await self.fail(3)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.breaker.state, "half_open")
+
+        release = asyncio.Event()
+
+        async def probe():
+            await release.wait()
+            return await self.request()
+
+        probing = asyncio.create_task(self.breaker.call(probe))
+        await asyncio.sleep(0)
+        # a single request probes the registry, the others still fail fast
+        with self.assertRaises(RegistryUnavailableError):
+            await self.breaker.call(self.request)
+        release.set()
+        self.assertEqual(await probing, {"ok": True})
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertEqual(await self.breaker.call(self.request), {"ok": True})
+
+    async def test_half_open_probe_fails(self):
+        await self.fail(3)
+        await asyncio.sleep(0.05)
+        await self.fail(1)
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(RegistryUnavailableError):
+            await self.breaker.call(self.request)
+
+
+class CircuitBreakerAPITests(APITestCase):
+    """Searches fail fast with a 503 while the registry is down, and are served again once it recovers."""
+
+    settings = {
+        "registry_circuit_failure_threshold": 2,
+        "registry_circuit_reset_timeout": 0.1,
+        # a single registry request by search
+        "count_mode": "off",
+        "result_cache_backend": "off",
+    }
+
+    async def test_fail_fast_and_recover(self):
+        searches = 0
+
+        async def down(body=None, **kwargs):
+            nonlocal searches
+            searches += 1
+            raise _down()
+
+        with mock.patch.object(self.registry, "search", down):
+            for _ in range(2):
+                with self.assertRaises(exceptions.ConnectionError):
+                    await self.client.get("/search", params={"limit": 5})
+            for _ in range(3):
+                response = await self.client.get("/search", params={"limit": 5})
+                self.assertEqual(response.status_code, 503, response.text)
+            self.assertEqual(searches, 2)
+            status = (await self.client.get("/ready")).json()
+            self.assertEqual(status["registry_circuit"]["state"], "open")
+
+        await asyncio.sleep(0.1)
+        page = await self.get_json("/search", params={"limit": 5})
+        self.assertEqual(len(page["features"]), 5)
+        self.assertEqual(self.database.circuit_breaker.state, "closed")
+
+
+class CircuitBreakerDisabledTests(APITestCase):
+    settings = {"registry_circuit_failure_threshold": 0}
+
+    async def test_disabled(self):
+        self.assertIsNone(self.database.circuit_breaker)
+        status = (await self.client.get("/ready")).json()
+        self.assertNotIn("registry_circuit", status)
+
+
+if __name__ == "__main__":
+    unittest.main()
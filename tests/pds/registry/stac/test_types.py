@@ -0,0 +1,79 @@
+import unittest
+
+from pds.registry.stac.types import DEFAULT_BBOX
+from pds.registry.stac.types import ITEM_SOURCE_FIELDS
+from pds.registry.stac.types import collection_to_stac
+from pds.registry.stac.types import item_to_stac
+
+_PRODUCT = {
+    "lidvid": "urn:nasa:pds:bundle:collection:product::1.0",
+    "ops:Provenance/ops:parent_collection_identifier": ["urn:nasa:pds:bundle:collection::1.0"],
+    "bbox_polygon": {"type": "Polygon", "coordinates": [[[0, 1], [2, 1], [2, 3], [0, 3], [0, 1]]]},
+    "ops:Data_File_Info/ops:file_ref": ["https://pds.nasa.gov/a.img", "https://pds.nasa.gov/b.img"],
+    "pds:Identification_Area/pds:title": ["A product"],
+    "pds:Target_Identification/pds:name": ["Mars"],
+    "pds:Investigation_Area/pds:name": ["Mars Odyssey"],
+    "pds:Time_Coordinates/pds:stop_date_time": ["2001-01-01T00:00:00Z"],
+}
+
+
+class _Recorded(dict):
+    """A registry document recording the fields read."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.read = set()
+
+    def get(self, key, default=None):
+        self.read.add(key)
+        return super().get(key, default)
+
+
+class ItemToSTACTests(unittest.TestCase):
+    def test_product(self):
+        item = item_to_stac(_PRODUCT)
+        self.assertEqual(item["id"], _PRODUCT["lidvid"])
+        self.assertEqual(item["collection"], "urn:nasa:pds:bundle:collection::1.0")
+        self.assertEqual(item["bbox"], [0, 1, 2, 3])
+        self.assertEqual(list(item["assets"]), ["data_file_1", "data_file_2"])
+        self.assertEqual(item["assets"]["data_file_2"]["type"], "application/octet-stream")
+        self.assertEqual(item["keywords"], ["Mars", "Mars Odyssey"])
+        # the products without start date time are dated by their stop date time
+        self.assertEqual(item["properties"], {"datetime": "2001-01-01T00:00:00Z", "end_datetime": "2001-01-01T00:00:00Z"})
+        self.assertNotIn("description", item)
+        self.assertNotIn("providers", item)
+
+    def test_source_fields(self):
+        # the conversion reads the fields of ITEM_SOURCE_FIELDS, and each STAC field only needs its own
+        source = _Recorded(_PRODUCT)
+        item = item_to_stac(source)
+        self.assertEqual(source.read, {field for fields in ITEM_SOURCE_FIELDS.values() for field in fields})
+        for stac_field, fields in ITEM_SOURCE_FIELDS.items():
+            projected = item_to_stac({field: _PRODUCT[field] for field in fields if field in _PRODUCT})
+            self.assertEqual(projected.get(stac_field), item.get(stac_field), stac_field)
+
+    def test_subset_of_fields(self):
+        item = item_to_stac({"lidvid": _PRODUCT["lidvid"]})
+        self.assertEqual(item["id"], _PRODUCT["lidvid"])
+        self.assertIsNone(item["collection"])
+        self.assertIsNone(item["bbox"])
+        self.assertEqual(item["assets"], {})
+        self.assertNotIn("properties", item)
+
+
+class CollectionToSTACTests(unittest.TestCase):
+    def test_extent(self):
+        collection = collection_to_stac(_PRODUCT, {"bbox": [[0, 1, 2, 3]]})
+        self.assertEqual(collection["type"], "Collection")
+        self.assertEqual(
+            collection["extent"],
+            {"spatial": {"bbox": [[0, 1, 2, 3]]}, "temporal": {"interval": [[None, "2001-01-01T00:00:00Z"]]}},
+        )
+
+    def test_no_extent(self):
+        collection = collection_to_stac({"lidvid": "urn:nasa:pds:bundle:collection::1.0"})
+        self.assertEqual(collection["extent"], {"spatial": {"bbox": DEFAULT_BBOX}, "temporal": {"interval": [[None, None]]}})
+
+
+if __name__ == "__main__":
+    unittest.main()